@@ -0,0 +1,113 @@
+"""
+Benchmarks the per-request cost of serializing with marshmallow schemas,
+building the schema on every request (as done before the schema registry
+was introduced) compared to using the schema registry, and compared to
+using precompiled dump functions.
+
+Run from the src/ folder:
+
+    python -m benchmarks.schemas
+
+"""
+import json
+import timeit
+import marshmallow_dataclass as md
+from datetime import datetime, timedelta, timezone
+
+from origin.schemas import get_schema, get_schema_class, get_dumper
+from origin.ggo import Ggo, Technology, GetGgoListResponse, GetGgoListRequest
+from origin.services.datahub import GetGgoListResponse as DataHubGetGgoListResponse
+
+
+ITERATIONS = 50
+
+BEGIN = datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+
+GGO_LIST_REQUEST = {
+    'filters': {'sector': ['DK1'], 'category': 'stored'},
+    'offset': 0,
+    'limit': 100,
+}
+
+DATAHUB_GGO_LIST_RESPONSE = {
+    'success': True,
+    'ggos': [
+        {
+            'address': f'address-{i}',
+            'gsrn': '123456789012345',
+            'begin': (BEGIN + timedelta(hours=i)).isoformat(),
+            'end': (BEGIN + timedelta(hours=i + 1)).isoformat(),
+            'sector': 'DK1',
+            'amount': 100,
+            'issueTime': BEGIN.isoformat(),
+            'expireTime': BEGIN.isoformat(),
+            'technologyCode': 'T010101',
+            'fuelCode': 'F01010101',
+        }
+        for i in range(100)
+    ],
+}
+
+
+GGO_LIST_RESPONSE = GetGgoListResponse(
+    success=True,
+    total=1000,
+    results=[
+        Ggo(
+            address=f'address-{i}',
+            begin=BEGIN + timedelta(hours=i),
+            end=BEGIN + timedelta(hours=i + 1),
+            amount=100,
+            sector='DK1',
+            technology_code='T010101',
+            fuel_code='F01010101',
+            technology=Technology(technology='Wind'),
+            emissions={'CO2': 12.5, 'NOx': 0.25},
+            issue_gsrn='123456789012345',
+        )
+        for i in range(1000)
+    ],
+)
+
+
+def benchmark(name, func):
+    seconds = timeit.timeit(func, number=ITERATIONS)
+    print('%-50s %8.3f ms/request' % (name, seconds / ITERATIONS * 1000))
+
+
+def run():
+    response = GetGgoListResponse(success=True, total=0, results=[])
+
+    benchmark(
+        'GetGgoListRequest load (build schema)',
+        lambda: md.class_schema(GetGgoListRequest)().load(GGO_LIST_REQUEST))
+    benchmark(
+        'GetGgoListRequest load (registry)',
+        lambda: get_schema(GetGgoListRequest).load(GGO_LIST_REQUEST))
+    benchmark(
+        'GetGgoListResponse dump (build schema)',
+        lambda: md.class_schema(GetGgoListResponse)().dump(response))
+    benchmark(
+        'GetGgoListResponse dump (registry)',
+        lambda: get_schema(GetGgoListResponse).dump(response))
+    benchmark(
+        'DataHub GetGgoListResponse load (build schema)',
+        lambda: md.class_schema(DataHubGetGgoListResponse)().load(DATAHUB_GGO_LIST_RESPONSE))
+    benchmark(
+        'DataHub GetGgoListResponse load (registry)',
+        lambda: get_schema(DataHubGetGgoListResponse).load(DATAHUB_GGO_LIST_RESPONSE))
+
+
+    schema_class = get_schema_class(GetGgoListResponse)
+    dumper = get_dumper(schema_class)
+
+    benchmark(
+        'GetGgoListResponse, 1000 GGOs (schema + json)',
+        lambda: json.dumps(get_schema(GetGgoListResponse).dump(GGO_LIST_RESPONSE)))
+    benchmark(
+        'GetGgoListResponse, 1000 GGOs (dumper + json)',
+        lambda: json.dumps(dumper(GGO_LIST_RESPONSE)))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,95 @@
+"""
+Benchmarks filling labels and groups of a GgoSummary at HOUR resolution
+(with 20 technology groups), stepping through fill_range one label at
+a time (as done before labels were generated as NumPy arrays) compared
+to the array-based fill.
+
+Run from the src/ folder:
+
+    python -m benchmarks.summary
+
+"""
+import timeit
+from itertools import groupby
+from datetime import datetime, timezone
+from dateutil.relativedelta import relativedelta
+from unittest.mock import Mock
+
+from origin.common import DateTimeRange
+from origin.ggo import SummaryResolution, SummaryGroup
+from origin.ggo.queries import GgoSummary
+
+
+ITERATIONS = 3
+
+GROUPS = 20
+
+BEGIN = datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+
+
+def get_summary(years):
+    summary = GgoSummary(Mock(), Mock(), SummaryResolution.HOUR, ['technology'])
+    summary.fill(DateTimeRange(
+        begin=BEGIN,
+        end=BEGIN + relativedelta(years=years) - relativedelta(hours=1),
+    ))
+
+    labels = summary.labels
+
+    # Every other hour has results, for every group
+    summary._raw_results = [
+        (label, f'Technology {g}', 100)
+        for g in range(GROUPS)
+        for label in labels[::2]
+    ]
+
+    return summary
+
+
+def fill_stepwise(summary):
+    format = summary.RESOLUTIONS_PYTHON[summary.resolution]
+    step = summary.LABEL_STEP[summary.resolution]
+    begin = summary.fill_range.begin
+    labels = []
+
+    while begin <= summary.fill_range.end:
+        labels.append(begin.strftime(format))
+        begin += step
+
+    groups = []
+
+    for group, results in groupby(summary.raw_results, lambda x: x[1:-1]):
+        items = {label: amount for label, *g, amount in results}
+        groups.append(SummaryGroup(
+            group=group,
+            values=[items.get(label, None) for label in labels],
+        ))
+
+    return labels, groups
+
+
+def fill_vectorized(summary):
+    return summary.labels, summary.groups
+
+
+def benchmark(name, func):
+    seconds = timeit.timeit(func, number=ITERATIONS)
+    print('%-50s %8.3f ms/summary' % (name, seconds / ITERATIONS * 1000))
+
+
+def run():
+    for years in (1, 5, 10):
+        summary = get_summary(years)
+
+        assert fill_stepwise(summary) == fill_vectorized(summary)
+
+        benchmark(
+            f'HOUR, {years} year(s) (stepwise)',
+            lambda: fill_stepwise(summary))
+        benchmark(
+            f'HOUR, {years} year(s) (vectorized)',
+            lambda: fill_vectorized(summary))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,54 @@
+"""empty message
+
+Revision ID: 5e8c1b0f4d27
+Revises: 9a2d5e71c3b8
+Create Date: 2020-10-14 08:51:30.274119
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8c1b0f4d27'
+down_revision = '9a2d5e71c3b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('ggo_ggo', sa.Column('state', sa.SmallInteger(), nullable=True))
+
+    # Backfill (see GgoState and Ggo.compute_state())
+    op.execute("""
+        UPDATE ggo_ggo SET state = CASE
+            WHEN locked OR NOT synchronized THEN 2
+            WHEN retired THEN 3
+            WHEN stored THEN 1
+            ELSE 4
+        END
+    """)
+
+    op.alter_column('ggo_ggo', 'state', nullable=False)
+
+    op.create_index('ix_ggo_ggo_user_id_state', 'ggo_ggo', ['user_id', 'state'], unique=False)
+    op.create_index('ix_ggo_ggo_tradable_user_id_begin_id', 'ggo_ggo', ['user_id', 'begin', 'id'], unique=False, postgresql_where=sa.text('state = 1'))
+
+    op.drop_index('ix_ggo_ggo_synchronized', table_name='ggo_ggo')
+    op.drop_index('ix_ggo_ggo_stored', table_name='ggo_ggo')
+    op.drop_index('ix_ggo_ggo_retired', table_name='ggo_ggo')
+    op.drop_index('ix_ggo_ggo_locked', table_name='ggo_ggo')
+    op.drop_index('ix_ggo_ggo_issued', table_name='ggo_ggo')
+
+
+def downgrade():
+    op.create_index('ix_ggo_ggo_issued', 'ggo_ggo', ['issued'], unique=False)
+    op.create_index('ix_ggo_ggo_locked', 'ggo_ggo', ['locked'], unique=False)
+    op.create_index('ix_ggo_ggo_retired', 'ggo_ggo', ['retired'], unique=False)
+    op.create_index('ix_ggo_ggo_stored', 'ggo_ggo', ['stored'], unique=False)
+    op.create_index('ix_ggo_ggo_synchronized', 'ggo_ggo', ['synchronized'], unique=False)
+
+    op.drop_index('ix_ggo_ggo_tradable_user_id_begin_id', table_name='ggo_ggo')
+    op.drop_index('ix_ggo_ggo_user_id_state', table_name='ggo_ggo')
+
+    op.drop_column('ggo_ggo', 'state')
@@ -0,0 +1,46 @@
+"""empty message
+
+Revision ID: 6f2b9d4e8a13
+Revises: d3a7f1e6b092
+Create Date: 2020-10-16 14:03:18.207465
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f2b9d4e8a13'
+down_revision = 'd3a7f1e6b092'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ggo_stored_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('begin', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('amount', sa.BigInteger(), nullable=False),
+    sa.Column('ggo_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['auth_user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'begin')
+    )
+    op.create_index(op.f('ix_ggo_stored_rollup_id'), 'ggo_stored_rollup', ['id'], unique=False)
+    op.create_index('ix_ggo_stored_rollup_begin_user_id', 'ggo_stored_rollup', ['begin', 'user_id', 'amount', 'ggo_count'], unique=False)
+
+    # Backfill from existing GGOs
+    op.execute("""
+        INSERT INTO ggo_stored_rollup (user_id, begin, amount, ggo_count)
+        SELECT user_id, begin, sum(amount), count(*)
+        FROM ggo_ggo
+        WHERE stored
+        GROUP BY user_id, begin
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_ggo_stored_rollup_begin_user_id', table_name='ggo_stored_rollup')
+    op.drop_index(op.f('ix_ggo_stored_rollup_id'), table_name='ggo_stored_rollup')
+    op.drop_table('ggo_stored_rollup')
@@ -0,0 +1,40 @@
+"""empty message
+
+Revision ID: 8e4c2a7d1f35
+Revises: 6f2b9d4e8a13
+Create Date: 2020-10-19 09:12:44.318027
+
+Adds ggo_ggo_key_index, which enforces that traded key indexes are
+unique per user across all partitions of ggo_ggo (and archived GGOs).
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4c2a7d1f35'
+down_revision = '6f2b9d4e8a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ggo_ggo_key_index',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('key_index', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['auth_user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'key_index')
+    )
+
+    # Backfill from existing (including archived) GGOs
+    op.execute("""
+        INSERT INTO ggo_ggo_key_index (user_id, key_index)
+        SELECT user_id, key_index FROM ggo_ggo WHERE key_index IS NOT NULL
+        UNION
+        SELECT user_id, key_index FROM ggo_ggo_archive WHERE key_index IS NOT NULL
+    """)
+
+
+def downgrade():
+    op.drop_table('ggo_ggo_key_index')
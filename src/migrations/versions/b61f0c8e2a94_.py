@@ -0,0 +1,132 @@
+"""empty message
+
+Revision ID: b61f0c8e2a94
+Revises: 5e8c1b0f4d27
+Create Date: 2020-10-15 11:27:52.661904
+
+Converts ggo_ggo into a table partitioned by month of "begin"
+(requires PostgreSQL 11 or newer). Foreign keys referencing ggo_ggo
+are dropped, and unique constraints are extended with "begin".
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b61f0c8e2a94'
+down_revision = '5e8c1b0f4d27'
+branch_labels = None
+depends_on = None
+
+
+# Number of months ahead to create partitions for
+MONTHS_AHEAD = 3
+
+INDEXES = (
+    ('ix_ggo_ggo_address', ['address'], None),
+    ('ix_ggo_ggo_begin', ['begin'], None),
+    ('ix_ggo_ggo_expire_time', ['expire_time'], None),
+    ('ix_ggo_ggo_fuel_code', ['fuel_code'], None),
+    ('ix_ggo_ggo_id', ['id'], None),
+    ('ix_ggo_ggo_issue_gsrn', ['issue_gsrn'], None),
+    ('ix_ggo_ggo_issue_time', ['issue_time'], None),
+    ('ix_ggo_ggo_parent_id', ['parent_id'], None),
+    ('ix_ggo_ggo_retire_address', ['retire_address'], None),
+    ('ix_ggo_ggo_retire_gsrn', ['retire_gsrn'], None),
+    ('ix_ggo_ggo_sector', ['sector'], None),
+    ('ix_ggo_ggo_technology_code', ['technology_code'], None),
+    ('ix_ggo_ggo_user_id', ['user_id'], None),
+    ('ix_ggo_ggo_user_id_begin_id', ['user_id', 'begin', 'id'], None),
+    ('ix_ggo_ggo_user_id_state', ['user_id', 'state'], None),
+    ('ix_ggo_ggo_tradable_user_id_begin_id', ['user_id', 'begin', 'id'], 'state = 1'),
+)
+
+
+def create_indexes():
+    for name, columns, where in INDEXES:
+        op.create_index(
+            name, 'ggo_ggo', columns, unique=False,
+            postgresql_where=sa.text(where) if where else None)
+
+
+def drop_foreign_keys():
+    op.drop_constraint('ggo_ggo_parent_id_fkey', 'ggo_ggo', type_='foreignkey')
+    op.drop_constraint('ledger_transaction_parent_ggo_id_fkey', 'ledger_transaction', type_='foreignkey')
+    op.drop_constraint('ledger_split_target_ggo_id_fkey', 'ledger_split_target', type_='foreignkey')
+
+
+def create_foreign_keys():
+    op.create_foreign_key('ggo_ggo_parent_id_fkey', 'ggo_ggo', 'ggo_ggo', ['parent_id'], ['id'])
+    op.create_foreign_key('ledger_transaction_parent_ggo_id_fkey', 'ledger_transaction', 'ggo_ggo', ['parent_ggo_id'], ['id'])
+    op.create_foreign_key('ledger_split_target_ggo_id_fkey', 'ledger_split_target', 'ggo_ggo', ['ggo_id'], ['id'])
+
+
+def upgrade():
+    drop_foreign_keys()
+
+    # Keep the ID sequence when the old table is dropped
+    op.execute('ALTER SEQUENCE ggo_ggo_id_seq OWNED BY NONE')
+    op.execute('ALTER TABLE ggo_ggo RENAME TO ggo_ggo_old')
+
+    op.execute("""
+        CREATE TABLE ggo_ggo (LIKE ggo_ggo_old INCLUDING DEFAULTS)
+        PARTITION BY RANGE (begin)
+    """)
+
+    op.execute('CREATE TABLE ggo_ggo_default PARTITION OF ggo_ggo DEFAULT')
+
+    # Partitions for every month from the first GGO until MONTHS_AHEAD
+    # months from now (see origin.ggo.partitions)
+    op.execute("""
+        DO $$
+        DECLARE
+            month timestamptz := date_trunc('month', COALESCE(
+                (SELECT min(begin) FROM ggo_ggo_old), now()) AT TIME ZONE 'UTC') AT TIME ZONE 'UTC';
+            last_month timestamptz := date_trunc('month', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+                + interval '%d months';
+        BEGIN
+            WHILE month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %%I PARTITION OF ggo_ggo FOR VALUES FROM (%%L) TO (%%L)',
+                    to_char(month AT TIME ZONE 'UTC', '"ggo_ggo_y"YYYY"m"MM'),
+                    month,
+                    month + interval '1 month'
+                );
+                month := month + interval '1 month';
+            END LOOP;
+        END
+        $$
+    """ % MONTHS_AHEAD)
+
+    op.execute('INSERT INTO ggo_ggo SELECT * FROM ggo_ggo_old')
+    op.execute('DROP TABLE ggo_ggo_old')
+    op.execute('ALTER SEQUENCE ggo_ggo_id_seq OWNED BY ggo_ggo.id')
+
+    op.create_primary_key('ggo_ggo_pkey', 'ggo_ggo', ['id', 'begin'])
+    op.create_unique_constraint('ggo_ggo_address_begin_key', 'ggo_ggo', ['address', 'begin'])
+    op.create_unique_constraint('ggo_ggo_user_id_key_index_begin_key', 'ggo_ggo', ['user_id', 'key_index', 'begin'])
+    op.create_foreign_key('ggo_ggo_user_id_fkey', 'ggo_ggo', 'auth_user', ['user_id'], ['id'])
+    op.create_foreign_key('ggo_ggo_issue_gsrn_fkey', 'ggo_ggo', 'accounts_meteringpoint', ['issue_gsrn'], ['gsrn'])
+    op.create_foreign_key('ggo_ggo_retire_gsrn_fkey', 'ggo_ggo', 'accounts_meteringpoint', ['retire_gsrn'], ['gsrn'])
+    create_indexes()
+
+    op.execute('ANALYZE ggo_ggo')
+
+
+def downgrade():
+    op.execute('ALTER SEQUENCE ggo_ggo_id_seq OWNED BY NONE')
+    op.execute('ALTER TABLE ggo_ggo RENAME TO ggo_ggo_old')
+    op.execute('CREATE TABLE ggo_ggo (LIKE ggo_ggo_old INCLUDING DEFAULTS)')
+    op.execute('INSERT INTO ggo_ggo SELECT * FROM ggo_ggo_old')
+    op.execute('DROP TABLE ggo_ggo_old CASCADE')
+    op.execute('ALTER SEQUENCE ggo_ggo_id_seq OWNED BY ggo_ggo.id')
+
+    op.create_primary_key('ggo_ggo_pkey', 'ggo_ggo', ['id'])
+    op.create_unique_constraint('ggo_ggo_address_key', 'ggo_ggo', ['address'])
+    op.create_unique_constraint('ggo_ggo_user_id_key_index_key', 'ggo_ggo', ['user_id', 'key_index'])
+    op.create_foreign_key('ggo_ggo_user_id_fkey', 'ggo_ggo', 'auth_user', ['user_id'], ['id'])
+    op.create_foreign_key('ggo_ggo_issue_gsrn_fkey', 'ggo_ggo', 'accounts_meteringpoint', ['issue_gsrn'], ['gsrn'])
+    op.create_foreign_key('ggo_ggo_retire_gsrn_fkey', 'ggo_ggo', 'accounts_meteringpoint', ['retire_gsrn'], ['gsrn'])
+    create_indexes()
+    create_foreign_keys()
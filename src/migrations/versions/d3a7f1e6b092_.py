@@ -0,0 +1,60 @@
+"""empty message
+
+Revision ID: d3a7f1e6b092
+Revises: b61f0c8e2a94
+Create Date: 2020-10-16 09:12:40.518337
+
+Creates archive tables for GGOs, ledger transactions and split targets
+(see origin.ggo.archive).
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a7f1e6b092'
+down_revision = 'b61f0c8e2a94'
+branch_labels = None
+depends_on = None
+
+
+ARCHIVES = (
+    ('ggo_ggo_archive', 'ggo_ggo'),
+    ('ledger_transaction_archive', 'ledger_transaction'),
+    ('ledger_split_target_archive', 'ledger_split_target'),
+)
+
+
+def upgrade():
+    for archive, table in ARCHIVES:
+        op.execute(f'CREATE TABLE {archive} (LIKE {table})')
+        op.add_column(archive, sa.Column('archived', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+        op.create_primary_key(f'{archive}_pkey', archive, ['id'])
+
+    op.create_index('ix_ggo_ggo_archive_user_id_begin', 'ggo_ggo_archive', ['user_id', 'begin'], unique=False)
+    op.create_index('ix_ledger_transaction_archive_parent_ggo_id', 'ledger_transaction_archive', ['parent_ggo_id'], unique=False)
+    op.create_index('ix_ledger_split_target_archive_transaction_id', 'ledger_split_target_archive', ['transaction_id'], unique=False)
+
+
+def downgrade():
+    # Move archived rows back into the live tables. Archived GGOs are not
+    # added back to ggo_summary_rollup, which must be rebuilt afterwards.
+    for archive, table in ARCHIVES:
+        op.execute(f'INSERT INTO {table} SELECT {get_columns(table)} FROM {archive}')
+
+    for archive, table in reversed(ARCHIVES):
+        op.drop_table(archive)
+
+
+def get_columns(table):
+    """
+    Returns the (comma separated) columns of a table in order.
+    """
+    rows = op.get_bind().execute(sa.text("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = :table
+        ORDER BY ordinal_position
+    """), table=table)
+
+    return ', '.join(f'"{row.column_name}"' for row in rows)
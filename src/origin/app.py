@@ -5,6 +5,7 @@ from opencensus.trace import config_integration
 from opencensus.ext.flask.flask_middleware import FlaskMiddleware
 
 from .urls import urls
+from .stats import stats_logger
 from .logger import handler, exporter, sampler
 from .settings import SECRET, CORS_ORIGINS, SERVICE_NAME, LOG_LEVEL
 from .tasks import celery_app
@@ -39,3 +40,11 @@ if exporter and sampler:
 
 for url, controller in urls:
     app.add_url_rule(url, url, controller, methods=[controller.METHOD])
+
+
+# -- Statistics --------------------------------------------------------------
+
+@app.after_request
+def __log_stats(response):
+    stats_logger.log_if_due()
+    return response
@@ -278,35 +278,38 @@ class FindSuppliers(Controller):
             'exclude_user_id': exclude_user_id,
         }
 
+        # Reads from ggo_stored_rollup (see origin.ggo.rollup), which
+        # holds the stored amount per user and hour
         sql = """
             select user_id from (
                 select
                        x.user_id,
-                       count(x.amount) as distinct_begins,
-                       count(x.amount) filter (where x.amount >= :min_amount) as eligible_begins
-                from (
-                       select ggo_ggo.user_id, sum(ggo_ggo.amount) as amount
-                       from ggo_ggo
-                       where ggo_ggo.stored = 't'
-                       and ggo_ggo.begin >= :begin_from
-                       and ggo_ggo.begin < :begin_to
-                       and ggo_ggo.user_id != :exclude_user_id
-                       group by ggo_ggo.user_id, ggo_ggo.begin
-                   ) AS x
-                group by 1
-                order by 2 desc
+                       count(*) as distinct_begins,
+                       count(*) filter (where x.amount >= :min_amount) as eligible_begins
+                from ggo_stored_rollup as x
+                where x.begin >= :begin_from
+                and x.begin < :begin_to
+                and x.user_id != :exclude_user_id
+                and x.ggo_count > 0
+                group by x.user_id
             ) as y
             where cast(eligible_begins as float) / distinct_begins >= :min_coverage
             order by eligible_begins desc;
         """
 
-        res = session.execute(sql, sql_params)
+        user_ids = [row[0] for row in session.execute(sql, sql_params)]
 
-        for row in res:
-            yield UserQuery(session) \
-                .is_active() \
-                .has_id(row[0]) \
-                .one()
+        users = UserQuery(session) \
+            .is_active() \
+            .has_any_id(user_ids) \
+            .all()
+
+        # Preserve the order of the suppliers found
+        users_by_id = {user.id: user for user in users}
+
+        for user_id in user_ids:
+            if user_id in users_by_id:
+                yield users_by_id[user_id]
 
 
 class OnMeteringPointAvailableWebhook(Controller):
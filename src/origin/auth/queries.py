@@ -67,6 +67,17 @@ class UserQuery(object):
             User.id == id,
         ))
 
+    def has_any_id(self, ids):
+        """
+        Only include users with any of the provided IDs.
+
+        :param list[int] ids:
+        :rtype: UserQuery
+        """
+        return UserQuery(self.session, self.q.filter(
+            User.id.in_(ids),
+        ))
+
     def has_sub(self, sub):
         """
         Only include the user with a specific subject.
@@ -78,6 +89,17 @@ class UserQuery(object):
             User.sub == sub,
         ))
 
+    def has_any_sub(self, subs):
+        """
+        Only include users with any of the provided subjects.
+
+        :param list[str] subs:
+        :rtype: UserQuery
+        """
+        return UserQuery(self.session, self.q.filter(
+            User.sub.in_(subs),
+        ))
+
     def has_gsrn(self, gsrn):
         """
         Only include users which owns the MeteringPoint identified with
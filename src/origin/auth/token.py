@@ -1,8 +1,23 @@
-import requests
+import json
+import time
+import hashlib
 from typing import List, Dict
+from redis import RedisError
 from authlib.oauth2.rfc6750 import BearerTokenValidator
 
-from origin.settings import HYDRA_INTROSPECT_URL
+from origin import logger
+from origin.cache import redis, TTLCache
+from origin.services.transport import transport
+from origin.settings import (
+    HYDRA_INTROSPECT_URL,
+    TOKEN_CACHE_TTL,
+    TOKEN_INACTIVE_CACHE_TTL,
+    TOKEN_CACHE_MAX_SIZE,
+)
+
+
+# In-process cache of introspection results, mapped by token hash
+token_cache = TTLCache(max_size=TOKEN_CACHE_MAX_SIZE, name='token')
 
 
 class Token(dict):
@@ -52,12 +67,83 @@ class Token(dict):
 
 
 class TokenValidator(BearerTokenValidator):
+    """
+    Validates tokens by introspecting them at Hydra.
+
+    Introspection results are cached in two tiers: in-process and in
+    Redis (shared between processes). Entries are mapped by a hash of
+    the token, and are kept no longer than the token's expire time.
+    Inactive tokens are cached as well for a short while.
+
+    Redis is optional: If it is unavailable, tokens are only cached
+    in-process (and introspected at Hydra when not cached).
+    """
     def authenticate_token(self, token_string):
         """
         :param str token_string:
         :rtype: Token
         """
-        response = requests.post(
+        cache_key = 'token-introspection:%s' % hashlib.sha256(
+            token_string.encode()).hexdigest()
+
+        # In-process cache
+        json_response = token_cache.get(cache_key)
+
+        # Redis cache
+        if json_response is None:
+            json_response, ttl = self.get_from_redis(cache_key)
+            if json_response is not None and ttl > 0:
+                token_cache.set(cache_key, json_response, ttl)
+
+        # Introspect at Hydra
+        if json_response is None:
+            json_response = self.introspect_token(token_string)
+            if json_response is not None:
+                ttl = self.get_cache_ttl(json_response)
+                if ttl > 0:
+                    token_cache.set(cache_key, json_response, ttl)
+                    self.set_in_redis(cache_key, json_response, ttl)
+
+        if json_response is not None and json_response.get('active') is True:
+            return Token(json_response)
+
+    def get_from_redis(self, cache_key):
+        """
+        Returns a tuple of (introspection result, remaining TTL) from
+        Redis, or (None, None) if not cached or Redis is unavailable.
+
+        :param str cache_key:
+        :rtype: (dict, int)
+        """
+        try:
+            cached = redis.get(cache_key)
+            if cached is not None:
+                return json.loads(cached), redis.ttl(cache_key)
+        except RedisError:
+            logger.exception('Failed to get token introspection from Redis')
+
+        return None, None
+
+    def set_in_redis(self, cache_key, json_response, ttl):
+        """
+        :param str cache_key:
+        :param dict json_response:
+        :param int ttl:
+        """
+        try:
+            redis.set(cache_key, json.dumps(json_response), ex=ttl)
+        except RedisError:
+            logger.exception('Failed to set token introspection in Redis')
+
+    def introspect_token(self, token_string):
+        """
+        Returns the JSON response from introspecting a token at Hydra,
+        or None if introspection failed.
+
+        :param str token_string:
+        :rtype: dict
+        """
+        response = transport.post(
             verify=False,
             url=HYDRA_INTROSPECT_URL,
             data={
@@ -71,9 +157,21 @@ class TokenValidator(BearerTokenValidator):
         )
 
         if response.status_code == 200:
-            json_response = response.json()
-            if json_response.get('active') is True:
-                return Token(json_response)
+            return response.json()
+
+    def get_cache_ttl(self, json_response):
+        """
+        Returns the number of seconds to cache an introspection result.
+
+        :param dict json_response:
+        :rtype: int
+        """
+        if json_response.get('active') is not True:
+            return TOKEN_INACTIVE_CACHE_TTL
+        elif json_response.get('exp') is not None:
+            return min(TOKEN_CACHE_TTL, int(json_response['exp'] - time.time()))
+        else:
+            return TOKEN_CACHE_TTL
 
     def request_invalid(self, request):
         return False
@@ -1,5 +1,12 @@
+import time
+import pickle
+import sqlalchemy as sa
+from threading import Lock
+from collections import OrderedDict
 from redis import Redis
+from sqlalchemy.orm import Session
 
+from . import logger
 from .settings import (
     REDIS_USERNAME,
     REDIS_PASSWORD,
@@ -15,3 +22,230 @@ redis = Redis(
     password=REDIS_PASSWORD,
     db=REDIS_CACHE_DB,
 )
+
+
+# In-process caches mapped by name (see get_cache_stats())
+caches = {}
+
+
+class TTLCache(object):
+    """
+    A thread-safe, in-process cache where each entry expires after its
+    own time-to-live. The cache is bounded by the number of entries
+    (max_size) and/or the total size (in bytes) of the cached values
+    (max_bytes). Values are stored pickled, so callers never share
+    (mutable) values.
+
+    When the cache exceeds either bound, expired entries are purged, and
+    if still too large, the least recently used entries are evicted.
+
+    Keeps count of hits, misses and evictions (see stats()). Named caches
+    are registered in "caches", so their statistics are logged.
+    """
+    def __init__(self, max_size=None, max_bytes=None, name=None):
+        """
+        :param int max_size: Max number of entries
+        :param int max_bytes: Max total size of values in bytes
+        :param str name: Name to register the cache as
+        """
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = Lock()
+
+        if name is not None:
+            caches[name] = self
+
+    def get(self, key, default=None):
+        """
+        :param collections.abc.Hashable key:
+        :param obj default:
+        :rtype: obj
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self.__remove(key)
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            data = entry[1]
+
+        return pickle.loads(data)
+
+    def set(self, key, value, ttl):
+        """
+        Values larger than max_bytes are not cached.
+
+        :param collections.abc.Hashable key:
+        :param obj value:
+        :param float ttl: Time-to-live in seconds
+        """
+        if ttl <= 0:
+            return
+
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            return
+
+        with self.lock:
+            if key in self.entries:
+                self.__remove(key)
+            self.entries[key] = (time.monotonic() + ttl, data)
+            self.size += len(data)
+            if self.__exceeded():
+                self.__purge()
+
+    def delete(self, key):
+        """
+        :param collections.abc.Hashable key:
+        """
+        with self.lock:
+            if key in self.entries:
+                self.__remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """
+        :rtype: dict[str, int]
+        """
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def __exceeded(self):
+        return (self.max_size is not None and len(self.entries) > self.max_size) \
+            or (self.max_bytes is not None and self.size > self.max_bytes)
+
+    def __remove(self, key):
+        _, data = self.entries.pop(key)
+        self.size -= len(data)
+
+    def __purge(self):
+        now = time.monotonic()
+
+        for key in [k for k, v in self.entries.items() if v[0] <= now]:
+            self.__remove(key)
+
+        while self.__exceeded():
+            key = next(iter(self.entries))
+            self.__remove(key)
+            self.evictions += 1
+
+
+def get_cache_stats():
+    """
+    Returns statistics of each named in-process cache.
+
+    :rtype: dict[str, dict[str, int]]
+    """
+    return {name: cache.stats() for name, cache in sorted(caches.items())}
+
+
+def get_query_cache_key(query):
+    """
+    Returns a key identifying the SQL (with whitespace normalized) and
+    parameters of a query, for caching its results.
+
+    :param sqlalchemy.orm.Query query:
+    :rtype: str
+    """
+    compiled = query.statement.compile(dialect=query.session.get_bind().dialect)
+    sql = ' '.join(str(compiled).split())
+    params = sorted(compiled.params.items())
+
+    return repr((sql, params))
+
+
+# -- Versioned cache keys ----------------------------------------------------
+
+
+# Namespace of versions which are bumped whenever GGOs are retired to
+# (or un-retired from) a GSRN, mapped by GSRN
+RETIRED_GGOS = 'retired-ggos'
+
+
+def get_versions(namespace, keys):
+    """
+    Returns the current version of each key in a namespace (in the same
+    order as keys). Versions are included in cache keys of values which
+    depend on the keys, so bumping a version invalidates these values.
+
+    :param str namespace:
+    :param list[str] keys:
+    :rtype: list[int]
+    """
+    if not keys:
+        return []
+
+    versions = redis.mget([f'version:{namespace}:{key}' for key in keys])
+
+    return [int(v) if v is not None else 0 for v in versions]
+
+
+def bump_versions(namespace, keys):
+    """
+    :param str namespace:
+    :param collections.abc.Iterable[str] keys:
+    """
+    pipeline = redis.pipeline()
+
+    for key in sorted(set(keys)):
+        pipeline.incr(f'version:{namespace}:{key}')
+
+    pipeline.execute()
+
+
+def bump_versions_on_commit(session, namespace, keys):
+    """
+    Bumps the versions once the session's transaction commits, so values
+    can not be cached again using data from before the commit. Nothing
+    is bumped if the transaction rolls back, or the session is closed
+    without committing.
+
+    :param sqlalchemy.orm.Session session:
+    :param str namespace:
+    :param collections.abc.Iterable[str] keys:
+    """
+    session.info \
+        .setdefault('bump_versions', {}) \
+        .setdefault(namespace, set()) \
+        .update(keys)
+
+
+@sa.event.listens_for(Session, 'after_commit')
+def __bump_versions_after_commit(session):
+    for namespace, keys in session.info.pop('bump_versions', {}).items():
+        try:
+            bump_versions(namespace, keys)
+        except Exception:
+            # The transaction is already committed, so failing here
+            # would only make the caller believe it was not
+            logger.exception('Failed to bump cache versions', extra={
+                'namespace': namespace,
+                'keys': ', '.join(sorted(keys)),
+            })
+
+
+@sa.event.listens_for(Session, 'after_transaction_end')
+def __discard_versions_after_transaction_end(session, transaction):
+    # The outermost transaction ends on commit (after the versions are
+    # bumped), rollback and close. Versions are only bumped on commit.
+    if transaction.parent is None:
+        session.info.pop('bump_versions', None)
@@ -1,2 +1,2 @@
 from .models import DateRange, DateTimeRange
-from .emissions import EmissionValues
+from .emissions import EmissionValues, EmissionMatrix
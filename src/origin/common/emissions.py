@@ -1,4 +1,5 @@
 import operator
+import numpy as np
 
 
 class EmissionValues(dict):
@@ -63,3 +64,292 @@ class EmissionValues(dict):
             )
 
         return NotImplemented
+
+
+class EmissionMatrix(object):
+    """
+    Array-backed representation of a sequence of EmissionValues.
+
+    Values are stored in a 2D float64 array with one row per
+    EmissionValues and one column per key, where keys are fixed and
+    shared by all rows. A boolean mask of the same shape tells which keys
+    are present in each row, so converting rows back to EmissionValues
+    yields the same keys as the equivalent dict arithmetic would (keys
+    missing from a row count as 0 in arithmetic).
+
+    Usage example::
+
+        matrix = EmissionMatrix.from_dicts([ggo.emissions for ggo in ggos])
+        matrix = matrix * [ggo.amount for ggo in ggos]
+        per_begin = matrix.group_sum(begin_indexes, len(begins))
+
+        for begin, emissions in zip(begins, per_begin.to_dicts()):
+            pass
+
+    """
+
+    def __init__(self, keys, values, mask=None):
+        """
+        :param collections.abc.Iterable[str] keys:
+        :param numpy.ndarray values: Array of shape (rows, len(keys))
+        :param numpy.ndarray mask: Array of shape (rows, len(keys))
+        """
+        self.keys = tuple(keys)
+        self.values = np.asarray(values, dtype=np.float64)
+
+        if mask is None:
+            self.mask = np.ones(self.values.shape, dtype=bool)
+        else:
+            self.mask = np.asarray(mask, dtype=bool)
+
+        if self.values.ndim != 2 or self.values.shape[1] != len(self.keys):
+            raise ValueError('values must have shape (rows, len(keys))')
+        if self.mask.shape != self.values.shape:
+            raise ValueError('mask must have the same shape as values')
+
+    def __repr__(self):
+        return 'EmissionMatrix<%d x %s>' % (len(self), list(self.keys))
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    @classmethod
+    def empty(cls, rows, keys=()):
+        """
+        Returns a matrix of "rows" empty rows.
+
+        :param int rows:
+        :param collections.abc.Iterable[str] keys:
+        :rtype: EmissionMatrix
+        """
+        keys = tuple(keys)
+        return cls(
+            keys=keys,
+            values=np.zeros((rows, len(keys))),
+            mask=np.zeros((rows, len(keys)), dtype=bool),
+        )
+
+    @classmethod
+    def from_dicts(cls, dicts, keys=None):
+        """
+        Creates a matrix with a row per dict. Values of None count as 0.
+        Falsy dicts (ie. None) become empty rows.
+
+        :param collections.abc.Iterable[dict[str, float]] dicts:
+        :param collections.abc.Iterable[str] keys: Defaults to the
+            (sorted) union of keys of all dicts
+        :rtype: EmissionMatrix
+        """
+        dicts = [d or {} for d in dicts]
+
+        if keys is None:
+            keys = sorted(set(k for d in dicts for k in d))
+
+        keys = tuple(keys)
+        columns = {key: i for i, key in enumerate(keys)}
+
+        rows = []
+        cols = []
+        values = []
+
+        for row, d in enumerate(dicts):
+            for key, value in d.items():
+                rows.append(row)
+                cols.append(columns[key])
+                values.append(value or 0)
+
+        matrix = cls.empty(len(dicts), keys)
+        matrix.values[rows, cols] = values
+        matrix.mask[rows, cols] = True
+
+        return matrix
+
+    def row(self, i, fill_missing=False):
+        """
+        Returns a single row as EmissionValues.
+
+        :param int i:
+        :param bool fill_missing: Whether to include keys missing
+            from the row (with the value None)
+        :rtype: EmissionValues
+        """
+        if fill_missing:
+            return EmissionValues(**{
+                key: value if present else None for key, value, present
+                in zip(self.keys, self.values[i].tolist(), self.mask[i].tolist())
+            })
+
+        return EmissionValues(**{
+            key: value for key, value, present
+            in zip(self.keys, self.values[i].tolist(), self.mask[i].tolist())
+            if present
+        })
+
+    def to_dicts(self, fill_missing=False):
+        """
+        Returns all rows as EmissionValues.
+
+        :param bool fill_missing: Whether to include keys missing
+            from the row (with the value None)
+        :rtype: list[EmissionValues]
+        """
+        return [self.row(i, fill_missing) for i in range(len(self))]
+
+    def sum(self):
+        """
+        Returns the sum of all rows as EmissionValues.
+
+        :rtype: EmissionValues
+        """
+        return EmissionMatrix(
+            keys=self.keys,
+            values=self.values.sum(axis=0, keepdims=True),
+            mask=self.mask.any(axis=0, keepdims=True),
+        ).row(0)
+
+    def reindex(self, keys):
+        """
+        Returns the matrix with another set of keys (columns).
+        Keys which does not exist in this matrix become empty columns,
+        and existing keys not present in "keys" are dropped.
+
+        :param collections.abc.Iterable[str] keys:
+        :rtype: EmissionMatrix
+        """
+        keys = tuple(keys)
+
+        if keys == self.keys:
+            return self
+
+        matrix = self.empty(len(self), keys)
+        columns = {key: i for i, key in enumerate(self.keys)}
+
+        for new_col, key in enumerate(keys):
+            if key in columns:
+                matrix.values[:, new_col] = self.values[:, columns[key]]
+                matrix.mask[:, new_col] = self.mask[:, columns[key]]
+
+        return matrix
+
+    def take(self, indexes):
+        """
+        Returns a matrix of the rows at the provided indexes
+        (rows may be repeated).
+
+        :param collections.abc.Iterable[int] indexes:
+        :rtype: EmissionMatrix
+        """
+        indexes = np.asarray(indexes, dtype=np.intp)
+
+        return EmissionMatrix(
+            keys=self.keys,
+            values=self.values[indexes],
+            mask=self.mask[indexes],
+        )
+
+    def group_sum(self, groups, count):
+        """
+        Sums rows by group, and returns a matrix with a row per group.
+        Groups without any rows become empty rows.
+
+        :param collections.abc.Iterable[int] groups: The group (index)
+            of each row
+        :param int count: Number of groups
+        :rtype: EmissionMatrix
+        """
+        groups = np.asarray(groups, dtype=np.intp)
+        matrix = self.empty(count, self.keys)
+        np.add.at(matrix.values, groups, self.values)
+        np.logical_or.at(matrix.mask, groups, self.mask)
+        return matrix
+
+    def __add__(self, other):
+        """
+        :param EmissionMatrix|int|float other:
+        :rtype: EmissionMatrix
+        """
+        if isinstance(other, EmissionMatrix):
+            a, b = self.__align(other)
+            return EmissionMatrix(a.keys, a.values + b.values, a.mask | b.mask)
+        elif isinstance(other, (int, float, np.number)):
+            return EmissionMatrix(self.keys, self.values + other * self.mask, self.mask)
+
+        return NotImplemented
+
+    def __radd__(self, other):
+        """
+        :param EmissionMatrix|int|float other:
+        :rtype: EmissionMatrix
+        """
+        return self + other
+
+    def __mul__(self, other):
+        """
+        Multiplies either by another matrix (element-wise), by a number,
+        or by a sequence of numbers (one per row).
+
+        :param EmissionMatrix|int|float|collections.abc.Sequence other:
+        :rtype: EmissionMatrix
+        """
+        if isinstance(other, EmissionMatrix):
+            a, b = self.__align(other)
+            return EmissionMatrix(a.keys, a.values * b.values, a.mask | b.mask)
+
+        factor = self.__get_factor(other)
+        if factor is None:
+            return NotImplemented
+
+        return EmissionMatrix(self.keys, self.values * factor, self.mask)
+
+    def __rmul__(self, other):
+        """
+        :param EmissionMatrix|int|float|collections.abc.Sequence other:
+        :rtype: EmissionMatrix
+        """
+        return self * other
+
+    def __truediv__(self, other):
+        """
+        Divides either by a number, or by a sequence of numbers
+        (one per row).
+
+        :param int|float|collections.abc.Sequence other:
+        :rtype: EmissionMatrix
+        """
+        factor = self.__get_factor(other)
+        if factor is None:
+            return NotImplemented
+
+        return EmissionMatrix(self.keys, self.values / factor, self.mask)
+
+    def __get_factor(self, other):
+        """
+        :param int|float|collections.abc.Sequence other:
+        :rtype: float|numpy.ndarray|None
+        """
+        if isinstance(other, (int, float, np.number)):
+            return other
+        elif isinstance(other, (list, tuple, np.ndarray)):
+            factor = np.asarray(other, dtype=np.float64)
+            if factor.shape != (len(self),):
+                raise ValueError('Expected one factor per row')
+            return factor[:, np.newaxis]
+
+        return None
+
+    def __align(self, other):
+        """
+        Returns both matrices with the same keys (the union of both).
+
+        :param EmissionMatrix other:
+        :rtype: (EmissionMatrix, EmissionMatrix)
+        """
+        if len(self) != len(other):
+            raise ValueError('Matrices must have the same number of rows')
+
+        if self.keys == other.keys:
+            return self, other
+
+        keys = self.keys + tuple(k for k in other.keys if k not in self.keys)
+
+        return self.reindex(keys), other.reindex(keys)
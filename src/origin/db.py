@@ -1,8 +1,9 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, scoped_session, configure_mappers
+from sqlalchemy.orm import Session as SessionBase
 from sqlalchemy.ext.declarative import declarative_base
 
-from .settings import DATABASE_URI, SQL_ALCHEMY_SETTINGS
+from .settings import DATABASE_URI, DATABASE_READ_URI, SQL_ALCHEMY_SETTINGS
 
 
 ModelBase = declarative_base()
@@ -13,8 +14,19 @@ if DATABASE_URI:
     configure_mappers()
     factory = sessionmaker(bind=engine, expire_on_commit=False)
     Session = scoped_session(factory)
+
+    # Sessions for read-only requests, bound to a read replica
+    # (if configured, otherwise the primary database)
+    if DATABASE_READ_URI and DATABASE_READ_URI != DATABASE_URI:
+        read_engine = create_engine(DATABASE_READ_URI, **SQL_ALCHEMY_SETTINGS)
+    else:
+        read_engine = engine
+
+    read_factory = sessionmaker(bind=read_engine, expire_on_commit=False)
+    ReadSession = scoped_session(read_factory)
 else:
     from sqlalchemy.orm import Session
+    ReadSession = Session
 
 
 def make_session(*args, **kwargs):
@@ -26,6 +38,40 @@ def make_session(*args, **kwargs):
     return Session(*args, **kwargs)
 
 
+def make_read_session(*args, **kwargs):
+    """
+    Create a new SQLAlchemy session for read-only use, bound to the
+    read replica. Data may lag slightly behind the primary database.
+
+    :rtype: sqlalchemy.orm.Session
+    """
+    return ReadSession(*args, **kwargs)
+
+
+def has_writes(session):
+    """
+    Returns whether the session has written (or is about to write)
+    anything in its current transaction.
+
+    :param sqlalchemy.orm.Session session:
+    :rtype: bool
+    """
+    return bool(session.new or session.dirty or session.deleted) \
+        or session.info.get('has_writes', False)
+
+
+@event.listens_for(SessionBase, 'after_flush')
+def __track_writes(session, flush_context):
+    session.info['has_writes'] = True
+
+
+@event.listens_for(SessionBase, 'after_transaction_end')
+def __reset_writes(session, transaction):
+    # The outermost transaction ends on commit, rollback and close
+    if transaction.parent is None:
+        session.info.pop('has_writes', None)
+
+
 def inject_session(func):
     """
     Function decorator which injects a "session" named parameter
@@ -60,3 +106,31 @@ def atomic(func):
             return return_value
 
     return atomic_wrapper
+
+
+def inject_read_session(func):
+    """
+    Function decorator which injects a "session" named parameter
+    if it doesn't already exists, bound to the read replica.
+
+    If the current thread's primary session has written anything in its
+    (not yet committed) transaction, the primary session is injected
+    instead, so reads are consistent with the writes.
+    """
+    def read_session_wrapper(*args, **kwargs):
+        if 'session' in kwargs:
+            return func(*args, **kwargs)
+
+        if isinstance(Session, scoped_session) and Session.registry.has():
+            primary_session = make_session()
+            if has_writes(primary_session):
+                kwargs['session'] = primary_session
+                return func(*args, **kwargs)
+
+        _session = kwargs['session'] = make_read_session()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _session.close()
+
+    return read_session_wrapper
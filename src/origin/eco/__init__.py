@@ -1,4 +1,5 @@
 from .builder import EcoDeclarationBuilder
-from .declaration import EcoDeclaration
+from .cache import EcoDeclarationCache
+from .declaration import EcoDeclaration, ColumnarEcoDeclaration
 from .models import EcoDeclarationResolution
 from .pdf import EcoDeclarationPdf
@@ -1,11 +1,14 @@
-from itertools import groupby
 from datetime import datetime, timezone
 from typing import Dict
 
 from origin.ggo import GgoQuery, Ggo
-from origin.common import EmissionValues, DateTimeRange
+from origin.common import EmissionMatrix, DateTimeRange
 from origin.auth import MeteringPoint, User
-from origin.services.energytypes import EnergyTypeService, EmissionData
+from origin.services.energytypes import (
+    EnergyTypeService,
+    EmissionData,
+    ResidualMixCache,
+)
 from origin.services.datahub import (
     DataHubService,
     GetMeasurementListRequest,
@@ -20,6 +23,7 @@ from .declaration import EcoDeclaration
 
 datahub_service = DataHubService()
 energytype_service = EnergyTypeService()
+residual_mix_cache = ResidualMixCache()
 
 
 class EcoDeclarationBuilder(object):
@@ -91,10 +95,8 @@ class EcoDeclarationBuilder(object):
         :param dict[datetime, dict[str, EmissionData]] general_mix_emissions:
         :rtype: EcoDeclaration
         """
-
-        # Emission in gram (mapped by begin)
-        # {begin: {key: value}}
-        emissions: Dict[datetime, EmissionValues[str, float]] = {}
+        begins = sorted(set(m.begin for m in measurements))
+        begin_indexes = {begin: i for i, begin in enumerate(begins)}
 
         # Consumption in Wh (mapped by begin)
         # {begin: amount}
@@ -103,9 +105,18 @@ class EcoDeclarationBuilder(object):
         # TODO
         retired_amount: Dict[datetime, float] = {}
 
-        # Consumed amount in Wh per technology (mapped by begin)
-        # {begin: {technology: amount}}
-        technologies: Dict[datetime, EmissionValues[str, float]] = {}
+        # Emissions and technologies are collected as rows (one per
+        # retired GGO and one per measurement with a remaining amount),
+        # and summed per begin using EmissionMatrix
+        ggo_begins = []
+        ggo_amounts = []
+        ggo_emissions = []
+        ggo_technologies = []
+
+        mix_begins = []
+        mix_amounts = []
+        mix_indexes = []
+        mixes = {}
 
         for m in measurements:
             ggos = retired_ggos.get(m.gsrn, {}).get(m.begin, [])
@@ -124,40 +135,51 @@ class EcoDeclarationBuilder(object):
             retired_amount.setdefault(m.begin, 0)
             retired_amount[m.begin] += ggos_total_amount
 
-            # Set default (empty) emission values for this begin
-            emissions.setdefault(m.begin, EmissionValues())
-
-            # Set default (empty) emission values for this begin
-            technologies.setdefault(m.begin, EmissionValues())
-
             # Emission from retired GGOs
             for ggo in ggos:
-                if ggo.emissions:
-                    emissions[m.begin] += \
-                        EmissionValues(**ggo.emissions) * ggo.amount
-                else:
-                    emissions[m.begin] += EmissionValues()
-
-                technologies[m.begin].setdefault(ggo.technology_label, 0)
-                technologies[m.begin][ggo.technology_label] += ggo.amount
+                ggo_begins.append(begin_indexes[m.begin])
+                ggo_amounts.append(ggo.amount)
+                ggo_emissions.append(ggo.emissions)
+                ggo_technologies.append({ggo.technology_label: 1})
 
             # Remaining emission from General mix
             # Assume there exists mix emissions for each
             # begin in the period, otherwise fail hard
             if remaining_amount:
                 mix = general_mix_emissions[m.begin][m.sector]
+                mix_begins.append(begin_indexes[m.begin])
+                mix_amounts.append(remaining_amount)
+                mix_indexes.append(mixes.setdefault(id(mix), (len(mixes), mix))[0])
+
+        # Each mix is only converted once, no matter how
+        # many measurements it applies to
+        mixes = [mix for _, mix in sorted(mixes.values(), key=lambda t: t[0])]
+
+        mix_emissions = EmissionMatrix \
+            .from_dicts(mix.emissions_per_wh for mix in mixes) \
+            .take(mix_indexes)
 
-                emissions[m.begin] += \
-                    mix.emissions_per_wh * remaining_amount
+        mix_technologies = EmissionMatrix \
+            .from_dicts(mix.technologies_share for mix in mixes) \
+            .take(mix_indexes)
+
+        # Emission in gram (mapped by begin)
+        # {begin: {key: value}}
+        emissions = \
+            (EmissionMatrix.from_dicts(ggo_emissions) * ggo_amounts).group_sum(ggo_begins, len(begins)) \
+            + (mix_emissions * mix_amounts).group_sum(mix_begins, len(begins))
 
-                technologies[m.begin] += \
-                    mix.technologies_share * remaining_amount
+        # Consumed amount in Wh per technology (mapped by begin)
+        # {begin: {technology: amount}}
+        technologies = \
+            (EmissionMatrix.from_dicts(ggo_technologies) * ggo_amounts).group_sum(ggo_begins, len(begins)) \
+            + (mix_technologies * mix_amounts).group_sum(mix_begins, len(begins))
 
         return EcoDeclaration(
-            emissions=emissions,
+            emissions=dict(zip(begins, emissions.to_dicts())),
             consumed_amount=consumed_amount,
             retired_amount=retired_amount,
-            technologies=technologies,
+            technologies=dict(zip(begins, technologies.to_dicts())),
             resolution=EcoDeclarationResolution.hour,
             utc_offset=0,
         )
@@ -169,25 +191,17 @@ class EcoDeclarationBuilder(object):
         :rtype: EcoDeclaration
         """
 
-        # Emission in gram (mapped by begin)
-        # {begin: {key: value}}
-        emissions: Dict[datetime, EmissionValues[str, float]] = {}
-
         # Consumption in Wh (mapped by begin)
         # {begin: amount}
         consumed_amount: Dict[datetime, float] = {}
 
-        # Consumed amount in Wh per technology (mapped by begin)
-        # {begin: {technology: amount}}
-        technologies: Dict[datetime, EmissionValues[str, float]] = {}
+        # The general mix of each (begin, sector), collected as rows
+        # and summed per begin using EmissionMatrix
+        begins = []
+        mix_begins = []
+        mixes = []
 
-        # Group measurements by their begin
-        measurements_sorted_and_grouped = groupby(
-            iterable=sorted(measurements, key=lambda m: m.begin),
-            key=lambda m: m.begin,
-        )
-
-        for begin, measurements in measurements_sorted_and_grouped:
+        for begin in sorted(set(m.begin for m in measurements)):
             # unique_sectors_this_begin = set(m.sector for m in measurements)
             unique_sectors = ('DK1', 'DK2')
 
@@ -196,20 +210,32 @@ class EcoDeclarationBuilder(object):
                     continue
                 mix = general_mix_emissions[begin][sector]
 
-                emissions.setdefault(begin, EmissionValues())
-                emissions[begin] += mix.emissions
+                if not begins or begins[-1] != begin:
+                    begins.append(begin)
+
+                mix_begins.append(len(begins) - 1)
+                mixes.append(mix)
 
                 consumed_amount.setdefault(begin, 0)
                 consumed_amount[begin] += mix.amount
 
-                technologies.setdefault(begin, EmissionValues())
-                technologies[begin] += mix.technologies
+        # Emission in gram (mapped by begin)
+        # {begin: {key: value}}
+        emissions = EmissionMatrix \
+            .from_dicts(mix.emissions for mix in mixes) \
+            .group_sum(mix_begins, len(begins))
+
+        # Consumed amount in Wh per technology (mapped by begin)
+        # {begin: {technology: amount}}
+        technologies = EmissionMatrix \
+            .from_dicts(mix.technologies for mix in mixes) \
+            .group_sum(mix_begins, len(begins))
 
         return EcoDeclaration(
-            emissions=emissions,
+            emissions=dict(zip(begins, emissions.to_dicts())),
             consumed_amount=consumed_amount,
             retired_amount={},
-            technologies=technologies,
+            technologies=dict(zip(begins, technologies.to_dicts())),
             resolution=EcoDeclarationResolution.hour,
             utc_offset=0,
         )
@@ -222,13 +248,14 @@ class EcoDeclarationBuilder(object):
         """
         general_mix = {}
 
-        response = energytype_service.get_residual_mix(
+        mix_emissions = residual_mix_cache.get_residual_mix(
+            service=energytype_service,
             sector=list(set(m.sector for m in meteringpoints)),
             begin_from=begin_range.begin.astimezone(timezone.utc),
             begin_to=begin_range.end.astimezone(timezone.utc),
         )
 
-        for d in response.mix_emissions:
+        for d in mix_emissions:
             general_mix.setdefault(d.timestamp_utc, {})
             general_mix[d.timestamp_utc][d.sector] = d
 
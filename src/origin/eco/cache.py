@@ -0,0 +1,162 @@
+"""
+Caching of built (hourly) eco declarations in Redis.
+
+Declarations are cached per user, set of GSRN numbers and begin range.
+Cache keys include the version of retired GGOs for each GSRN (see
+origin.cache.RETIRED_GGOS), which is bumped whenever a RetireTransaction
+to the GSRN begins, commits or rolls back, so declarations are
+invalidated as soon as GGOs are retired to (or un-retired from) any
+of their meteringpoints. Declarations expire after ECO_DECLARATION_CACHE_TTL
+seconds, as new measurements may arrive in the meantime.
+
+Declarations are stored in their columnar form as compressed NumPy arrays.
+"""
+import json
+import hashlib
+import numpy as np
+from io import BytesIO
+
+from origin.cache import redis, get_versions, RETIRED_GGOS
+from origin.common import EmissionMatrix
+from origin.settings import ECO_DECLARATION_CACHE_TTL
+
+from .models import EcoDeclarationResolution
+from .declaration import ColumnarEcoDeclaration
+
+
+class EcoDeclarationCache(object):
+    """
+    Cache of (individual, general) EcoDeclaration pairs.
+    """
+
+    def get_key(self, user, gsrn, begin_range):
+        """
+        :param User user:
+        :param list[str] gsrn:
+        :param DateTimeRange begin_range:
+        :rtype: str
+        """
+        gsrn = sorted(set(gsrn))
+        versions = get_versions(RETIRED_GGOS, gsrn)
+
+        raw = json.dumps([
+            gsrn,
+            versions,
+            begin_range.begin.isoformat(),
+            begin_range.end.isoformat(),
+        ])
+
+        digest = hashlib.sha1(raw.encode()).hexdigest()
+
+        return f'eco-declaration:{user.id}:{digest}'
+
+    def get(self, key):
+        """
+        :param str key:
+        :rtype: (EcoDeclaration, EcoDeclaration)|None
+        :returns: A tuple of (individual declaration, general declaration)
+            or None if not cached
+        """
+        data = redis.get(key)
+
+        if data is not None:
+            return deserialize_declarations(data)
+
+    def set(self, key, individual, general):
+        """
+        :param str key:
+        :param EcoDeclaration individual:
+        :param EcoDeclaration general:
+        """
+        redis.set(
+            key,
+            serialize_declarations(individual, general),
+            ex=ECO_DECLARATION_CACHE_TTL,
+        )
+
+
+def serialize_declarations(*declarations):
+    """
+    :param EcoDeclaration declarations:
+    :rtype: bytes
+    """
+    arrays = {}
+
+    for i, declaration in enumerate(declarations):
+        columnar = ColumnarEcoDeclaration.from_declaration(declaration)
+
+        # Emissions may be None (no data), which count as 0 in columnar
+        # form, so remember where to restore them
+        emissions_none = np.array([
+            [declaration.emissions[begin].get(key, 0) is None for key in columnar.emissions.keys]
+            for begin in sorted(declaration.emissions.keys())
+        ], dtype=bool).reshape(columnar.emissions.values.shape)
+
+        arrays.update({
+            f'{i}.begins': columnar.begins.astype(np.int64),
+            f'{i}.consumed_amount': columnar.consumed_amount,
+            f'{i}.retired_amount': columnar.retired_amount,
+            f'{i}.emissions.keys': np.array(columnar.emissions.keys, dtype=str),
+            f'{i}.emissions.values': columnar.emissions.values,
+            f'{i}.emissions.mask': columnar.emissions.mask,
+            f'{i}.emissions.none': emissions_none,
+            f'{i}.technologies.keys': np.array(columnar.technologies.keys, dtype=str),
+            f'{i}.technologies.values': columnar.technologies.values,
+            f'{i}.technologies.mask': columnar.technologies.mask,
+            f'{i}.meta': np.array([
+                columnar.resolution.value,
+                columnar.utc_offset,
+                int(columnar.aware),
+            ]),
+        })
+
+    f = BytesIO()
+    np.savez_compressed(f, **arrays)
+    return f.getvalue()
+
+
+def deserialize_declarations(data):
+    """
+    Reverse of serialize_declarations().
+
+    :param bytes data:
+    :rtype: tuple[EcoDeclaration]
+    """
+    declarations = []
+
+    with np.load(BytesIO(data), allow_pickle=False) as arrays:
+        i = 0
+
+        while f'{i}.meta' in arrays:
+            resolution, utc_offset, aware = arrays[f'{i}.meta'].tolist()
+
+            columnar = ColumnarEcoDeclaration(
+                begins=arrays[f'{i}.begins'].astype('datetime64[s]'),
+                consumed_amount=arrays[f'{i}.consumed_amount'],
+                retired_amount=arrays[f'{i}.retired_amount'],
+                emissions=EmissionMatrix(
+                    keys=arrays[f'{i}.emissions.keys'].tolist(),
+                    values=arrays[f'{i}.emissions.values'],
+                    mask=arrays[f'{i}.emissions.mask'],
+                ),
+                technologies=EmissionMatrix(
+                    keys=arrays[f'{i}.technologies.keys'].tolist(),
+                    values=arrays[f'{i}.technologies.values'],
+                    mask=arrays[f'{i}.technologies.mask'],
+                ),
+                resolution=EcoDeclarationResolution(resolution),
+                utc_offset=utc_offset,
+                aware=bool(aware),
+            )
+
+            declaration = columnar.to_declaration()
+            begins = sorted(declaration.emissions.keys())
+            keys = columnar.emissions.keys
+
+            for row, col in zip(*np.nonzero(arrays[f'{i}.emissions.none'])):
+                declaration.emissions[begins[row]][keys[col]] = None
+
+            declarations.append(declaration)
+            i += 1
+
+    return tuple(declarations)
@@ -12,12 +12,14 @@ from origin.auth import (
 )
 
 from .pdf import EcoDeclarationPdf
+from .cache import EcoDeclarationCache
 from .builder import EcoDeclarationBuilder
 from .models import GetEcoDeclarationRequest, GetEcoDeclarationResponse
 
 
 builder = EcoDeclarationBuilder()
 pdf_builder = EcoDeclarationPdf()
+cache = EcoDeclarationCache()
 
 
 class GetEcoDeclaration(Controller):
@@ -50,12 +52,20 @@ class GetEcoDeclaration(Controller):
                 'Could not load the following MeteringPoints: %s'
             ) % ', '.join([g for g in request.gsrn if g not in gsrn]))
 
-        individual, general = builder.build_eco_declaration(
-            user=user,
-            meteringpoints=meteringpoints,
-            begin_range=request.begin_range,
-            session=session,
-        )
+        key = cache.get_key(user, gsrn, request.begin_range)
+        cached = cache.get(key)
+
+        if cached is not None:
+            individual, general = cached
+        else:
+            individual, general = builder.build_eco_declaration(
+                user=user,
+                meteringpoints=meteringpoints,
+                begin_range=request.begin_range,
+                session=session,
+            )
+
+            cache.set(key, individual, general)
 
         return GetEcoDeclarationResponse(
             success=True,
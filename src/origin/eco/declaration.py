@@ -1,9 +1,9 @@
-from itertools import groupby
+import numpy as np
 from datetime import datetime, timezone, timedelta
 
-from origin.common import EmissionValues
+from origin.common import EmissionValues, EmissionMatrix
 
-from .models import EcoDeclarationResolution
+from .models import EcoDeclarationResolution, MappedEcoDeclaration
 
 
 class EcoDeclaration(object):
@@ -26,7 +26,7 @@ class EcoDeclaration(object):
         )
 
     def __init__(self, emissions, consumed_amount, retired_amount,
-                 technologies, resolution, utc_offset):
+                 technologies, resolution, utc_offset, validate=True):
         """
         :param dict[datetime, EmissionValues[str, float]] emissions:
             Emissions in gram
@@ -38,6 +38,26 @@ class EcoDeclaration(object):
             Dict of {technology: amount}
         :param EcoDeclarationResolution resolution:
         :param int utc_offset:
+        :param bool validate: Whether to validate the arguments, and
+            set default None for missing keys in emissions. Only omit
+            validation if the arguments are known to be consistent.
+        """
+        if validate:
+            self.validate(emissions, consumed_amount, technologies)
+
+        self.emissions = emissions
+        self.consumed_amount = consumed_amount
+        self.retired_amount = retired_amount
+        self.technologies = technologies
+        self.resolution = resolution
+        self.utc_offset = utc_offset
+
+    @staticmethod
+    def validate(emissions, consumed_amount, technologies):
+        """
+        :param dict[datetime, EmissionValues[str, float]] emissions:
+        :param dict[datetime, float] consumed_amount:
+        :param dict[datetime, EmissionValues[str, float]] technologies:
         """
         if not isinstance(emissions, dict):  # TODO test this
             raise ValueError('emissions must be of type dict')
@@ -70,13 +90,6 @@ class EcoDeclaration(object):
             for u in unique_keys:
                 v.setdefault(u, None)
 
-        self.emissions = emissions
-        self.consumed_amount = consumed_amount
-        self.retired_amount = retired_amount
-        self.technologies = technologies
-        self.resolution = resolution
-        self.utc_offset = utc_offset
-
     @property
     def total_consumed_amount(self):
         """
@@ -168,59 +181,251 @@ class EcoDeclaration(object):
                 'source data is represented in'
             ))
 
-        mappers = {
-            EcoDeclarationResolution.year: lambda d: d.replace(
-                month=1, day=1, hour=0, minute=0, second=0, microsecond=0),
-            EcoDeclarationResolution.month: lambda d: d.replace(
-                day=1, hour=0, minute=0, second=0, microsecond=0),
-            EcoDeclarationResolution.day: lambda d: d.replace(
-                hour=0, minute=0, second=0, microsecond=0),
-            EcoDeclarationResolution.hour: lambda d: d.replace(
-                minute=0, second=0, microsecond=0),
-        }
-
-        def __map_utc_offset(begin):
-            """
-            :param datetime begin:
-            :rtype: datetime
-            """
-            return begin.astimezone(timezone(timedelta(hours=utc_offset)))
-
-        begins = self.emissions.keys()
-
-        if utc_offset != self.utc_offset:
-            begins = map(__map_utc_offset, begins)
-
-        begins_sorted_and_grouped = groupby(
-            iterable=sorted(begins),
-            key=mappers[resolution],
+        return ColumnarEcoDeclaration \
+            .from_declaration(self) \
+            .as_resolution(resolution, utc_offset) \
+            .to_declaration()
+
+
+class ColumnarEcoDeclaration(object):
+    """
+    Columnar representation of an EcoDeclaration.
+
+    Begins are stored as a datetime64 array (wall clock time at the
+    declaration's UTC offset), with emissions and technologies as
+    EmissionMatrix (one row per begin) and amounts as float64 arrays,
+    all in the same order as begins. This allows resampling to another
+    resolution and/or UTC offset using vectorized bucketing.
+    """
+
+    # Unit of datetime64 to truncate begins to, per resolution
+    UNITS = {
+        EcoDeclarationResolution.year: 'datetime64[Y]',
+        EcoDeclarationResolution.month: 'datetime64[M]',
+        EcoDeclarationResolution.day: 'datetime64[D]',
+        EcoDeclarationResolution.hour: 'datetime64[h]',
+    }
+
+    def __init__(self, begins, emissions, consumed_amount, retired_amount,
+                 technologies, resolution, utc_offset, aware=True):
+        """
+        :param numpy.ndarray begins: datetime64 array of begins
+            (wall clock time at utc_offset)
+        :param EmissionMatrix emissions: Emissions in gram
+        :param numpy.ndarray consumed_amount: Consumed amount in Wh
+        :param numpy.ndarray retired_amount: Retired amount in Wh
+        :param EmissionMatrix technologies: Amount in Wh per technology
+        :param EcoDeclarationResolution resolution:
+        :param int utc_offset:
+        :param bool aware: Whether begins are timezone-aware when
+            converted back to datetime objects
+        """
+        self.begins = np.asarray(begins, dtype='datetime64[s]')
+        self.emissions = emissions
+        self.consumed_amount = np.asarray(consumed_amount, dtype=np.float64)
+        self.retired_amount = np.asarray(retired_amount, dtype=np.float64)
+        self.technologies = technologies
+        self.resolution = resolution
+        self.utc_offset = utc_offset
+        self.aware = aware
+
+        rows = len(self.begins)
+
+        if not (len(emissions) == len(technologies) == len(self.consumed_amount) == len(self.retired_amount) == rows):
+            raise ValueError('All columns must have a row per begin')
+
+    @classmethod
+    def from_dicts(cls, emissions, consumed_amount, retired_amount,
+                   technologies, resolution, utc_offset):
+        """
+        Creates a columnar declaration from dicts mapped by begin.
+
+        :param dict[datetime, dict[str, float]] emissions:
+        :param dict[datetime, float] consumed_amount:
+        :param dict[datetime, float] retired_amount:
+        :param dict[datetime, dict[str, float]] technologies:
+        :param EcoDeclarationResolution resolution:
+        :param int utc_offset:
+        :rtype: ColumnarEcoDeclaration
+        """
+        begins = sorted(consumed_amount.keys())
+        aware = bool(begins) and begins[0].utcoffset() is not None
+
+        return cls(
+            begins=to_datetime64(begins, utc_offset),
+            emissions=EmissionMatrix.from_dicts(emissions.get(b) for b in begins),
+            consumed_amount=[consumed_amount[b] for b in begins],
+            retired_amount=[retired_amount.get(b, 0) for b in begins],
+            technologies=EmissionMatrix.from_dicts(technologies.get(b) for b in begins),
+            resolution=resolution,
+            utc_offset=utc_offset,
+            aware=aware,
         )
 
-        new_emissions = {}
-        new_consumed_amount = {}
-        new_retired_amount = {}
-        new_technologies = {}
+    @classmethod
+    def from_declaration(cls, declaration):
+        """
+        :param EcoDeclaration declaration:
+        :rtype: ColumnarEcoDeclaration
+        """
+        return cls.from_dicts(
+            emissions=declaration.emissions,
+            consumed_amount=declaration.consumed_amount,
+            retired_amount=declaration.retired_amount,
+            technologies=declaration.technologies,
+            resolution=declaration.resolution,
+            utc_offset=declaration.utc_offset,
+        )
 
-        for new_begin, old_begins in begins_sorted_and_grouped:
-            old_begins = list(old_begins)
-            # TODO start=EmissionValues()
-            new_emissions[new_begin] = \
-                sum(self.emissions[b] for b in old_begins)
+    @classmethod
+    def from_mapped(cls, mapped, resolution, utc_offset):
+        """
+        :param MappedEcoDeclaration mapped:
+        :param EcoDeclarationResolution resolution:
+        :param int utc_offset:
+        :rtype: ColumnarEcoDeclaration
+        """
+        return cls.from_dicts(
+            emissions=mapped.emissions,
+            consumed_amount=mapped.consumed_amount,
+            retired_amount=mapped.retired_amount,
+            technologies=mapped.technologies,
+            resolution=resolution,
+            utc_offset=utc_offset,
+        )
 
-            new_consumed_amount[new_begin] = \
-                sum(self.consumed_amount[b] for b in old_begins)
+    def get_begins(self):
+        """
+        Returns begins as datetime objects.
 
-            new_retired_amount[new_begin] = \
-                sum(self.retired_amount.get(b, 0) for b in old_begins)
+        :rtype: list[datetime]
+        """
+        return from_datetime64(self.begins, self.utc_offset, self.aware)
 
-            new_technologies[new_begin] = \
-                sum(self.technologies[b] for b in old_begins)
+    def to_declaration(self):
+        """
+        :rtype: EcoDeclaration
+        """
+        begins = self.get_begins()
 
         return EcoDeclaration(
-            emissions=new_emissions,
-            consumed_amount=new_consumed_amount,
-            retired_amount=new_retired_amount,
+            emissions=dict(zip(begins, self.emissions.to_dicts(fill_missing=True))),
+            consumed_amount=dict(zip(begins, self.consumed_amount.tolist())),
+            retired_amount=dict(zip(begins, self.retired_amount.tolist())),
+            technologies=dict(zip(begins, self.technologies.to_dicts())),
+            resolution=self.resolution,
+            utc_offset=self.utc_offset,
+            validate=False,
+        )
+
+    def to_mapped(self):
+        """
+        :rtype: MappedEcoDeclaration
+        """
+        begins = self.get_begins()
+        consumed_amount = self.consumed_amount.sum()
+
+        # Emissions per Wh is zero (for all keys) where nothing is consumed
+        per_wh_divisor = np.where(self.consumed_amount > 0, self.consumed_amount, np.inf)
+        emissions_per_wh = self.emissions / per_wh_divisor
+
+        total_emissions = self.emissions.sum()
+
+        if consumed_amount > 0:
+            total_emissions_per_wh = total_emissions / float(consumed_amount)
+        else:
+            total_emissions_per_wh = EmissionValues()
+
+        return MappedEcoDeclaration(
+            emissions=dict(zip(begins, self.emissions.to_dicts(fill_missing=True))),
+            emissions_per_wh=dict(zip(begins, emissions_per_wh.to_dicts(fill_missing=True))),
+            consumed_amount=dict(zip(begins, self.consumed_amount.tolist())),
+            retired_amount=dict(zip(begins, self.retired_amount.tolist())),
+            technologies=dict(zip(begins, self.technologies.to_dicts())),
+            total_emissions=total_emissions,
+            total_emissions_per_wh=total_emissions_per_wh,
+            total_consumed_amount=int(consumed_amount),
+            total_retired_amount=int(self.retired_amount.sum()),
+            total_technologies=self.technologies.sum(),
+        )
+
+    def as_resolution(self, resolution, utc_offset):
+        """
+        :param EcoDeclarationResolution resolution:
+        :param int utc_offset:
+        :rtype: ColumnarEcoDeclaration
+        """
+        if (resolution, utc_offset) == (self.resolution, self.utc_offset):
+            return self
+        if resolution > self.resolution:
+            raise ValueError((
+                'Can not get declaration in higher resolution than the '
+                'source data is represented in'
+            ))
+        if resolution not in self.UNITS:
+            raise ValueError(f'Can not get declaration in resolution {resolution.name}')
+
+        # Shift wall clock time to the new UTC offset (only possible
+        # if begins are timezone-aware)
+        if utc_offset != self.utc_offset and self.aware:
+            begins = self.begins + np.timedelta64(utc_offset - self.utc_offset, 'h')
+        else:
+            begins = self.begins
+
+        buckets, groups = np.unique(
+            begins.astype(self.UNITS[resolution]), return_inverse=True)
+
+        groups = groups.reshape(-1)
+        count = len(buckets)
+
+        consumed_amount = np.zeros(count)
+        retired_amount = np.zeros(count)
+        np.add.at(consumed_amount, groups, self.consumed_amount)
+        np.add.at(retired_amount, groups, self.retired_amount)
+
+        return ColumnarEcoDeclaration(
+            begins=buckets.astype('datetime64[s]'),
+            emissions=self.emissions.group_sum(groups, count),
+            consumed_amount=consumed_amount,
+            retired_amount=retired_amount,
+            technologies=self.technologies.group_sum(groups, count),
             resolution=resolution,
-            technologies=new_technologies,
             utc_offset=utc_offset,
+            aware=self.aware,
         )
+
+
+def to_datetime64(begins, utc_offset):
+    """
+    Converts datetime objects to a datetime64 array of their wall clock
+    time at the provided UTC offset. Naive datetime objects are assumed
+    to already be at the UTC offset.
+
+    :param list[datetime] begins:
+    :param int utc_offset:
+    :rtype: numpy.ndarray
+    """
+    if begins and begins[0].utcoffset() is not None:
+        timestamps = np.array([b.timestamp() for b in begins]).round()
+        return (timestamps.astype(np.int64) + utc_offset * 3600) \
+            .astype('datetime64[s]')
+
+    return np.array(begins, dtype='datetime64[s]')
+
+
+def from_datetime64(begins, utc_offset, aware):
+    """
+    Reverse of to_datetime64().
+
+    :param numpy.ndarray begins:
+    :param int utc_offset:
+    :param bool aware: Whether to return timezone-aware datetime objects
+    :rtype: list[datetime]
+    """
+    begins = begins.astype('datetime64[s]').astype(datetime).tolist()
+
+    if aware:
+        tzinfo = timezone(timedelta(hours=utc_offset))
+        begins = [b.replace(tzinfo=tzinfo) for b in begins]
+
+    return begins
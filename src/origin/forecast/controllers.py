@@ -2,7 +2,7 @@ from uuid import uuid4
 import marshmallow_dataclass as md
 
 from origin.http import Controller
-from origin.db import inject_session, atomic
+from origin.db import inject_session, inject_read_session, atomic
 from origin.auth import UserQuery, inject_user, require_oauth
 from origin.pipelines import start_invoke_on_forecast_received_tasks
 
@@ -28,7 +28,7 @@ class GetForecast(Controller):
 
     @require_oauth('ggo.read')
     @inject_user
-    @inject_session
+    @inject_read_session
     def handle_request(self, request, user, session):
         """
         :param GetForecastRequest request:
@@ -65,7 +65,7 @@ class GetForecastList(Controller):
 
     @require_oauth('ggo.read')
     @inject_user
-    @inject_session
+    @inject_read_session
     def handle_request(self, request, user, session):
         """
         :param GetForecastListRequest request:
@@ -105,7 +105,7 @@ class GetForecastSeries(Controller):
 
     @require_oauth('ggo.read')
     @inject_user
-    @inject_session
+    @inject_read_session
     def handle_request(self, user, session):
         """
         :param origin.auth.User user:
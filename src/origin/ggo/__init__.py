@@ -1,4 +1,5 @@
 from .models import *
-from .composer import GgoComposer
+from .composer import GgoComposer, MeasurementCache
 from .importing import GgoImportController
-from .queries import GgoQuery, TransactionQuery
+from .queries import GgoQuery, TransactionQuery, GgoSummaryRollupQuery
+from .rollup import apply_rollup_deltas
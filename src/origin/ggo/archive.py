@@ -0,0 +1,250 @@
+"""
+Archiving of GGOs which have reached their final state.
+
+GGOs which are spent, or stored but expired, can never change again.
+Once they begin more than GGO_ARCHIVE_AFTER_DAYS ago, they are moved
+(together with the ledger transactions they are parent of, and the
+split targets of these transactions) from the live tables to a set of
+archive tables with identical columns. This keeps the live tables (and
+their indexes) small. GGOs which have been split are kept as long as
+any of their children are live, so GGOs are archived bottom-up.
+
+Retired GGOs are never archived, as eco declarations depend on them.
+GGOs which are pending (locked or not yet synchronized) are never
+archived either, as the ledger may still change them.
+
+Archived GGOs are subtracted from the GgoSummaryRollup table, which
+therefore only reflects live GGOs. Queries which need archived history
+too can use GgoQuery(session, include_archived=True), or likewise
+TransactionQuery for transfers.
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime, timedelta, timezone
+
+from origin.db import ModelBase
+from origin.ledger import Transaction, SplitTarget
+
+from .models import Ggo, GgoState
+from .rollup import add_rollup_delta, apply_rollup_deltas
+
+
+def _archive_table(name, table):
+    """
+    Creates an archive table with the same columns as the provided
+    table, but without foreign keys and server side defaults, plus a
+    column for when the row was archived. Archive tables are not
+    partitioned, so their primary key is "id" alone.
+
+    :param str name:
+    :param sa.Table table:
+    :rtype: sa.Table
+    """
+    columns = [
+        sa.Column(
+            column.name,
+            column.type,
+            primary_key=column.name == 'id',
+            nullable=column.nullable,
+            autoincrement=False,
+        )
+        for column in table.columns
+    ]
+
+    return sa.Table(
+        name,
+        ModelBase.metadata,
+        *columns,
+        sa.Column('archived', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+
+ggo_archive = _archive_table('ggo_ggo_archive', Ggo.__table__)
+transaction_archive = _archive_table('ledger_transaction_archive', Transaction.__table__)
+split_target_archive = _archive_table('ledger_split_target_archive', SplitTarget.__table__)
+
+sa.Index('ix_ggo_ggo_archive_user_id_begin', ggo_archive.c.user_id, ggo_archive.c.begin)
+sa.Index('ix_ledger_transaction_archive_parent_ggo_id', transaction_archive.c.parent_ggo_id)
+sa.Index('ix_ledger_split_target_archive_transaction_id', split_target_archive.c.transaction_id)
+
+
+def _union_with_archive(table, archive, name):
+    """
+    Returns a selectable of all rows of a live table and its archive,
+    with the same columns as the live table.
+
+    :param sa.Table table:
+    :param sa.Table archive:
+    :param str name:
+    :rtype: sa.sql.expression.Alias
+    """
+    columns = [c.name for c in table.columns]
+
+    return sa.union_all(
+        sa.select([table.c[name] for name in columns]),
+        sa.select([archive.c[name] for name in columns]),
+    ).alias(name)
+
+
+def get_archived_ggos_union(name='ggo_ggo_with_archive'):
+    """
+    Returns a selectable of all GGOs, both live and archived,
+    with the same columns as the ggo_ggo table.
+
+    :param str name:
+    :rtype: sa.sql.expression.Alias
+    """
+    return _union_with_archive(Ggo.__table__, ggo_archive, name)
+
+
+def get_archived_transactions_union(name='ledger_transaction_with_archive'):
+    """
+    Returns a selectable of all ledger transactions, both live and
+    archived, with the same columns as the ledger_transaction table.
+
+    :param str name:
+    :rtype: sa.sql.expression.Alias
+    """
+    return _union_with_archive(Transaction.__table__, transaction_archive, name)
+
+
+def get_archived_split_targets_union(name='ledger_split_target_with_archive'):
+    """
+    Returns a selectable of all split targets, both live and archived,
+    with the same columns as the ledger_split_target table.
+
+    :param str name:
+    :rtype: sa.sql.expression.Alias
+    """
+    return _union_with_archive(SplitTarget.__table__, split_target_archive, name)
+
+
+def get_archive_horizon(days):
+    """
+    Returns the point in time before which GGOs are archived.
+
+    :param int days:
+    :rtype: datetime
+    """
+    return datetime.now(tz=timezone.utc) - timedelta(days=days)
+
+
+def has_live_children():
+    """
+    Returns a filter clause for GGOs which have been split (or
+    transferred) into GGOs which are still in the live table.
+
+    Children inherit "begin" from their parent, which lets Postgres
+    look up the children in the parent's partition only.
+    """
+    transactions = Transaction.__table__
+    split_targets = SplitTarget.__table__
+    children = Ggo.__table__.alias('child')
+
+    return sa.exists() \
+        .where(transactions.c.parent_ggo_id == Ggo.id) \
+        .where(split_targets.c.transaction_id == transactions.c.id) \
+        .where(children.c.id == split_targets.c.ggo_id) \
+        .where(children.c.begin == Ggo.begin) \
+        .correlate(Ggo.__table__)
+
+
+def is_archivable(horizon):
+    """
+    Returns a filter clause for GGOs which can be archived.
+
+    GGOs with live children are kept until their children are archived,
+    as the ledger transactions and split targets they are parent of (and
+    which are archived along with them) are used to query transfers.
+
+    :param datetime horizon:
+    """
+    return sa.and_(
+        Ggo.begin < horizon,
+        sa.or_(
+            Ggo.state == GgoState.SPENT.value,
+            sa.and_(
+                Ggo.state == GgoState.STORED.value,
+                Ggo.expire_time <= sa.func.now(),
+            ),
+        ),
+        ~has_live_children(),
+    )
+
+
+def _move_rows(session, table, archive, where):
+    """
+    Deletes the rows matching the where-clause from a table and
+    inserts them into its archive table.
+
+    :param sqlalchemy.orm.Session session:
+    :param sa.Table table:
+    :param sa.Table archive:
+    :param where:
+    :returns: The moved rows
+    :rtype: list[sa.engine.RowProxy]
+    """
+    rows = session.execute(
+        table.delete()
+        .where(where)
+        .returning(*table.columns)
+    ).fetchall()
+
+    if rows:
+        session.execute(
+            insert(archive).values([dict(row) for row in rows])
+        )
+
+    return rows
+
+
+def archive_ggos(session, horizon, limit):
+    """
+    Moves up to "limit" archivable GGOs (which begin before "horizon")
+    to the archive tables together with their ledger transactions and
+    split targets, and subtracts them from the GgoSummaryRollup table.
+
+    :param sqlalchemy.orm.Session session:
+    :param datetime horizon:
+    :param int limit:
+    :returns: Number of archived GGOs
+    :rtype: int
+    """
+    ggo_ids = [
+        row.id for row in session.query(Ggo.id)
+        .filter(is_archivable(horizon))
+        .order_by(Ggo.begin, Ggo.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ]
+
+    if not ggo_ids:
+        return 0
+
+    transactions = Transaction.__table__
+    split_targets = SplitTarget.__table__
+
+    transaction_ids = sa.select([transactions.c.id]) \
+        .where(transactions.c.parent_ggo_id.in_(ggo_ids))
+
+    _move_rows(
+        session, split_targets, split_target_archive,
+        split_targets.c.transaction_id.in_(transaction_ids),
+    )
+
+    _move_rows(
+        session, transactions, transaction_archive,
+        transactions.c.parent_ggo_id.in_(ggo_ids),
+    )
+
+    ggos = _move_rows(
+        session, Ggo.__table__, ggo_archive,
+        Ggo.__table__.c.id.in_(ggo_ids),
+    )
+
+    deltas = {}
+    for ggo in ggos:
+        add_rollup_delta(deltas, ggo, -1)
+    apply_rollup_deltas(session, deltas)
+
+    return len(ggos)
@@ -1,9 +1,13 @@
 from origin.auth import User, MeteringPoint, MeteringPointType
+from origin.common import DateTimeRange
 from origin.ledger import Batch, SplitTransaction, RetireTransaction
 from origin.services.datahub import (
     DataHubService,
     Measurement,
+    MeasurementType,
+    MeasurementFilters,
     GetMeasurementRequest,
+    GetMeasurementListRequest,
 )
 
 from .queries import GgoQuery
@@ -13,6 +17,10 @@ from .models import Ggo
 datahub_service = DataHubService()
 
 
+# Number of measurements to fetch per request when prefetching
+MEASUREMENT_PAGE_SIZE = 1000
+
+
 class GgoComposer(object):
     """
     Implements functionality to transfer and/or retire a GGO.
@@ -59,16 +67,21 @@ class GgoComposer(object):
             self.ggo = ggo
             self.measurement = measurement
 
-    def __init__(self, ggo, session):
+    def __init__(self, ggo, session, measurements=None):
         """
+        Optionally provide a MeasurementCache to look up measurements and
+        their retired amounts, which must belong to the owner of the GGO.
+
         :param Ggo ggo: The GGO to transfer/retire
         :param sqlalchemy.orm.Session session:
+        :param MeasurementCache measurements:
         """
         assert ggo.is_tradable()
         assert not ggo.is_expired()
 
         self.ggo = ggo
         self.session = session
+        self.measurements = measurements
         self.transfers = []
         self.retires = []
 
@@ -136,6 +149,9 @@ class GgoComposer(object):
         if amount > remaining_amount:
             raise self.RetireAmountInvalid(amount, remaining_amount)
 
+        if self.measurements is not None:
+            self.measurements.add_retired_amount(measurement, amount)
+
         self.retires.append((measurement, meteringpoint, amount))
 
     # -- Compose  ------------------------------------------------------------
@@ -147,6 +163,26 @@ class GgoComposer(object):
 
         :rtype: (Batch, list[(User, Ggo)])
         """
+        transactions, recipients = self.build_transactions()
+
+        batch = Batch(user=self.ggo.user)
+        batch.add_all_transactions(transactions)
+
+        # Batch and transactions initial state
+        batch.on_begin()
+
+        return batch, recipients
+
+    def build_transactions(self):
+        """
+        Returns the Transactions necessary to execute the transfers and
+        retires, along with a list of tuples of (User, Ggo) where User is
+        the recipient of the [new] Ggo.
+
+        The Transactions must be added to a Batch in the order returned.
+
+        :rtype: (list[Transaction], list[(User, Ggo)])
+        """
         if self.total_amount == 0:
             raise self.Empty
         if self.total_amount > self.ggo.amount:
@@ -197,19 +233,16 @@ class GgoComposer(object):
                     measurement_address=measurement.address,
                 ))
 
-        # -- Setup Batch -----------------------------------------------------
+        # -- Transactions ----------------------------------------------------
 
-        batch = Batch(user=self.ggo.user)
+        transactions = []
 
         if should_split:
-            batch.add_transaction(split_transaction)
+            transactions.append(split_transaction)
         if retire_transactions:
-            batch.add_all_transactions(retire_transactions)
+            transactions.extend(retire_transactions)
 
-        # Batch and transactions initial state
-        batch.on_begin()
-
-        return batch, recipients
+        return transactions, recipients
 
     # -- Helper functions  ---------------------------------------------------
 
@@ -231,8 +264,12 @@ class GgoComposer(object):
         :param Measurement measurement:
         :rtype: int
         """
+        if self.measurements is not None:
+            return self.measurements.get_retired_amount(measurement)
+
         return GgoQuery(self.session) \
             .belongs_to(self.ggo.user) \
+            .begins_at(measurement.begin) \
             .is_retired(True) \
             .is_retired_to_address(measurement.address) \
             .get_total_amount()
@@ -248,8 +285,159 @@ class GgoComposer(object):
         :param datetime.datetime begin:
         :rtype: Measurement
         """
+        if self.measurements is not None:
+            return self.measurements.get_consumption(gsrn, begin)
+
         request = GetMeasurementRequest(gsrn=gsrn, begin=begin)
         response = datahub_service.get_consumption(
             self.ggo.user.access_token, request)
 
         return response.measurement
+
+
+class MeasurementCache(object):
+    """
+    Caches consumption Measurements, mapped by (gsrn, begin), along with
+    the amounts already retired to them, on behalf of a single user.
+
+    Measurements within a period of time can be loaded in bulk using
+    prefetch(), which fetches them from DataHubService in as few requests
+    as possible, and loads the already retired amounts using a single
+    grouped query. Measurements not prefetched are fetched one at a time
+    when requested.
+
+    Amounts retired using the cache must be registered using
+    add_retired_amount(), so subsequent retires to the same measurement
+    within the same database transaction are accounted for.
+    """
+
+    def __init__(self, user, session):
+        """
+        :param User user:
+        :param sqlalchemy.orm.Session session:
+        """
+        self.user = user
+        self.session = session
+        self.measurements = {}
+        self.retired_amounts = {}
+        self.prefetched = []
+
+    def prefetch(self, gsrn, begin_from, begin_to):
+        """
+        Fetches consumption Measurements for multiple GSRN numbers within
+        a period of time (both inclusive), and the amounts already retired
+        to them.
+
+        :param list[str] gsrn:
+        :param datetime.datetime begin_from:
+        :param datetime.datetime begin_to:
+        """
+        measurements = []
+        filters = MeasurementFilters(
+            gsrn=gsrn,
+            type=MeasurementType.CONSUMPTION,
+            begin_range=DateTimeRange(begin=begin_from, end=begin_to),
+        )
+
+        while True:
+            request = GetMeasurementListRequest(
+                filters=filters,
+                offset=len(measurements),
+                limit=MEASUREMENT_PAGE_SIZE,
+            )
+
+            response = datahub_service.get_measurements(
+                self.user.access_token, request)
+
+            measurements.extend(response.measurements)
+
+            if not response.measurements or len(measurements) >= response.total:
+                break
+
+        for measurement in measurements:
+            self.measurements[(measurement.gsrn, measurement.begin)] = measurement
+
+        self.prefetched.append((set(gsrn), begin_from, begin_to))
+        self.load_retired_amounts(measurements)
+
+    def load_retired_amounts(self, measurements):
+        """
+        Loads the amounts already retired to the provided measurements
+        using a single query. Measurements already loaded are skipped,
+        as their amounts might have been added to since.
+
+        :param list[Measurement] measurements:
+        """
+        measurements = [m for m in measurements
+                        if m.address not in self.retired_amounts]
+
+        if not measurements:
+            return
+
+        addresses = [m.address for m in measurements]
+        begin_range = DateTimeRange(
+            begin=min(m.begin for m in measurements),
+            end=max(m.begin for m in measurements),
+        )
+
+        retired_amounts = GgoQuery(self.session) \
+            .belongs_to(self.user) \
+            .begins_within(begin_range) \
+            .is_retired(True) \
+            .is_retired_to_any_address(addresses) \
+            .get_total_amount_per_retire_address()
+
+        for address in addresses:
+            self.retired_amounts[address] = retired_amounts.get(address, 0)
+
+    def is_prefetched(self, gsrn, begin):
+        """
+        :param str gsrn:
+        :param datetime.datetime begin:
+        :rtype: bool
+        """
+        return any(gsrn in prefetched_gsrn and begin_from <= begin <= begin_to
+                   for prefetched_gsrn, begin_from, begin_to in self.prefetched)
+
+    def get_consumption(self, gsrn, begin):
+        """
+        Returns a single Measurement for a GSRN at a specific begin,
+        or None if no such measurement exists.
+
+        :param str gsrn:
+        :param datetime.datetime begin:
+        :rtype: Measurement
+        """
+        key = (gsrn, begin)
+
+        if key not in self.measurements:
+            if self.is_prefetched(gsrn, begin):
+                return None
+
+            request = GetMeasurementRequest(gsrn=gsrn, begin=begin)
+            response = datahub_service.get_consumption(
+                self.user.access_token, request)
+
+            self.measurements[key] = response.measurement
+
+        return self.measurements[key]
+
+    def get_retired_amount(self, measurement):
+        """
+        Get the already retired amount for a specific measurement.
+
+        :param Measurement measurement:
+        :rtype: int
+        """
+        self.load_retired_amounts([measurement])
+        return self.retired_amounts[measurement.address]
+
+    def add_retired_amount(self, measurement, amount):
+        """
+        Registers an amount retired to a specific measurement.
+
+        :param Measurement measurement:
+        :param int amount:
+        """
+        self.load_retired_amounts([measurement])
+        self.retired_amounts[measurement.address] += amount
@@ -1,8 +1,14 @@
-from datetime import timezone
+import io
+import csv
+import json
+import base64
+from datetime import datetime, timezone
 
 import marshmallow_dataclass as md
+from flask import Response
 
-from origin.db import inject_session, atomic
+from origin.db import inject_session, inject_read_session, atomic, make_read_session
+from origin.settings import GGO_EXPORT_CHUNK_SIZE
 from origin.http import Controller, BadRequest
 from origin.webhooks import validate_hmac
 from origin.pipelines import (
@@ -18,8 +24,8 @@ from origin.auth import (
     require_oauth,
 )
 
-from .composer import GgoComposer
-from .queries import GgoQuery, TransactionQuery
+from .composer import GgoComposer, MeasurementCache
+from .queries import GgoQuery, TransactionQuery, GgoSummaryRollupQuery
 from .models import (
     Ggo,
     TransferDirection,
@@ -27,6 +33,8 @@ from .models import (
     RetireRequest,
     GetGgoListRequest,
     GetGgoListResponse,
+    ExportFormat,
+    ExportGgoListRequest,
     GetGgoSummaryRequest,
     GetGgoSummaryResponse,
     GetTotalAmountRequest,
@@ -37,6 +45,7 @@ from .models import (
     GetTransferredAmountResponse,
     ComposeGgoRequest,
     ComposeGgoResponse,
+    ComposeGgoBulkRequest,
     OnGgosIssuedWebhookRequest,
 )
 
@@ -50,10 +59,11 @@ class GetGgoList(Controller):
     """
     Request = md.class_schema(GetGgoListRequest)
     Response = md.class_schema(GetGgoListResponse)
+    FAST_SERIALIZE = True
 
     @require_oauth('ggo.read')
     @inject_user
-    @inject_session
+    @inject_read_session
     def handle_request(self, request, user, session):
         """
         :param GetGgoListRequest request:
@@ -63,23 +73,208 @@ class GetGgoList(Controller):
         """
         query = GgoQuery(session) \
             .belongs_to(user) \
-            .is_synchronized(True) \
-            .is_locked(False) \
+            .is_pending(False) \
             .apply_filters(request.filters)
 
-        results = query \
-            .order_by(Ggo.begin) \
-            .offset(request.offset)
+        if request.cursor:
+            results = query.ordered_after(*decode_ggo_cursor(request.cursor))
+        else:
+            results = query.offset(request.offset)
+
+        results = results.order_by(Ggo.begin, Ggo.id)
 
         if request.limit:
             results = results.limit(request.limit)
 
+        results = results.all()
+
+        if request.limit and len(results) == request.limit:
+            next_cursor = encode_ggo_cursor(results[-1])
+        else:
+            next_cursor = None
+
         return GetGgoListResponse(
             success=True,
-            total=query.count(),
-            results=results.all(),
+            total=query.count() if request.include_total else None,
+            results=results,
+            next_cursor=next_cursor,
+        )
+
+
+def encode_ggo_cursor(ggo):
+    """
+    Returns an opaque cursor pointing at the provided GGO's
+    position when ordered by (begin, id).
+
+    :param Ggo ggo:
+    :rtype: str
+    """
+    raw = '%s|%d' % (ggo.begin.astimezone(timezone.utc).isoformat(), ggo.id)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_ggo_cursor(cursor):
+    """
+    Reverse of encode_ggo_cursor(). Returns a tuple of (begin, id).
+
+    :param str cursor:
+    :rtype: (datetime, int)
+    """
+    try:
+        begin, ggo_id = base64.urlsafe_b64decode(
+            cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(begin), int(ggo_id)
+    except ValueError:
+        raise BadRequest('Invalid cursor')
+
+
+class ExportGgoList(Controller):
+    """
+    Exports the account's GGOs, or a subset hereof, as either
+    newline-delimited JSON or CSV.
+
+    The response is streamed while GGOs are read from the database using
+    a server side cursor, GGO_EXPORT_CHUNK_SIZE rows at a time, so memory
+    usage does not depend on the number of GGOs exported. Rows are read
+    as plain tuples, bypassing the ORM's identity map.
+    """
+    Request = md.class_schema(ExportGgoListRequest)
+
+    # Exported columns (in order) mapped by their name in the export
+    COLUMNS = (
+        ('address', Ggo.address),
+        ('sector', Ggo.sector),
+        ('begin', Ggo.begin),
+        ('end', Ggo.end),
+        ('amount', Ggo.amount),
+        ('technologyCode', Ggo.technology_code),
+        ('fuelCode', Ggo.fuel_code),
+        ('issueGsrn', Ggo.issue_gsrn),
+        ('retireGsrn', Ggo.retire_gsrn),
+        ('retireAddress', Ggo.retire_address),
+        ('expireTime', Ggo.expire_time),
+    )
+
+    MIMETYPES = {
+        ExportFormat.NDJSON: 'application/x-ndjson',
+        ExportFormat.CSV: 'text/csv',
+    }
+
+    @require_oauth('ggo.read')
+    @inject_user
+    def handle_request(self, request, user):
+        """
+        :param ExportGgoListRequest request:
+        :param User user:
+        :rtype: flask.Response
+        """
+        rows = self.get_rows(user, request.filters)
+
+        if request.format is ExportFormat.CSV:
+            body = self.render_csv(rows)
+        else:
+            body = self.render_ndjson(rows)
+
+        filename = f'ggos.{request.format.value}'
+
+        return Response(
+            body,
+            status=200,
+            mimetype=self.MIMETYPES[request.format],
+            headers={'Content-Disposition': f'attachment; filename={filename}'},
         )
 
+    def get_rows(self, user, filters):
+        """
+        Yields GGOs as tuples of values in the order of COLUMNS.
+
+        The session is owned (and closed) by the generator, as the
+        response is streamed after handle_request() has returned.
+
+        :param User user:
+        :param GgoFilters filters:
+        :rtype: collections.abc.Iterable[tuple]
+        """
+        session = make_read_session()
+
+        try:
+            query = GgoQuery(session) \
+                .belongs_to(user) \
+                .is_pending(False) \
+                .apply_filters(filters) \
+                .order_by(Ggo.begin, Ggo.id) \
+                .with_entities(*(column for _, column in self.COLUMNS)) \
+                .execution_options(stream_results=True) \
+                .yield_per(GGO_EXPORT_CHUNK_SIZE)
+
+            yield from query
+        finally:
+            session.close()
+
+    def render_ndjson(self, rows):
+        """
+        :param collections.abc.Iterable[tuple] rows:
+        :rtype: collections.abc.Iterable[str]
+        """
+        names = [name for name, _ in self.COLUMNS]
+
+        for chunk in chunked(rows, GGO_EXPORT_CHUNK_SIZE):
+            yield ''.join(
+                json.dumps(dict(zip(names, map(serialize_value, row)))) + '\n'
+                for row in chunk
+            )
+
+    def render_csv(self, rows):
+        """
+        :param collections.abc.Iterable[tuple] rows:
+        :rtype: collections.abc.Iterable[str]
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(name for name, _ in self.COLUMNS)
+
+        for chunk in chunked(rows, GGO_EXPORT_CHUNK_SIZE):
+            writer.writerows(map(serialize_value, row) for row in chunk)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        # Header only (no rows)
+        if buffer.tell():
+            yield buffer.getvalue()
+
+
+def chunked(iterable, size):
+    """
+    Yields lists of (at most) "size" items from an iterable.
+
+    :param collections.abc.Iterable iterable:
+    :param int size:
+    :rtype: collections.abc.Iterable[list]
+    """
+    chunk = []
+
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def serialize_value(value):
+    """
+    Converts a database value to its exported representation.
+
+    :param obj value:
+    :rtype: obj
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
 
 class GetGgoSummary(Controller):
     """
@@ -93,7 +288,7 @@ class GetGgoSummary(Controller):
 
     @require_oauth('ggo.read')
     @inject_user
-    @inject_session
+    @inject_read_session
     def handle_request(self, request, user, session):
         """
         :param GetGgoSummaryRequest request:
@@ -101,12 +296,22 @@ class GetGgoSummary(Controller):
         :param sqlalchemy.orm.Session session:
         :rtype: GetGgoSummaryResponse
         """
-        query = GgoQuery(session) \
+        query = GgoQuery(session, include_archived=request.include_archived) \
             .belongs_to(user) \
             .apply_filters(request.filters)
 
+        # Aggregate from the rollup table if the filters allow it
+        # (the rollup table does not include archived GGOs)
+        if not request.include_archived \
+                and GgoSummaryRollupQuery.supports_filters(request.filters):
+            rollup = GgoSummaryRollupQuery(session) \
+                .belongs_to(user) \
+                .apply_filters(request.filters)
+        else:
+            rollup = None
+
         summary = query.get_summary(
-            request.resolution, request.grouping, request.utc_offset)
+            request.resolution, request.grouping, request.utc_offset, rollup)
 
         if request.fill and request.filters.begin_range:
             summary.fill(request.filters.begin_range)
@@ -127,7 +332,7 @@ class GetTotalAmount(Controller):
 
     @require_oauth('ggo.read')
     @inject_user
-    @inject_session
+    @inject_read_session
     def handle_request(self, request, user, session):
         """
         :param GetTotalAmountRequest request:
@@ -135,7 +340,7 @@ class GetTotalAmount(Controller):
         :param sqlalchemy.orm.Session session:
         :rtype: GetTotalAmountResponse
         """
-        query = GgoQuery(session) \
+        query = GgoQuery(session, include_archived=request.include_archived) \
             .belongs_to(user) \
             .apply_filters(request.filters)
 
@@ -156,7 +361,7 @@ class GetTransferSummary(Controller):
 
     @require_oauth('ggo.transfer')
     @inject_user
-    @inject_session
+    @inject_read_session
     def handle_request(self, request, user, session):
         """
         :param GetTransferSummaryRequest request:
@@ -164,7 +369,7 @@ class GetTransferSummary(Controller):
         :param sqlalchemy.orm.Session session:
         :rtype: GetTransferSummaryResponse
         """
-        query = TransactionQuery(session) \
+        query = TransactionQuery(session, include_archived=request.include_archived) \
             .apply_filters(request.filters)
 
         if request.direction == TransferDirection.INBOUND:
@@ -198,7 +403,7 @@ class GetTransferredAmount(Controller):
 
     @require_oauth('ggo.transfer')
     @inject_user
-    @inject_session
+    @inject_read_session
     def handle_request(self, request, user, session):
         """
         :param GetTransferredAmountRequest request:
@@ -206,7 +411,7 @@ class GetTransferredAmount(Controller):
         :param sqlalchemy.orm.Session session:
         :rtype: GetTransferredAmountResponse
         """
-        query = TransactionQuery(session) \
+        query = TransactionQuery(session, include_archived=request.include_archived) \
             .apply_filters(request.filters)
 
         if request.direction == TransferDirection.INBOUND:
@@ -340,6 +545,14 @@ class ComposeGgo(Controller):
         if meteringpoint is None:
             raise BadRequest(f'MeteringPoint unavailable (GSRN: {request.gsrn})')
 
+        self.add_retire_to_metering_point(composer, meteringpoint, request)
+
+    def add_retire_to_metering_point(self, composer, meteringpoint, request):
+        """
+        :param GgoComposer composer:
+        :param MeteringPoint meteringpoint:
+        :param RetireRequest request:
+        """
         try:
             composer.add_retire(meteringpoint, request.amount)
         except composer.RetireMeasurementUnavailable as e:
@@ -404,6 +617,194 @@ class ComposeGgo(Controller):
         return GgoComposer(*args, **kwargs)
 
 
+class ComposeGgoBulk(ComposeGgo):
+    """
+    Composes multiple [parent] GGOs in a single request. Each entry in
+    "composes" is equivalent to the body of a request to ComposeGgo.
+
+    The GGOs, recipients and MeteringPoints of all entries are looked up
+    using one query each, and consumption measurements are fetched from
+    DataHubService in as few requests as possible.
+
+    The request is atomic: If any of the entries are invalid, nothing is
+    composed. Each entry is composed into its own ledger Batch (exactly
+    like ComposeGgo), so entries are committed or rolled back on the
+    ledger independently of each other. Batches are coalesced into
+    shared ledger submissions when submitted.
+    """
+    Request = md.class_schema(ComposeGgoBulkRequest)
+    Response = md.class_schema(ComposeGgoResponse)
+
+    @require_oauth(['ggo.transfer', 'ggo.retire'])
+    @inject_user
+    @inject_session
+    def handle_request(self, request, user, session):
+        """
+        :param ComposeGgoBulkRequest request:
+        :param User user:
+        :param sqlalchemy.orm.Session session:
+        :rtype: ComposeGgoResponse
+        """
+        batches = self.compose_bulk(user, request.composes)
+
+        for batch, recipients in batches:
+            start_handle_composed_ggo_pipeline(batch, recipients, session)
+
+        return ComposeGgoResponse(success=True)
+
+    @atomic
+    def compose_bulk(self, user, composes, session):
+        """
+        :param User user:
+        :param list[ComposeGgoRequest] composes:
+        :param sqlalchemy.orm.Session session:
+        :rtype: list[(Batch, list[(User, Ggo)])]
+        :returns: List of tuples of the composed Batches along with
+            a list of users who receive GGO by transfers
+        """
+        ggos = self.get_ggos(user, composes, session)
+        users = self.get_users(composes, session)
+        meteringpoints = self.get_metering_points(user, composes, session)
+        measurements = self.get_measurements(user, composes, ggos, session)
+        batches = []
+
+        for i, compose in enumerate(composes):
+            composer = self.get_composer(
+                ggos[compose.address], session, measurements)
+
+            for transfer in compose.transfers:
+                if transfer.account not in users:
+                    raise BadRequest((
+                        f'Account unavailable ({transfer.account}) '
+                        f'in compose #{i}'
+                    ))
+                composer.add_transfer(
+                    users[transfer.account], transfer.amount, transfer.reference)
+
+            for retire in compose.retires:
+                if retire.gsrn not in meteringpoints:
+                    raise BadRequest((
+                        f'MeteringPoint unavailable (GSRN: {retire.gsrn}) '
+                        f'in compose #{i}'
+                    ))
+                self.add_retire_to_metering_point(
+                    composer, meteringpoints[retire.gsrn], retire)
+
+            try:
+                batch, recipients = composer.build_batch()
+            except composer.Empty:
+                raise BadRequest(f'Nothing to transfer/retire in compose #{i}')
+            except composer.AmountUnavailable:
+                raise BadRequest((
+                    'Requested amount exceeds available amount '
+                    f'in compose #{i}'
+                ))
+
+            session.add(batch)
+            batches.append((batch, recipients))
+
+        return batches
+
+    def get_ggos(self, user, composes, session):
+        """
+        :param User user:
+        :param list[ComposeGgoRequest] composes:
+        :param sqlalchemy.orm.Session session:
+        :rtype: dict[str, Ggo]
+        :returns: GGOs mapped by their address
+        """
+        addresses = [compose.address for compose in composes]
+
+        if len(set(addresses)) != len(addresses):
+            raise BadRequest('The same GGO can only be composed once per request')
+
+        ggos = GgoQuery(session) \
+            .belongs_to(user) \
+            .has_any_address(addresses) \
+            .is_tradable() \
+            .all()
+
+        ggos_by_address = {ggo.address: ggo for ggo in ggos}
+
+        for i, address in enumerate(addresses):
+            if address not in ggos_by_address:
+                raise BadRequest((
+                    f'GGO not found or is unavailable: {address} '
+                    f'in compose #{i}'
+                ))
+
+        return ggos_by_address
+
+    def get_users(self, composes, session):
+        """
+        :param list[ComposeGgoRequest] composes:
+        :param sqlalchemy.orm.Session session:
+        :rtype: dict[str, User]
+        :returns: Users mapped by their subject
+        """
+        subs = {t.account for compose in composes for t in compose.transfers}
+
+        if not subs:
+            return {}
+
+        users = UserQuery(session) \
+            .is_active() \
+            .has_any_sub(list(subs)) \
+            .all()
+
+        return {u.sub: u for u in users}
+
+    def get_metering_points(self, user, composes, session):
+        """
+        :param User user:
+        :param list[ComposeGgoRequest] composes:
+        :param sqlalchemy.orm.Session session:
+        :rtype: dict[str, MeteringPoint]
+        :returns: MeteringPoints mapped by their GSRN number
+        """
+        gsrn = {r.gsrn for compose in composes for r in compose.retires}
+
+        if not gsrn:
+            return {}
+
+        meteringpoints = MeteringPointQuery(session) \
+            .belongs_to(user) \
+            .has_any_gsrn(list(gsrn)) \
+            .is_consumption() \
+            .all()
+
+        return {mp.gsrn: mp for mp in meteringpoints}
+
+    def get_measurements(self, user, composes, ggos, session):
+        """
+        Prefetches consumption measurements for all the requested retires.
+
+        :param User user:
+        :param list[ComposeGgoRequest] composes:
+        :param dict[str, Ggo] ggos:
+        :param sqlalchemy.orm.Session session:
+        :rtype: MeasurementCache
+        """
+        gsrn = set()
+        begins = set()
+
+        for compose in composes:
+            if compose.retires:
+                gsrn.update(r.gsrn for r in compose.retires)
+                begins.add(ggos[compose.address].begin)
+
+        measurements = MeasurementCache(user, session)
+
+        if gsrn:
+            measurements.prefetch(
+                gsrn=sorted(gsrn),
+                begin_from=min(begins),
+                begin_to=max(begins),
+            )
+
+        return measurements
+
+
 class OnGgoIssuedWebhook(Controller):
     """
     Invoked by DataHubService when new GGO(s) have been issued
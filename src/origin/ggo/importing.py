@@ -1,19 +1,57 @@
+from itertools import islice
+from sqlalchemy.dialects.postgresql import insert
+
 from origin import logger
 from origin.common import DateTimeRange
+from origin.settings import GGO_IMPORT_CHUNK_SIZE
 from origin.services.datahub import DataHubService, GetGgoListRequest
 
 from .models import Ggo
 from .queries import GgoQuery
+from .rollup import add_rollup_delta, apply_rollup_deltas
 
 
 datahub_service = DataHubService()
 
 
+# Columns inserted when importing GGOs
+IMPORT_COLUMNS = (
+    'user_id',
+    'address',
+    'issue_time',
+    'expire_time',
+    'begin',
+    'end',
+    'amount',
+    'sector',
+    'technology_code',
+    'fuel_code',
+    'synchronized',
+    'issued',
+    'stored',
+    'retired',
+    'locked',
+    'state',
+    'issue_gsrn',
+    'retire_gsrn',
+    'retire_address',
+)
+
+
 class GgoImportController(object):
     """
     Imports GGO(s) from DataHubService and saves them in the
     database with an ISSUED state.
+
+    GGOs are inserted in chunks of chunk_size GGOs, using a single
+    multi-row INSERT per chunk, skipping GGOs that already exists.
     """
+    def __init__(self, chunk_size=GGO_IMPORT_CHUNK_SIZE):
+        """
+        :param int chunk_size:
+        """
+        self.chunk_size = chunk_size
+
     def import_ggos(self, user, gsrn, begin_from, begin_to, session):
         """
         :param User user:
@@ -33,20 +71,17 @@ class GgoImportController(object):
         })
 
         # Import GGOs from DataHub
-        imported_ggos = self.fetch_ggos(user, gsrn, begin_from, begin_to)
+        imported_ggos = iter(self.fetch_ggos(user, gsrn, begin_from, begin_to))
         mapped_ggos = (self.map_imported_ggo(user, ggo) for ggo in imported_ggos)
-        filtered_ggos = (
-            ggo for ggo in mapped_ggos
-            if not self.ggo_exists(ggo.address, session)
-        )
 
         new_ggos = []
 
-        # Filter out GGOs that already exists and map to Ggo type
-        for ggo in filtered_ggos:
-            session.add(ggo)
-            session.flush()
-            new_ggos.append(ggo)
+        # Insert GGOs in chunks (skipping those that already exists)
+        while True:
+            chunk = list(islice(mapped_ggos, self.chunk_size))
+            if not chunk:
+                break
+            new_ggos.extend(self.insert_ggos(chunk, session))
 
         logger.info(f'Imported {len(new_ggos)} GGOs for GSRN: {gsrn}', extra={
             'gsrn': gsrn,
@@ -72,16 +107,50 @@ class GgoImportController(object):
         response = datahub_service.get_ggo_list(user.access_token, request)
         return response.ggos
 
-    def ggo_exists(self, address, session):
+    def insert_ggos(self, ggos, session):
         """
-        :param str address:
+        Inserts GGOs using a single multi-row INSERT, skipping GGOs whose
+        address already exists. Returns the GGOs actually inserted, loaded
+        from the database.
+
+        Since the GGOs are not inserted via the ORM, the GgoSummaryRollup
+        is updated explicitly.
+
+        :param list[Ggo] ggos:
         :param sqlalchemy.orm.Session session:
+        :rtype: list[Ggo]
         """
-        count = GgoQuery(session) \
-            .has_address(address) \
-            .count()
+        for ggo in ggos:
+            ggo.state = ggo.compute_state().value
+
+        rows = [
+            {column: getattr(ggo, column) for column in IMPORT_COLUMNS}
+            for ggo in ggos
+        ]
+
+        stmt = insert(Ggo.__table__) \
+            .values(rows) \
+            .on_conflict_do_nothing(index_elements=['address', 'begin']) \
+            .returning(Ggo.__table__.c.id, Ggo.__table__.c.address)
+
+        inserted = dict(session.execute(stmt).fetchall())
+
+        if not inserted:
+            return []
+
+        # Update the rollup with the GGOs actually inserted
+        deltas = {}
+        inserted_addresses = set(inserted.values())
+        for row in rows:
+            if row['address'] in inserted_addresses:
+                inserted_addresses.remove(row['address'])
+                add_rollup_delta(deltas, row, 1)
+        apply_rollup_deltas(session, deltas)
 
-        return count > 0
+        return GgoQuery(session) \
+            .filter(Ggo.id.in_(inserted.keys())) \
+            .order_by(Ggo.begin) \
+            .all()
 
     def map_imported_ggo(self, user, imported_ggo):
         """
@@ -103,6 +172,7 @@ class GgoImportController(object):
             synchronized=True,
             issued=True,
             stored=True,
+            retired=False,
             locked=False,
             issue_gsrn=imported_ggo.gsrn,
         )
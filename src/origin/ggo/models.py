@@ -6,7 +6,7 @@ from marshmallow_dataclass import NewType
 from sqlalchemy.dialects.postgresql import JSONB
 
 from sqlalchemy.orm import relationship
-from enum import Enum
+from enum import Enum, IntEnum
 from typing import List, Dict
 from bip32utils import BIP32Key
 from datetime import datetime, timezone
@@ -17,30 +17,59 @@ from origin.db import ModelBase, Session
 from origin.auth import User, sub_exists
 from origin.common import DateTimeRange
 from origin.ledger import KeyGenerator
-from origin.settings import UNKNOWN_TECHNOLOGY_LABEL
+from origin.settings import UNKNOWN_TECHNOLOGY_LABEL, COMPOSE_BULK_MAX_SIZE
 from origin.services.datahub import Ggo as DataHubGgo
 
 
 # -- Database models ---------------------------------------------------------
 
 
+class GgoState(IntEnum):
+    """
+    Compact representation of a GGO's state flags (stored, retired,
+    synchronized and locked), stored as a SMALLINT.
+    """
+    # Stored, synchronized, and not locked, ie. tradable (unless expired)
+    STORED = 1
+    # Not synchronized and/or locked by an operation on the ledger
+    PENDING = 2
+    # Retired to a measurement (and not pending)
+    RETIRED = 3
+    # Transferred or split (and not pending)
+    SPENT = 4
+
+
 class Ggo(ModelBase):
     """
     Implementation of a single GGO.
+
+    The table is partitioned by month of "begin" in the database (see
+    origin.ggo.partitions). The primary key and unique constraints
+    therefore include "begin", and other tables can not have foreign keys
+    referencing GGOs (relationships to GGOs are defined using explicit
+    join conditions). Filter on "begin" whenever possible, so Postgres
+    can skip partitions. Uniqueness of traded key indexes is enforced
+    by GgoKeyIndex.
     """
     __tablename__ = 'ggo_ggo'
     __table_args__ = (
-        sa.UniqueConstraint('address'),
-        sa.UniqueConstraint('user_id', 'key_index'),
+        sa.UniqueConstraint('address', 'begin'),
+        sa.UniqueConstraint('user_id', 'key_index', 'begin'),
+        sa.Index('ix_ggo_ggo_user_id_begin_id', 'user_id', 'begin', 'id'),
+        sa.Index('ix_ggo_ggo_user_id_state', 'user_id', 'state'),
+        sa.Index(
+            'ix_ggo_ggo_tradable_user_id_begin_id', 'user_id', 'begin', 'id',
+            postgresql_where=sa.text(f'state = {GgoState.STORED.value}'),
+        ),
     )
 
-    id = sa.Column(sa.Integer(), primary_key=True, index=True)
+    id = sa.Column(sa.Integer(), primary_key=True, autoincrement=True, index=True)
     user_id = sa.Column(sa.Integer(), sa.ForeignKey('auth_user.id'), index=True, nullable=False)
     user = relationship('User', foreign_keys=[user_id], lazy='joined')
 
     # If this is a child of another GGO (in case a split/transfer happened)
-    parent_id = sa.Column(sa.Integer(), sa.ForeignKey('ggo_ggo.id'), index=True)
-    parent = relationship('Ggo', foreign_keys=[parent_id], remote_side=[id], uselist=False)
+    parent_id = sa.Column(sa.Integer(), index=True)
+    parent = relationship('Ggo', primaryjoin='foreign(Ggo.parent_id) == remote(Ggo.id)', uselist=False)
 
     # Ledger data
     address = sa.Column(sa.String(), index=True, nullable=False)
@@ -49,7 +78,7 @@ class Ggo(ModelBase):
     # Dates
     issue_time = sa.Column(sa.DateTime(timezone=True), nullable=False, index=True)
     expire_time = sa.Column(sa.DateTime(timezone=True), nullable=False, index=True)
-    begin = sa.Column(sa.DateTime(timezone=True), nullable=False, index=True)
+    begin = sa.Column(sa.DateTime(timezone=True), primary_key=True, nullable=False, index=True)
     end = sa.Column(sa.DateTime(timezone=True), nullable=False)
 
     # GGO data
@@ -62,21 +91,25 @@ class Ggo(ModelBase):
 
     # Whether or not this GGO was originally issued (False means its
     # product of a trade/split)
-    issued = sa.Column(sa.Boolean(), nullable=False, index=True, default=False)
+    issued = sa.Column(sa.Boolean(), nullable=False, default=False)
 
     # Whether or not this GGO is currently stored (False means its
     # been transferred, split or retired)
-    stored = sa.Column(sa.Boolean(), nullable=False, index=True, default=False)
+    stored = sa.Column(sa.Boolean(), nullable=False, default=False)
 
     # Whether or not this GGO has been retired to a measurement
-    retired = sa.Column(sa.Boolean(), nullable=False, index=True, default=False)
+    retired = sa.Column(sa.Boolean(), nullable=False, default=False)
 
     # Whether or not this GGO has been synchronized onto the ledger
-    synchronized = sa.Column(sa.Boolean(), nullable=False, index=True, default=False)
+    synchronized = sa.Column(sa.Boolean(), nullable=False, default=False)
 
     # Whether or not this GGO is currently locked (True means that
     # a ledger operation is being executed with this GGO involved)
-    locked = sa.Column(sa.Boolean(), nullable=False, index=True, default=False)
+    locked = sa.Column(sa.Boolean(), nullable=False, default=False)
+
+    # The above flags (except issued) as a GgoState value, which is kept
+    # up to date when the GGO is flushed (see compute_state())
+    state = sa.Column(sa.SmallInteger(), nullable=False)
 
     # The GSRN number this GGO was issued at (if issued=True)
     issue_gsrn = sa.Column(sa.String(), sa.ForeignKey('accounts_meteringpoint.gsrn'), index=True)
@@ -87,6 +120,21 @@ class Ggo(ModelBase):
     retire_meteringpoint = relationship('MeteringPoint', foreign_keys=[retire_gsrn], lazy='joined', uselist=False)
     retire_address = sa.Column(sa.String(), index=True)
 
+    def compute_state(self):
+        """
+        Returns the GgoState corresponding to the GGO's state flags.
+
+        :rtype: GgoState
+        """
+        if self.locked or not self.synchronized:
+            return GgoState.PENDING
+        elif self.retired:
+            return GgoState.RETIRED
+        elif self.stored:
+            return GgoState.STORED
+        else:
+            return GgoState.SPENT
+
     def create_child(self, amount, user):
         """
         Creates a new child Ggo.
@@ -97,8 +145,11 @@ class Ggo(ModelBase):
         """
         assert 0 < amount <= self.amount
 
-        key_index = GgoIndexSequence.get_next(user.id, Session.object_session(self))
+        session = Session.object_session(self)
+        key_index = GgoIndexSequence.get_next(user.id, session)
         key = KeyGenerator.get_key_for_traded_ggo_at_index(user, key_index)
+
+        session.add(GgoKeyIndex(user_id=user.id, key_index=key_index))
         address = ols.generate_address(ols.AddressPrefix.GGO, key.PublicKey())
 
         return Ggo(
@@ -162,6 +213,15 @@ class Ggo(ModelBase):
         return datetime.now(tz=timezone.utc) >= self.expire_time
 
 
+@sa.event.listens_for(Ggo, 'before_insert')
+@sa.event.listens_for(Ggo, 'before_update')
+def update_ggo_state(mapper, connection, target):
+    """
+    Keeps Ggo.state in sync with the state flags.
+    """
+    target.state = target.compute_state().value
+
+
 class GgoIndexSequence(ModelBase):
     """
     Keeps track of indexes for Ggos, which are unique per user.
@@ -206,6 +266,89 @@ class GgoIndexSequence(ModelBase):
         return key_index
 
 
+class GgoKeyIndex(ModelBase):
+    """
+    Key indexes used by traded GGOs, which must be unique per user.
+
+    The ggo_ggo table is partitioned by "begin", so its unique constraint
+    on key indexes can only be unique per partition (it includes "begin").
+    This table is not partitioned, and enforces the uniqueness across
+    partitions. Rows are kept when GGOs are archived, so key indexes
+    are never reused.
+    """
+    __tablename__ = 'ggo_ggo_key_index'
+
+    user_id = sa.Column(sa.Integer(), sa.ForeignKey('auth_user.id'), primary_key=True)
+    key_index = sa.Column(sa.Integer(), primary_key=True)
+
+
+class GgoSummaryRollup(ModelBase):
+    """
+    Pre-aggregated amount of GGOs per user, hour, category and technology.
+
+    Each row sums up the GGOs that share the same key (the unique
+    constraint below). The table is maintained incrementally whenever
+    GGOs are inserted, updated or deleted (see origin.ggo.rollup), and
+    is used by GgoSummary to avoid aggregating the ggo_ggo table on
+    every request.
+
+    The category flags are stored the same way GgoQuery filters on them,
+    ie. "issued" is only True if the GGO also has an issue GSRN, and
+    "retired" is only True if the GGO also has a retire GSRN and address.
+    """
+    __tablename__ = 'ggo_summary_rollup'
+    __table_args__ = (
+        sa.UniqueConstraint(
+            'user_id', 'begin', 'expire_time', 'issued', 'stored',
+            'retired', 'sector', 'technology_code', 'fuel_code',
+        ),
+    )
+
+    id = sa.Column(sa.Integer(), primary_key=True, index=True)
+    user_id = sa.Column(sa.Integer(), sa.ForeignKey('auth_user.id'), index=True, nullable=False)
+
+    # Hour bucket (GGOs are hourly, so this equals their begin)
+    begin = sa.Column(sa.DateTime(timezone=True), nullable=False, index=True)
+    expire_time = sa.Column(sa.DateTime(timezone=True), nullable=False)
+
+    # Category flags
+    issued = sa.Column(sa.Boolean(), nullable=False)
+    stored = sa.Column(sa.Boolean(), nullable=False)
+    retired = sa.Column(sa.Boolean(), nullable=False)
+
+    # Grouping
+    sector = sa.Column(sa.String(), nullable=False)
+    technology_code = sa.Column(sa.String(), nullable=False)
+    fuel_code = sa.Column(sa.String(), nullable=False)
+
+    # Aggregated values (rows are kept when ggo_count reaches zero)
+    amount = sa.Column(sa.BigInteger(), nullable=False, default=0)
+    ggo_count = sa.Column(sa.Integer(), nullable=False, default=0)
+
+
+class GgoStoredRollup(ModelBase):
+    """
+    Pre-aggregated amount of stored GGOs per user and hour.
+
+    Maintained together with GgoSummaryRollup (see origin.ggo.rollup),
+    and used when searching for suppliers, which needs the stored amount
+    of all users within a period of time.
+    """
+    __tablename__ = 'ggo_stored_rollup'
+    __table_args__ = (
+        sa.UniqueConstraint('user_id', 'begin'),
+        sa.Index('ix_ggo_stored_rollup_begin_user_id', 'begin', 'user_id', 'amount', 'ggo_count'),
+    )
+
+    id = sa.Column(sa.Integer(), primary_key=True, index=True)
+    user_id = sa.Column(sa.Integer(), sa.ForeignKey('auth_user.id'), nullable=False)
+    begin = sa.Column(sa.DateTime(timezone=True), nullable=False)
+
+    # Aggregated values (rows are kept when ggo_count reaches zero)
+    amount = sa.Column(sa.BigInteger(), nullable=False, default=0)
+    ggo_count = sa.Column(sa.Integer(), nullable=False, default=0)
+
+
 class Technology(ModelBase):
     """
     A technology (by label) consists of a combination
@@ -331,12 +474,41 @@ class GetGgoListRequest:
     limit: int = field(default=None)
     order: List[str] = field(default_factory=list)
 
+    # Opaque cursor (nextCursor from a previous response)
+    cursor: str = field(default=None)
+
+    # Counting the full result set is expensive for large accounts
+    include_total: bool = field(default=True, metadata=dict(data_key='includeTotal'))
+
+    @validates_schema
+    def validate_offset_and_cursor_mutually_exclusive(self, data, **kwargs):
+        if data.get('offset') and data.get('cursor'):
+            raise ValidationError({
+                'offset': ['Field is mutually exclusive with cursor'],
+                'cursor': ['Field is mutually exclusive with offset'],
+            })
+
 
 @dataclass
 class GetGgoListResponse:
     success: bool
-    total: int
+    total: int = field(default=None)
     results: List[MappedGgo] = field(default_factory=list)
+    next_cursor: str = field(default=None, metadata=dict(data_key='nextCursor'))
+
+
+# -- ExportGgoList request ---------------------------------------------------
+
+
+class ExportFormat(Enum):
+    NDJSON = 'ndjson'
+    CSV = 'csv'
+
+
+@dataclass
+class ExportGgoListRequest:
+    filters: GgoFilters
+    format: ExportFormat = field(default=ExportFormat.NDJSON, metadata=dict(by_value=True))
 
 
 # -- GetGgoSummary request and response --------------------------------------
@@ -355,6 +527,9 @@ class GetGgoSummaryRequest:
     # Offset from UTC in hours
     utc_offset: int = field(metadata=dict(required=False, missing=0, data_key='utcOffset'))
 
+    # Whether or not to include archived GGOs (slower)
+    include_archived: bool = field(default=False, metadata=dict(data_key='includeArchived'))
+
     @post_load
     def apply_time_offset(self, data, **kwargs):
         """
@@ -393,6 +568,9 @@ class GetGgoSummaryResponse:
 class GetTotalAmountRequest:
     filters: GgoFilters
 
+    # Whether or not to include archived GGOs (slower)
+    include_archived: bool = field(default=False, metadata=dict(data_key='includeArchived'))
+
 
 @dataclass
 class GetTotalAmountResponse:
@@ -418,6 +596,9 @@ class GetTransferSummaryRequest:
 
     direction: TransferDirection = field(default=None, metadata=dict(by_value=True))
 
+    # Whether or not to include transfers of archived GGOs (slower)
+    include_archived: bool = field(default=False, metadata=dict(data_key='includeArchived'))
+
     @post_load
     def apply_time_offset(self, data, **kwargs):
         """
@@ -463,6 +644,15 @@ class ComposeGgoResponse:
     message: str = field(default=None)
 
 
+# -- ComposeGgoBulk request and response -------------------------------------
+
+
+@dataclass
+class ComposeGgoBulkRequest:
+    composes: List[ComposeGgoRequest] = field(metadata=dict(
+        validate=validate.Length(min=1, max=COMPOSE_BULK_MAX_SIZE)))
+
+
 # -- GetTransferredAmount request and response -------------------------------
 
 
@@ -471,6 +661,9 @@ class GetTransferredAmountRequest:
     filters: TransferFilters
     direction: TransferDirection = field(default=None, metadata=dict(by_value=True))
 
+    # Whether or not to include transfers of archived GGOs (slower)
+    include_archived: bool = field(default=False, metadata=dict(data_key='includeArchived'))
+
 
 @dataclass
 class GetTransferredAmountResponse:
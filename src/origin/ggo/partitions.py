@@ -0,0 +1,162 @@
+"""
+Monthly range partitioning of the ggo_ggo table by "begin".
+
+Partitions are named ggo_ggo_yYYYYmMM, and a default partition
+(ggo_ggo_default) catches GGOs outside of the existing partitions.
+Partitions for upcoming months are created ahead of time by
+create_future_ggo_partitions(), which is invoked periodically.
+GGOs which ended up in the default partition are moved to the
+month's partition once it is created.
+"""
+from datetime import datetime, timezone
+
+from origin import logger
+from origin.settings import GGO_PARTITION_MONTHS_AHEAD
+
+from .models import Ggo
+
+
+def get_month(dt):
+    """
+    Returns the first moment of the month (in UTC) of the provided datetime.
+
+    :param datetime dt:
+    :rtype: datetime
+    """
+    dt = dt.astimezone(timezone.utc)
+    return datetime(dt.year, dt.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month, months):
+    """
+    :param datetime month: First moment of a month
+    :param int months:
+    :rtype: datetime
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def get_partition_name(month):
+    """
+    :param datetime month: First moment of a month
+    :rtype: str
+    """
+    return '%s_y%04dm%02d' % (Ggo.__tablename__, month.year, month.month)
+
+
+def is_partitioned(session):
+    """
+    Returns whether or not the GGO table is partitioned.
+
+    :param sqlalchemy.orm.Session session:
+    :rtype: bool
+    """
+    return session.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+        "WHERE partrelid = to_regclass(:table))",
+        {'table': Ggo.__tablename__},
+    ).scalar()
+
+
+def get_default_partition_name():
+    """
+    :rtype: str
+    """
+    return '%s_default' % Ggo.__tablename__
+
+
+def has_default_partition_rows(session, month):
+    """
+    Returns whether or not the default partition contains GGOs
+    which begin within the provided month.
+
+    :param sqlalchemy.orm.Session session:
+    :param datetime month: First moment of a month
+    :rtype: bool
+    """
+    return session.execute(
+        "SELECT EXISTS (SELECT 1 FROM %s "
+        "WHERE begin >= :begin AND begin < :end)" % (
+            get_default_partition_name(),
+        ),
+        {'begin': month, 'end': add_months(month, 1)},
+    ).scalar()
+
+
+def create_ggo_partition(session, month):
+    """
+    Creates the partition for a month, unless it already exists.
+
+    Postgres refuses to create a partition while the default partition
+    contains rows which belong to it. In this case the default partition
+    is detached while the GGOs are moved to the new partition, which
+    locks the GGO table until the transaction commits.
+
+    :param sqlalchemy.orm.Session session:
+    :param datetime month: First moment of a month
+    """
+    partition = get_partition_name(month)
+    default_partition = get_default_partition_name()
+    create_partition = (
+        "CREATE TABLE IF NOT EXISTS %s PARTITION OF %s "
+        "FOR VALUES FROM ('%s') TO ('%s')" % (
+            partition,
+            Ggo.__tablename__,
+            month.isoformat(),
+            add_months(month, 1).isoformat(),
+        )
+    )
+
+    # An existing partition can not overlap the default partition,
+    # so this also implies that the partition does not exist
+    if not has_default_partition_rows(session, month):
+        session.execute(create_partition)
+        return
+
+    logger.info(f'Moving GGOs from {default_partition} to {partition}', extra={
+        'partition': partition,
+    })
+
+    in_month = {'begin': month, 'end': add_months(month, 1)}
+
+    session.execute(
+        "ALTER TABLE %s DETACH PARTITION %s" % (
+            Ggo.__tablename__, default_partition))
+    session.execute(create_partition)
+    session.execute(
+        "INSERT INTO %s SELECT * FROM %s "
+        "WHERE begin >= :begin AND begin < :end" % (
+            partition, default_partition),
+        in_month)
+    session.execute(
+        "DELETE FROM %s WHERE begin >= :begin AND begin < :end" % (
+            default_partition),
+        in_month)
+    session.execute(
+        "ALTER TABLE %s ATTACH PARTITION %s DEFAULT" % (
+            Ggo.__tablename__, default_partition))
+
+
+def create_future_ggo_partitions(session, months=GGO_PARTITION_MONTHS_AHEAD):
+    """
+    Creates partitions for the current month and the provided number of
+    months ahead. Does nothing if the GGO table is not partitioned.
+
+    :param sqlalchemy.orm.Session session:
+    :param int months:
+    :rtype: list[str]
+    :returns: Names of the partitions created (or already existing)
+    """
+    if not is_partitioned(session):
+        return []
+
+    current_month = get_month(datetime.now(tz=timezone.utc))
+    partitions = []
+
+    for i in range(months + 1):
+        month = add_months(current_month, i)
+        create_ggo_partition(session, month)
+        partitions.append(get_partition_name(month))
+
+    return partitions
@@ -1,18 +1,31 @@
+import numpy as np
 import sqlalchemy as sa
 from sqlalchemy import func, bindparam, text
 from sqlalchemy.orm import aliased
 from datetime import datetime, timezone
-from itertools import groupby
-from functools import lru_cache
+from operator import itemgetter
+from itertools import groupby, repeat
 from dateutil.relativedelta import relativedelta
 
 from origin.auth import User
 from origin.common import DateTimeRange
 from origin.ledger import SplitTarget, SplitTransaction
-from origin.settings import UNKNOWN_TECHNOLOGY_LABEL
+from origin.cache import TTLCache, get_query_cache_key
+from origin.settings import (
+    UNKNOWN_TECHNOLOGY_LABEL,
+    GGO_SUMMARY_CACHE_TTL,
+    GGO_SUMMARY_CACHE_MAX_BYTES,
+)
 
+from .archive import (
+    get_archived_ggos_union,
+    get_archived_transactions_union,
+    get_archived_split_targets_union,
+)
 from .models import (
     Ggo,
+    GgoState,
+    GgoSummaryRollup,
     Technology,
     SummaryGroup,
     GgoFilters,
@@ -45,15 +58,21 @@ class GgoQuery(object):
             .limit(20) \
             .count()
 
+    Archived GGOs (see origin.ggo.archive) are excluded unless
+    include_archived is True.
     """
-    def __init__(self, session, q=None):
+    def __init__(self, session, q=None, include_archived=False):
         """
         :param sa.orm.Session session:
         :param sa.orm.Query q:
+        :param bool include_archived:
         """
         self.session = session
         if q is not None:
             self.q = q
+        elif include_archived:
+            self.q = session.query(Ggo) \
+                .select_entity_from(get_archived_ggos_union())
         else:
             self.q = session.query(Ggo)
 
@@ -125,6 +144,17 @@ class GgoQuery(object):
             Ggo.address == address,
         ))
 
+    def has_any_address(self, addresses):
+        """
+        Only include GGOs with any of the provided addresses.
+
+        :param list[str] addresses:
+        :rtype: GgoQuery
+        """
+        return self.__class__(self.session, self.q.filter(
+            Ggo.address.in_(addresses),
+        ))
+
     def belongs_to(self, user):
         """
         Only include GGOs which belong to the provided user.
@@ -162,6 +192,25 @@ class GgoQuery(object):
             Ggo.begin <= begin_range.end.astimezone(timezone.utc),
         )))
 
+    def ordered_after(self, begin, ggo_id):
+        """
+        Only include GGOs which comes after the provided (begin, id)
+        when ordered by begin and id. Used for keyset pagination.
+
+        The redundant condition on begin alone allows Postgres to skip
+        partitions, which it can not do using the tuple comparison.
+
+        :param datetime.datetime begin:
+        :param int ggo_id:
+        :rtype: GgoQuery
+        """
+        begin = begin.astimezone(timezone.utc)
+
+        return self.__class__(self.session, self.q.filter(
+            Ggo.begin >= begin,
+            sa.tuple_(Ggo.begin, Ggo.id) > sa.tuple_(begin, ggo_id),
+        ))
+
     def is_issued(self, value=True):
         """
         Include or exclude GGOs which were issued from producing energy,
@@ -217,6 +266,20 @@ class GgoQuery(object):
             Ggo.retire_address == address,
         ))
 
+    def is_retired_to_any_address(self, addresses):
+        """
+        Only include GGOs which have been retired to any of the
+        provided measurement addresses.
+
+        :param list[str] addresses:
+        :rtype: GgoQuery
+        """
+        return self.__class__(self.session, self.q.filter(
+            Ggo.retired.is_(True),
+            Ggo.retire_gsrn.isnot(None),
+            Ggo.retire_address.in_(addresses),
+        ))
+
     def is_retired_to_gsrn(self, gsrn):
         """
         Only include GGOs which have been retired to a GSRN number.
@@ -280,6 +343,37 @@ class GgoQuery(object):
             Ggo.locked.is_(value),
         ))
 
+    def has_state(self, *states):
+        """
+        Only include GGOs in any of the provided states.
+
+        :param GgoState states:
+        :rtype: GgoQuery
+        """
+        if len(states) == 1:
+            cond = Ggo.state == states[0].value
+        else:
+            cond = Ggo.state.in_([state.value for state in states])
+
+        return self.__class__(self.session, self.q.filter(cond))
+
+    def is_pending(self, value=True):
+        """
+        Include or exclude GGOs which are not synchronized and/or locked
+        by operations on the ledger.
+
+        :param bool value:
+        :rtype: GgoQuery
+        """
+        if value is True:
+            cond = Ggo.state == GgoState.PENDING.value
+        elif value is False:
+            cond = Ggo.state != GgoState.PENDING.value
+        else:
+            raise RuntimeError('Should NOT have happened!')
+
+        return self.__class__(self.session, self.q.filter(cond))
+
     def is_tradable(self):
         """
         Only include GGOs which are currently tradable (or retireable).
@@ -287,11 +381,8 @@ class GgoQuery(object):
         :rtype: GgoQuery
         """
         return self \
-            .is_stored(True) \
-            .is_expired(False) \
-            .is_retired(False) \
-            .is_synchronized(True) \
-            .is_locked(False)
+            .has_state(GgoState.STORED) \
+            .is_expired(False)
 
     def is_retirable(self):
         """
@@ -321,6 +412,22 @@ class GgoQuery(object):
             func.sum(self.q.subquery().c.amount)).scalar()
         return total_amount if total_amount is not None else 0
 
+    def get_total_amount_per_retire_address(self):
+        """
+        Returns the total amount of the result set grouped by the
+        measurement address the GGOs are retired to.
+
+        :rtype: dict[str, int]
+        """
+        subquery = self.q.subquery()
+
+        query = self.session \
+            .query(subquery.c.retire_address, func.sum(subquery.c.amount)) \
+            .filter(subquery.c.retire_address.isnot(None)) \
+            .group_by(subquery.c.retire_address)
+
+        return {address: int(amount) for address, amount in query}
+
     def get_distinct_begins(self):
         """
         Returns a list of all distinct begins in the result set.
@@ -330,41 +437,73 @@ class GgoQuery(object):
         return [row[0] for row in self.session.query(
             self.q.subquery().c.begin.distinct())]
 
-    def get_summary(self, resolution, grouping, utc_offset=0):
+    def get_summary(self, resolution, grouping, utc_offset=0, rollup=None):
         """
         Returns a summary of the result set.
 
+        Optionally provide a GgoSummaryRollupQuery with the same filters
+        applied as this query to aggregate the summary from the
+        pre-aggregated rollup table.
+
         :param SummaryResolution resolution:
         :param list[str] grouping:
         :param int utc_offset:
+        :param GgoSummaryRollupQuery rollup:
         :rtype: GgoSummary
         """
         return GgoSummary(
-            self.session, self, resolution, grouping, utc_offset)
+            self.session, self, resolution, grouping, utc_offset, rollup)
 
 
 class TransactionQuery(GgoQuery):
     """
     The same as GgoQuery except it only includes GGOs which have
     been transferred.
+
+    Transfers of archived GGOs are excluded unless include_archived
+    is True, in which case an ArchivedTransactionQuery is returned.
     """
 
     parent_ggo = aliased(Ggo, name='parent')
+    split_target = SplitTarget
+    split_transaction = SplitTransaction
 
-    def __init__(self, session, q=None):
+    def __new__(cls, session, q=None, include_archived=False):
+        # Filters are cascaded using self.__class__(), so the class
+        # itself determines which tables are queried
+        if include_archived:
+            cls = ArchivedTransactionQuery
+        return super(TransactionQuery, cls).__new__(cls)
+
+    def __init__(self, session, q=None, include_archived=False):
         """
         :param sa.orm.Session session:
         :param sa.orm.Query q:
+        :param bool include_archived:
         """
         if q is None:
-            q = session.query(Ggo) \
-                .join(SplitTarget, SplitTarget.ggo_id == Ggo.id) \
-                .join(SplitTransaction, SplitTransaction.id == SplitTarget.transaction_id) \
-                .join(self.parent_ggo, self.parent_ggo.id == SplitTransaction.parent_ggo_id) \
-                .filter(Ggo.user_id != self.parent_ggo.user_id)
+            q = self.query_transfers(session)
 
         super(TransactionQuery, self).__init__(session, q)
 
+    def query_ggos(self, session):
+        """
+        :param sa.orm.Session session:
+        :rtype: sa.orm.Query
+        """
+        return session.query(Ggo)
+
+    def query_transfers(self, session):
+        """
+        :param sa.orm.Session session:
+        :rtype: sa.orm.Query
+        """
+        return self.query_ggos(session) \
+            .join(self.split_target, self.split_target.ggo_id == Ggo.id) \
+            .join(self.split_transaction, self.split_transaction.id == self.split_target.transaction_id) \
+            .join(self.parent_ggo, self.parent_ggo.id == self.split_transaction.parent_ggo_id) \
+            .filter(Ggo.user_id != self.parent_ggo.user_id)
+
     def apply_filters(self, filters):
         """
         :param TransferFilters filters:
@@ -417,7 +556,7 @@ class TransactionQuery(GgoQuery):
         :rtype: TransactionQuery
         """
         return self.__class__(self.session, self.q.filter(
-            SplitTarget.reference == reference,
+            self.split_target.reference == reference,
         ))
 
     def has_any_reference(self, references):
@@ -426,10 +565,129 @@ class TransactionQuery(GgoQuery):
         :rtype: TransactionQuery
         """
         return self.__class__(self.session, self.q.filter(
-            SplitTarget.reference.in_(references),
+            self.split_target.reference.in_(references),
         ))
 
 
+class ArchivedTransactionQuery(TransactionQuery):
+    """
+    The same as TransactionQuery except it includes transfers of
+    archived GGOs (see origin.ggo.archive), which is slower.
+    """
+
+    parent_ggo = aliased(
+        Ggo, get_archived_ggos_union('parent'))
+    split_target = aliased(
+        SplitTarget, get_archived_split_targets_union('split_target'))
+    split_transaction = aliased(
+        SplitTransaction, get_archived_transactions_union('split_transaction'))
+
+    def query_ggos(self, session):
+        """
+        :param sa.orm.Session session:
+        :rtype: sa.orm.Query
+        """
+        return session.query(Ggo) \
+            .select_entity_from(get_archived_ggos_union())
+
+
+class GgoSummaryRollupQuery(object):
+    """
+    Abstraction around querying GgoSummaryRollup objects from the database,
+    supporting a subset of the filters of GgoQuery.
+
+    Use supports_filters() to determine whether a set of GgoFilters can be
+    applied to the rollup, otherwise the GGOs must be queried using GgoQuery.
+
+    Usage example::
+
+        query = GgoSummaryRollupQuery(session) \
+            .belongs_to(user) \
+            .apply_filters(filters)
+
+    """
+    def __init__(self, session, q=None):
+        """
+        :param sa.orm.Session session:
+        :param sa.orm.Query q:
+        """
+        self.session = session
+        if q is not None:
+            self.q = q
+        else:
+            self.q = session.query(GgoSummaryRollup) \
+                .filter(GgoSummaryRollup.ggo_count > 0)
+
+    def __iter__(self):
+        return iter(self.q)
+
+    def __getattr__(self, name):
+        return getattr(self.q, name)
+
+    @staticmethod
+    def supports_filters(filters):
+        """
+        Returns whether or not the provided filters can be applied
+        to the rollup table.
+
+        :param GgoFilters filters:
+        :rtype: bool
+        """
+        return not (filters.address
+                    or filters.issue_gsrn
+                    or filters.retire_gsrn
+                    or filters.retire_address)
+
+    def apply_filters(self, filters):
+        """
+        :param GgoFilters filters:
+        :rtype: GgoSummaryRollupQuery
+        """
+        assert self.supports_filters(filters)
+
+        q = self.q
+
+        if filters.begin:
+            q = q.filter(GgoSummaryRollup.begin == filters.begin.astimezone(timezone.utc))
+        elif filters.begin_range:
+            q = q.filter(GgoSummaryRollup.begin >= filters.begin_range.begin.astimezone(timezone.utc))
+            q = q.filter(GgoSummaryRollup.begin <= filters.begin_range.end.astimezone(timezone.utc))
+        if filters.sector:
+            q = q.filter(GgoSummaryRollup.sector.in_(filters.sector))
+        if filters.technology_code:
+            q = q.filter(GgoSummaryRollup.technology_code.in_(filters.technology_code))
+        if filters.fuel_code:
+            q = q.filter(GgoSummaryRollup.fuel_code.in_(filters.fuel_code))
+
+        if filters.category == GgoCategory.ISSUED:
+            q = q.filter(GgoSummaryRollup.issued.is_(True))
+        elif filters.category == GgoCategory.STORED:
+            q = q.filter(GgoSummaryRollup.stored.is_(True))
+            q = q.filter(GgoSummaryRollup.expire_time > sa.func.now())
+        elif filters.category == GgoCategory.RETIRED:
+            q = q.filter(GgoSummaryRollup.retired.is_(True))
+        elif filters.category == GgoCategory.EXPIRED:
+            q = q.filter(GgoSummaryRollup.stored.is_(True))
+            q = q.filter(GgoSummaryRollup.expire_time <= sa.func.now())
+
+        return self.__class__(self.session, q)
+
+    def belongs_to(self, user):
+        """
+        Only include GGOs which belong to the provided user.
+
+        :param User user:
+        :rtype: GgoSummaryRollupQuery
+        """
+        return self.__class__(self.session, self.q.filter(
+            GgoSummaryRollup.user_id == user.id,
+        ))
+
+
+# Results of GgoSummary queries, shared by all summaries in this process
+summary_cache = TTLCache(max_bytes=GGO_SUMMARY_CACHE_MAX_BYTES, name='ggo_summary')
+
+
 class GgoSummary(object):
     """
     Implements a summary/aggregation of GGOs.
@@ -441,6 +699,10 @@ class GgoSummary(object):
 
     The parameter "resolution" defined the returned data resolution.
     Call .fill() before accessing .labels or .groups to fill gaps in data.
+
+    If a GgoSummaryRollupQuery is provided (with the same filters applied
+    as the GgoQuery) the data is aggregated from the rollup table instead
+    of the GGOs themselves.
     """
 
     GROUPINGS = (
@@ -451,11 +713,13 @@ class GgoSummary(object):
         'fuelCode',
     )
 
+    # Results are grouped by date_trunc() in the database, and the
+    # distinct buckets formatted as labels using RESOLUTIONS_PYTHON
     RESOLUTIONS_POSTGRES = {
-        SummaryResolution.HOUR: 'YYYY-MM-DD HH24:00',
-        SummaryResolution.DAY: 'YYYY-MM-DD',
-        SummaryResolution.MONTH: 'YYYY-MM',
-        SummaryResolution.YEAR: 'YYYY',
+        SummaryResolution.HOUR: 'hour',
+        SummaryResolution.DAY: 'day',
+        SummaryResolution.MONTH: 'month',
+        SummaryResolution.YEAR: 'year',
     }
 
     RESOLUTIONS_PYTHON = {
@@ -473,22 +737,32 @@ class GgoSummary(object):
         SummaryResolution.ALL: None,
     }
 
+    # Resolutions with a fixed step length, for which labels are
+    # generated as NumPy arrays, mapped to their NumPy datetime unit
+    LABEL_UNITS_NUMPY = {
+        SummaryResolution.HOUR: 'h',
+        SummaryResolution.DAY: 'D',
+    }
+
     ALL_TIME_LABEL = 'All-time'
 
-    def __init__(self, session, query, resolution, grouping, utc_offset=0):
+    def __init__(self, session, query, resolution, grouping, utc_offset=0, rollup=None):
         """
         :param sa.orm.Session session:
         :param GgoQuery query:
         :param SummaryResolution resolution:
         :param list[str] grouping:
         :param int utc_offset:
+        :param GgoSummaryRollupQuery rollup:
         """
         self.session = session
         self.query = query
+        self.rollup = rollup
         self.resolution = resolution
         self.grouping = grouping
         self.utc_offset = utc_offset
         self.fill_range = None
+        self._raw_results = None
 
     def fill(self, fill_range):
         """
@@ -505,6 +779,8 @@ class GgoSummary(object):
             return [self.ALL_TIME_LABEL]
         if self.fill_range is None:
             return sorted(set(label for label, *g, amount in self.raw_results))
+        elif self.resolution in self.LABEL_UNITS_NUMPY:
+            return self.get_fixed_step_labels()
         else:
             format = self.RESOLUTIONS_PYTHON[self.resolution]
             step = self.LABEL_STEP[self.resolution]
@@ -522,28 +798,117 @@ class GgoSummary(object):
         """
         :rtype list[SummaryGroup]:
         """
+        labels = self.labels
+        label_index = {label: i for i, label in enumerate(labels)}
+
         groups = []
+        rows = []
+
+        for group, results in groupby(self.raw_results, itemgetter(slice(1, -1))):
+            groups.append(group)
+            rows.append(list(results))
+
+        # Scatter amounts into a (groups x labels) matrix, where
+        # labels without results are None
+        values = np.full((len(groups), len(labels)), None, dtype=object)
 
-        for group, results in groupby(self.raw_results, lambda x: x[1:-1]):
-            items = {label: amount for label, *g, amount in results}
-            groups.append(SummaryGroup(
-                group=group,
-                values=[items.get(label, None) for label in self.labels],
-            ))
+        for i, group_rows in enumerate(rows):
+            indexes = np.fromiter(
+                map(label_index.get, map(itemgetter(0), group_rows), repeat(-1)),
+                dtype=np.intp,
+                count=len(group_rows),
+            )
+            amounts = np.fromiter(
+                map(itemgetter(-1), group_rows),
+                dtype=object,
+                count=len(group_rows),
+            )
+            found = indexes >= 0
+            values[i, indexes[found]] = amounts[found]
+
+        return [
+            SummaryGroup(group=group, values=row)
+            for group, row in zip(groups, values.tolist())
+        ]
+
+    def get_fixed_step_labels(self):
+        """
+        Returns the labels of fill_range for resolutions with a fixed
+        step length (hours and days), formatted like RESOLUTIONS_PYTHON.
+
+        :rtype: list[str]
+        """
+        unit = self.LABEL_UNITS_NUMPY[self.resolution]
 
-        return groups
+        # Labels are formatted in the local time of fill_range
+        begin = np.datetime64(self.fill_range.begin.replace(tzinfo=None), 'us')
+        end = np.datetime64(self.fill_range.end.replace(tzinfo=None), 'us')
+
+        begins = np.arange(begin, end + np.timedelta64(1, 'us'), np.timedelta64(1, unit))
+        labels = np.datetime_as_string(begins, unit=unit)
+
+        if self.resolution == SummaryResolution.HOUR:
+            # 'YYYY-MM-DDTHH' to 'YYYY-MM-DD HH:00'
+            labels = np.char.add(np.char.replace(labels, 'T', ' '), ':00')
+
+        return labels.tolist()
 
     @property
-    @lru_cache()
     def raw_results(self):
         """
-        TODO
+        Returns the aggregated rows as tuples of
+        (label, *grouping, amount), ordered by grouping.
+
+        Results are memoized on the instance, and shared between
+        instances (with identical SQL and parameters) through
+        summary_cache for GGO_SUMMARY_CACHE_TTL seconds.
+
+        :rtype: list[tuple]
+        """
+        if self._raw_results is None:
+            query = self.build_query()
+            key = get_query_cache_key(query)
+            results = summary_cache.get(key)
+
+            if results is None:
+                results = self.format_labels(query.all())
+                summary_cache.set(key, results, GGO_SUMMARY_CACHE_TTL)
+
+            self._raw_results = results
+
+        return self._raw_results
+
+    def format_labels(self, rows):
+        """
+        Replaces the bucket (first column) of each row with its label.
+        Each distinct bucket is only formatted once.
+
+        :param list[tuple] rows:
+        :rtype: list[tuple]
+        """
+        if self.resolution == SummaryResolution.ALL:
+            return [tuple(row) for row in rows]
+
+        format = self.RESOLUTIONS_PYTHON[self.resolution]
+        labels = {
+            bucket: bucket.strftime(format)
+            for bucket in set(map(itemgetter(0), rows))
+        }
+
+        return [(labels[row[0]], *row[1:]) for row in rows]
+
+    def build_query(self):
+        """
+        :rtype: sa.orm.Query
         """
         select = []
         groups = []
         orders = []
 
-        s = self.query.subquery()
+        if self.rollup is not None:
+            s = self.rollup.subquery()
+        else:
+            s = self.query.subquery()
 
         q = self.session.query(
                 s,
@@ -565,7 +930,7 @@ class GgoSummary(object):
             select.append(bindparam('label', self.ALL_TIME_LABEL))
         else:
 
-            select.append(func.to_char(begin, self.RESOLUTIONS_POSTGRES[self.resolution]).label('resolution'))
+            select.append(func.date_trunc(self.RESOLUTIONS_POSTGRES[self.resolution], begin).label('resolution'))
             groups.append('resolution')
 
         # -- Grouping ------------------------------------------------------------
@@ -596,10 +961,9 @@ class GgoSummary(object):
 
         # -- Query ---------------------------------------------------------------
 
-        select.append(func.sum(q.c.amount))
+        select.append(sa.cast(func.sum(q.c.amount), sa.BigInteger()))
 
         return self.session \
             .query(*select) \
             .group_by(*groups) \
-            .order_by(*orders) \
-            .all()
+            .order_by(*orders)
@@ -0,0 +1,222 @@
+"""
+Incremental maintenance of the GgoSummaryRollup table.
+
+Every time a session is flushed, the GGOs inserted, updated or deleted
+are translated into deltas (amount and count) per rollup key, which are
+then added to the rollup table using a single upsert. This covers every
+path that changes GGOs through the ORM (importing, composing, and
+committing or rolling back batches).
+
+Code that writes GGOs without the ORM (ie. bulk inserts) must invoke
+apply_rollup_deltas() itself.
+
+The GgoStoredRollup table (stored amount per user and hour) is derived
+from the same deltas, and is maintained by apply_rollup_deltas() too.
+"""
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+
+from .models import Ggo, GgoSummaryRollup, GgoStoredRollup
+
+
+# Columns of the rollup table which makes up a unique row
+ROLLUP_KEY = (
+    'user_id',
+    'begin',
+    'expire_time',
+    'issued',
+    'stored',
+    'retired',
+    'sector',
+    'technology_code',
+    'fuel_code',
+)
+
+# Columns of the stored rollup table which makes up a unique row
+STORED_ROLLUP_KEY = (
+    'user_id',
+    'begin',
+)
+
+# Ggo attributes which affect the rollup
+TRACKED_ATTRIBUTES = (
+    'user_id',
+    'begin',
+    'expire_time',
+    'amount',
+    'sector',
+    'technology_code',
+    'fuel_code',
+    'issued',
+    'stored',
+    'retired',
+    'issue_gsrn',
+    'retire_gsrn',
+    'retire_address',
+)
+
+
+def get_rollup_key(values):
+    """
+    Returns the rollup key for a GGO, provided its attribute values.
+
+    :param collections.abc.Mapping values:
+    :rtype: tuple
+    """
+    return (
+        values['user_id'],
+        values['begin'].replace(minute=0, second=0, microsecond=0),
+        values['expire_time'],
+        bool(values['issued'] and values['issue_gsrn'] is not None),
+        bool(values['stored']),
+        bool(values['retired']
+             and values['retire_gsrn'] is not None
+             and values['retire_address'] is not None),
+        values['sector'],
+        values['technology_code'],
+        values['fuel_code'],
+    )
+
+
+def add_rollup_delta(deltas, values, sign):
+    """
+    Adds (sign=1) or subtracts (sign=-1) a GGO to/from a dict of deltas
+    mapped by rollup key.
+
+    :param dict[tuple, (int, int)] deltas:
+    :param collections.abc.Mapping values:
+    :param int sign:
+    """
+    key = get_rollup_key(values)
+    amount, count = deltas.get(key, (0, 0))
+    deltas[key] = (amount + sign * values['amount'], count + sign)
+
+
+def get_stored_deltas(deltas):
+    """
+    Returns the deltas of stored GGOs mapped by (user_id, begin),
+    provided a dict of deltas mapped by rollup key.
+
+    :param dict[tuple, (int, int)] deltas:
+    :rtype: dict[tuple, (int, int)]
+    """
+    stored_deltas = {}
+
+    for key, (amount, count) in deltas.items():
+        values = dict(zip(ROLLUP_KEY, key))
+        if values['stored']:
+            stored_key = (values['user_id'], values['begin'])
+            stored_amount, stored_count = stored_deltas.get(stored_key, (0, 0))
+            stored_deltas[stored_key] = (stored_amount + amount, stored_count + count)
+
+    return stored_deltas
+
+
+def apply_rollup_deltas(session, deltas):
+    """
+    Adds a dict of deltas, mapped by rollup key, to the rollup tables.
+
+    :param sqlalchemy.orm.Session session:
+    :param dict[tuple, (int, int)] deltas:
+    """
+    upsert_deltas(session, GgoSummaryRollup.__table__, ROLLUP_KEY, deltas)
+    upsert_deltas(session, GgoStoredRollup.__table__, STORED_ROLLUP_KEY, get_stored_deltas(deltas))
+
+
+def upsert_deltas(session, table, key_columns, deltas):
+    """
+    Adds a dict of deltas, mapped by key, to a rollup table.
+
+    :param sqlalchemy.orm.Session session:
+    :param sa.Table table:
+    :param tuple[str] key_columns:
+    :param dict[tuple, (int, int)] deltas:
+    """
+    rows = [
+        dict(zip(key_columns, key), amount=amount, ggo_count=count)
+        for key, (amount, count) in deltas.items()
+        if (amount, count) != (0, 0)
+    ]
+
+    if not rows:
+        return
+
+    # Upsert rows in a deterministic order to avoid deadlocks
+    # between concurrent transactions
+    rows.sort(key=lambda row: str([row[k] for k in key_columns]))
+
+    stmt = insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={
+            'amount': table.c.amount + stmt.excluded.amount,
+            'ggo_count': table.c.ggo_count + stmt.excluded.ggo_count,
+        },
+    )
+
+    session.execute(stmt)
+
+
+def get_current_values(ggo):
+    """
+    :param Ggo ggo:
+    :rtype: dict[str, obj]
+    """
+    return {attr: getattr(ggo, attr) for attr in TRACKED_ATTRIBUTES}
+
+
+def get_committed_values(ggo):
+    """
+    Returns the values of a GGO as they were before the current flush.
+
+    :param Ggo ggo:
+    :rtype: dict[str, obj]
+    """
+    state = sa.inspect(ggo)
+    values = {}
+
+    for attr in TRACKED_ATTRIBUTES:
+        history = state.attrs[attr].history
+        if history.deleted:
+            values[attr] = history.deleted[0]
+        else:
+            values[attr] = getattr(ggo, attr)
+
+    return values
+
+
+def __load_previous_value(target, value, oldvalue, initiator):
+    pass
+
+
+# Make sure the previous value of tracked attributes is loaded
+# before they are changed, so it is present in the attribute history
+for __attr in TRACKED_ATTRIBUTES:
+    sa.event.listen(
+        getattr(Ggo, __attr), 'set', __load_previous_value,
+        active_history=True)
+
+
+@sa.event.listens_for(Session, 'after_flush')
+def update_ggo_summary_rollup(session, flush_context):
+    """
+    :param sqlalchemy.orm.Session session:
+    :param flush_context:
+    """
+    deltas = {}
+
+    for obj in session.new:
+        if isinstance(obj, Ggo):
+            add_rollup_delta(deltas, get_current_values(obj), 1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Ggo) and session.is_modified(obj):
+            add_rollup_delta(deltas, get_committed_values(obj), -1)
+            add_rollup_delta(deltas, get_current_values(obj), 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Ggo):
+            add_rollup_delta(deltas, get_committed_values(obj), -1)
+
+    apply_rollup_deltas(session, deltas)
@@ -3,6 +3,8 @@ from flask import request, redirect, Response
 from marshmallow import ValidationError
 from werkzeug.exceptions import HTTPException, BadRequest, Unauthorized
 
+from .schemas import get_schema_instance, get_dumper
+
 
 class Controller(object):
     """
@@ -17,6 +19,10 @@ class Controller(object):
     # Response Schema
     Response = None
 
+    # Serialize responses using a precompiled dump function
+    # instead of Schema.dump() (the output is the same)
+    FAST_SERIALIZE = False
+
     def handle_request(self, **kwargs):
         """
         Abstract function to handle the HTTP request. Overwritten by subclassing.
@@ -65,7 +71,7 @@ class Controller(object):
         :rtype: obj
         """
         if self.Request is not None:
-            schema = self.Request()
+            schema = get_schema_instance(self.Request)
 
             if self.METHOD == 'POST':
                 if not request.data:
@@ -102,7 +108,9 @@ class Controller(object):
             return json.dumps({'success': response})
         elif isinstance(response, dict):
             return json.dumps(response)
+        elif self.Response is not None and self.FAST_SERIALIZE:
+            return json.dumps(get_dumper(self.Response)(response))
         elif self.Response is not None:
-            return json.dumps(self.Response().dump(response))
+            return json.dumps(get_schema_instance(self.Response).dump(response))
         else:
             return response
@@ -1,5 +1,10 @@
+import hashlib
+from threading import Lock
+from collections import OrderedDict
 from bip32utils import BIP32Key
 
+from origin.settings import LEDGER_KEY_CACHE_SIZE
+
 
 def minutes_since_epoch(begin):
     """
@@ -9,6 +14,85 @@ def minutes_since_epoch(begin):
     return int(begin.replace(second=0, microsecond=0).timestamp())
 
 
+class KeyCache(object):
+    """
+    Bounded, in-process LRU cache of derived BIP32 keys.
+
+    Keys are mapped by (master key fingerprint, path), where the
+    fingerprint is a SHA256 digest of the master extended key, and path is
+    a tuple of child indexes from the master key. Every intermediate key
+    along a path is cached, so keys sharing a prefix (ie. all GGOs issued
+    to the same MeteringPoint) only derive the shared part once.
+    """
+    def __init__(self, max_size):
+        """
+        :param int max_size:
+        """
+        self.max_size = max_size
+        self.keys = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, fingerprint, path):
+        """
+        :param bytes fingerprint:
+        :param tuple[int] path:
+        :rtype: BIP32Key
+        """
+        with self.lock:
+            key = self.keys.get((fingerprint, path))
+            if key is not None:
+                self.keys.move_to_end((fingerprint, path))
+            return key
+
+    def set(self, fingerprint, path, key):
+        """
+        :param bytes fingerprint:
+        :param tuple[int] path:
+        :param BIP32Key key:
+        """
+        with self.lock:
+            self.keys[(fingerprint, path)] = key
+            self.keys.move_to_end((fingerprint, path))
+            while len(self.keys) > self.max_size:
+                self.keys.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.keys.clear()
+
+    def derive(self, master_extended_key, path):
+        """
+        Returns the key at the provided path below the master key,
+        deriving (and caching) only the part of the path which
+        is not already cached.
+
+        :param str master_extended_key:
+        :param tuple[int] path:
+        :rtype: BIP32Key
+        """
+        fingerprint = hashlib.sha256(master_extended_key.encode()).digest()
+
+        # Find the longest cached prefix of the path
+        for i in range(len(path), -1, -1):
+            key = self.get(fingerprint, path[:i])
+            if key is not None:
+                break
+        else:
+            i = 0
+            key = BIP32Key.fromExtendedKey(master_extended_key)
+            self.set(fingerprint, (), key)
+
+        # Derive the remaining part of the path
+        for j in range(i, len(path)):
+            key = key.ChildKey(path[j])
+            self.set(fingerprint, path[:j + 1], key)
+
+        return key
+
+
+key_cache = KeyCache(LEDGER_KEY_CACHE_SIZE)
+
+
 class KeyGenerator(object):
     """
     Generates ledger keys for various object types.
@@ -21,7 +105,7 @@ class KeyGenerator(object):
         :param origin.auth.User user:
         :rtype: BIP32Key
         """
-        return BIP32Key.fromExtendedKey(user.master_extended_key)
+        return key_cache.derive(user.master_extended_key, ())
 
     @staticmethod
     def set_key_for_user(user, key):
@@ -46,10 +130,9 @@ class KeyGenerator(object):
         :param origin.auth.MeteringPoint meteringpoint:
         :rtype: BIP32Key
         """
-        return KeyGenerator \
-            .get_key_for_user(meteringpoint.user) \
-            .ChildKey(1) \
-            .ChildKey(meteringpoint.key_index)
+        return key_cache.derive(
+            meteringpoint.user.master_extended_key,
+            (1, meteringpoint.key_index))
 
     @staticmethod
     def get_key_for_measurement(meteringpoint, begin):
@@ -58,9 +141,9 @@ class KeyGenerator(object):
         :param datetime.datetime begin:
         :rtype: BIP32Key
         """
-        return KeyGenerator \
-            .get_key_for_metering_point(meteringpoint) \
-            .ChildKey(minutes_since_epoch(begin))
+        return key_cache.derive(
+            meteringpoint.user.master_extended_key,
+            (1, meteringpoint.key_index, minutes_since_epoch(begin)))
 
     @staticmethod
     def get_key_for_traded_ggo_at_index(user, index):
@@ -69,10 +152,7 @@ class KeyGenerator(object):
         :param int index:
         :rtype: BIP32Key
         """
-        return KeyGenerator \
-            .get_key_for_user(user) \
-            .ChildKey(0) \
-            .ChildKey(index)
+        return key_cache.derive(user.master_extended_key, (0, index))
 
     @staticmethod
     def get_key_for_traded_ggo(ggo):
@@ -95,6 +175,16 @@ class KeyGenerator(object):
         assert ggo.issued is True
         assert ggo.issue_meteringpoint is not None
 
-        return KeyGenerator \
-            .get_key_for_metering_point(ggo.issue_meteringpoint) \
-            .ChildKey(minutes_since_epoch(ggo.begin))
+        return KeyGenerator.get_key_for_measurement(
+            ggo.issue_meteringpoint, ggo.begin)
+
+    @staticmethod
+    def get_key_for_ggo(ggo):
+        """
+        :param origin.ggo.Ggo ggo:
+        :rtype: BIP32Key
+        """
+        if ggo.issued:
+            return KeyGenerator.get_key_for_issued_ggo(ggo)
+        else:
+            return KeyGenerator.get_key_for_traded_ggo(ggo)
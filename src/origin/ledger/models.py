@@ -1,11 +1,13 @@
 import sqlalchemy as sa
 import origin_ledger_sdk as ols
 from sqlalchemy import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, Session as SessionBase
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declared_attr
 from enum import Enum
 
 from origin.db import ModelBase, Session
+from origin.cache import RETIRED_GGOS, bump_versions_on_commit
 
 from .keys import KeyGenerator
 
@@ -38,6 +40,9 @@ class Batch(ModelBase):
         - Invoke on_begin() immediately after creating the batch, before
           inserting it into the database
 
+        - Optionally invoke on_queued() to queue the batch for submission
+          to the ledger together with other batches (coalesced)
+
         - Invoke on_submitted() once the batch has been submitted to the ledger
 
         - Invoke on_commit() once/if the batch has been completed on the ledger
@@ -54,6 +59,10 @@ class Batch(ModelBase):
     # Time when batch was LAST submitted to ledger (if at all)
     submitted = sa.Column(sa.DateTime(timezone=True), nullable=True)
 
+    # Time when batch was queued for coalesced submission to the ledger
+    # (if at all)
+    queued = sa.Column(sa.DateTime(timezone=True), nullable=True)
+
     # Relationships
     user_id = sa.Column(sa.Integer(), sa.ForeignKey('auth_user.id'), index=True, nullable=False)
     user = relationship('User', foreign_keys=[user_id])
@@ -65,6 +74,15 @@ class Batch(ModelBase):
     # How many times the ledger has been polled, asking for batch status
     poll_count = sa.Column(sa.Integer(), nullable=False, default=0)
 
+    # Celery signatures (as dicts) to invoke once the batch has been
+    # committed or rolled back on the ledger
+    on_commit_callback = sa.Column(JSONB(), nullable=True)
+    on_rollback_callback = sa.Column(JSONB(), nullable=True)
+
+    __table_args__ = (
+        sa.Index('ix_ledger_batch_state_submitted', state, submitted),
+    )
+
     def add_transaction(self, transaction):
         """
         :param Transaction transaction:
@@ -85,6 +103,21 @@ class Batch(ModelBase):
         for transaction in self.transactions:
             transaction.on_begin()
 
+    def on_queued(self):
+        assert self.state is BatchState.PENDING
+
+        self.queued = func.now()
+
+    def on_reset(self):
+        """
+        Resets a submitted batch, which was declined on the ledger
+        together with other (coalesced) batches, so it can be
+        submitted again on its own.
+        """
+        self.state = BatchState.PENDING
+        self.handle = None
+        self.queued = None
+
     def on_submitted(self, handle):
         """
         :param str handle:
@@ -152,11 +185,11 @@ class Transaction(ModelBase):
 
     @declared_attr
     def parent_ggo_id(cls):
-        return sa.Column(sa.Integer(), sa.ForeignKey('ggo_ggo.id'), index=True, nullable=False)
+        return sa.Column(sa.Integer(), index=True, nullable=False)
 
     @declared_attr
     def parent_ggo(cls):
-        return relationship('Ggo', foreign_keys=[cls.parent_ggo_id])
+        return relationship('Ggo', primaryjoin='foreign(Transaction.parent_ggo_id) == Ggo.id')
 
     def on_begin(self):
         raise NotImplementedError
@@ -271,8 +304,8 @@ class SplitTarget(ModelBase):
     transaction_id = sa.Column(sa.Integer(), sa.ForeignKey('ledger_transaction.id'), index=True)
     transaction = relationship('SplitTransaction', foreign_keys=[transaction_id])
 
-    ggo_id = sa.Column(sa.Integer(), sa.ForeignKey('ggo_ggo.id'), index=True)
-    ggo = relationship('Ggo', foreign_keys=[ggo_id])
+    ggo_id = sa.Column(sa.Integer(), index=True)
+    ggo = relationship('Ggo', primaryjoin='foreign(SplitTarget.ggo_id) == Ggo.id')
 
     # Client reference, like Agreement ID etc.
     reference = sa.Column(sa.String(), index=True)
@@ -333,8 +366,10 @@ class RetireTransaction(Transaction):
         self.parent_ggo.retired = True
         self.parent_ggo.locked = False
         self.parent_ggo.synchronized = True
+        self.invalidate_retired_ggos()
 
     def on_rollback(self):
+        self.invalidate_retired_ggos()
         self.parent_ggo.stored = True  # TODO test this
         self.parent_ggo.retired = False
         self.parent_ggo.locked = False
@@ -342,6 +377,18 @@ class RetireTransaction(Transaction):
         self.parent_ggo.retire_gsrn = None  # TODO test this
         self.parent_ggo.retire_address = None  # TODO test this
 
+    def invalidate_retired_ggos(self):
+        """
+        Invalidates cached values which depend on the GGOs retired to
+        the meteringpoint (ie. eco declarations) once the current
+        database transaction commits.
+        """
+        session = Session.object_session(self)
+
+        if session is not None and self.meteringpoint is not None:
+            bump_versions_on_commit(
+                session, RETIRED_GGOS, [self.meteringpoint.gsrn])
+
     def build_ledger_request(self):
         """
         :rtype: ols.RetireGGORequest
@@ -352,14 +399,26 @@ class RetireTransaction(Transaction):
         settlement_address = ols.generate_address(
             ols.AddressPrefix.SETTLEMENT, measurement_key.PublicKey())
 
+        parent_key = self.parent_ggo.key
+
         return ols.RetireGGORequest(
             settlement_address=settlement_address,
             measurement_address=self.measurement_address,
             measurement_private_key=measurement_key.PrivateKey(),
             parts=[
                 ols.RetireGGOPart(
-                    address=ols.generate_address(ols.AddressPrefix.GGO, self.parent_ggo.key.PublicKey()),
-                    private_key=self.parent_ggo.key.PrivateKey(),
+                    address=ols.generate_address(ols.AddressPrefix.GGO, parent_key.PublicKey()),
+                    private_key=parent_key.PrivateKey(),
                 )
             ],
         )
+
+
+@sa.event.listens_for(SessionBase, 'after_flush')
+def __invalidate_retired_ggos_after_flush(session, flush_context):
+    # RetireTransactions begin (on_begin) before they are added to the
+    # session, ie. when retiring the targets of a split, so the retired
+    # GGOs are invalidated once they are inserted instead
+    for obj in session.new:
+        if isinstance(obj, RetireTransaction):
+            obj.invalidate_retired_ggos()
@@ -1,8 +1,18 @@
+from celery.signals import task_postrun
+
 from origin.tasks import celery_app as celery
+from origin.stats import stats_logger
 
 from .schedule import *
 from .import_technologies import *
+from .create_ggo_partitions import *
+from .archive_ggos import *
 from .import_meteringpoints import *
 from .handle_composed_ggo import *
 from .refresh_access_token import *
 from .webhooks import *
+
+
+@task_postrun.connect
+def __log_stats(**kwargs):
+    stats_logger.log_if_due()
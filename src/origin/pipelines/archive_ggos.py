@@ -0,0 +1,62 @@
+"""
+Asynchronous tasks for moving GGOs in their final state to the
+archive tables (see origin.ggo.archive).
+
+One entrypoint exists:
+
+    start_archive_ggos()
+
+"""
+from celery import shared_task
+
+from origin import logger
+from origin.db import atomic
+from origin.ggo.archive import archive_ggos, get_archive_horizon
+from origin.settings import GGO_ARCHIVE_AFTER_DAYS, GGO_ARCHIVE_CHUNK_SIZE
+
+
+def start_archive_ggos():
+    archive_ggo_chunk \
+        .s() \
+        .apply_async()
+
+
+@shared_task(
+    name='archive_ggos.archive_ggo_chunk',
+    autoretry_for=(Exception,),
+    retry_backoff=2,
+    max_retries=5,
+)
+@logger.wrap_task(
+    title='Archiving a chunk of GGOs',
+    pipeline='archive_ggos',
+    task='archive_ggo_chunk',
+)
+def archive_ggo_chunk():
+    """
+    Archives a chunk of GGOs in a single database transaction.
+    Starts a new task for the next chunk if the chunk was full.
+    """
+    count = archive_ggos_in_db()
+
+    logger.info(f'Archived {count} GGOs', extra={
+        'pipeline': 'archive_ggos',
+        'task': 'archive_ggo_chunk',
+        'count': count,
+    })
+
+    if count >= GGO_ARCHIVE_CHUNK_SIZE:
+        start_archive_ggos()
+
+
+@atomic
+def archive_ggos_in_db(session):
+    """
+    :param sqlalchemy.orm.Session session:
+    :rtype: int
+    """
+    return archive_ggos(
+        session=session,
+        horizon=get_archive_horizon(GGO_ARCHIVE_AFTER_DAYS),
+        limit=GGO_ARCHIVE_CHUNK_SIZE,
+    )
@@ -0,0 +1,43 @@
+"""
+Asynchronous tasks for creating partitions of the GGO table ahead of time.
+
+One entrypoint exists:
+
+    start_create_ggo_partitions()
+
+"""
+from celery import shared_task
+
+from origin import logger
+from origin.db import atomic
+from origin.ggo.partitions import create_future_ggo_partitions
+
+
+def start_create_ggo_partitions():
+    create_ggo_partitions \
+        .s() \
+        .apply_async()
+
+
+@shared_task(
+    name='create_ggo_partitions.create_ggo_partitions',
+    autoretry_for=(Exception,),
+    retry_backoff=2,
+    max_retries=5,
+)
+@logger.wrap_task(
+    title='Creating future partitions of the GGO table',
+    pipeline='create_ggo_partitions',
+    task='create_ggo_partitions',
+)
+@atomic
+def create_ggo_partitions(session):
+    """
+    :param sqlalchemy.orm.Session session:
+    """
+    partitions = create_future_ggo_partitions(session)
+
+    logger.info(f'GGO partitions available: {", ".join(partitions)}', extra={
+        'pipeline': 'create_ggo_partitions',
+        'task': 'create_ggo_partitions',
+    })
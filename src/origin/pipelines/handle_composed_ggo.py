@@ -36,4 +36,5 @@ def start_handle_composed_ggo_pipeline(batch, recipients, session):
         subject=batch.user.sub,
         batch=batch,
         success=group(*on_success_tasks) if on_success_tasks else None,
+        coalesce=True,
     )
@@ -39,13 +39,30 @@ def resubmit_batches(session):
     """
     :param sqlalchemy.orm.Session session:
     """
+    for batch in get_batches_to_resubmit(session):
+        start_submit_batch_pipeline(
+            subject=batch.user.sub,
+            batch=batch,
+        )
+
+
+def get_batches_to_resubmit(session):
+    """
+    Returns Batches which have been PENDING or SUBMITTED for too long.
+    Queued Batches are left to submit_queued_batches(), and Batches
+    locked by others (ie. being submitted or completed) are skipped.
+
+    :param sqlalchemy.orm.Session session:
+    :rtype: sqlalchemy.orm.Query
+    """
 
     # TODO move to / create a BatchQuery class
-    batches = session.query(Batch) \
+    return session.query(Batch) \
         .filter(
             sa.or_(
                 sa.and_(
                     Batch.state == BatchState.PENDING,
+                    Batch.queued.is_(None),
                     Batch.created <= sa.text(
                         "NOW() - INTERVAL '%d HOURS'" % BATCH_RESUBMIT_AFTER_HOURS),
                 ),
@@ -55,10 +72,5 @@ def resubmit_batches(session):
                         "NOW() - INTERVAL '%d HOURS'" % BATCH_RESUBMIT_AFTER_HOURS),
                 ),
             ),
-        )
-
-    for batch in batches:
-        start_submit_batch_pipeline(
-            subject=batch.user.sub,
-            batch=batch,
-        )
+        ) \
+        .with_for_update(of=Batch, skip_locked=True)
@@ -1,10 +1,14 @@
 from celery.schedules import crontab
 
 from origin.tasks import celery_app
+from origin.settings import LEDGER_POLL_INTERVAL, LEDGER_COALESCE_WINDOW
 
 from .resubmit_batches import resubmit_batches
+from .submit_batch_to_ledger import poll_submitted_batches, submit_queued_batches
 from .refresh_access_token import get_soon_to_expire_tokens
 from .import_technologies import import_technologies_and_insert_to_db
+from .create_ggo_partitions import create_ggo_partitions
+from .archive_ggos import archive_ggo_chunk
 
 
 # The "wrapper" tasks exists because adding a shared_task()
@@ -15,6 +19,17 @@ def __resubmit_batches():
     resubmit_batches.s().apply_async()
 
 
+@celery_app.task()
+def __poll_submitted_batches():
+    # Expires so polls don't pile up if workers fall behind
+    poll_submitted_batches.s().apply_async(expires=LEDGER_POLL_INTERVAL)
+
+
+@celery_app.task()
+def __submit_queued_batches():
+    submit_queued_batches.s().apply_async(expires=LEDGER_COALESCE_WINDOW)
+
+
 @celery_app.task()
 def __get_soon_to_expire_tokens():
     get_soon_to_expire_tokens.s().apply_async()
@@ -25,6 +40,16 @@ def __import_technologies_and_insert_to_db():
     import_technologies_and_insert_to_db.s().apply_async()
 
 
+@celery_app.task()
+def __create_ggo_partitions():
+    create_ggo_partitions.s().apply_async()
+
+
+@celery_app.task()
+def __archive_ggos():
+    archive_ggo_chunk.s().apply_async()
+
+
 # -- Schedule ----------------------------------------------------------------
 
 
@@ -41,6 +66,20 @@ def setup_periodic_tasks(sender, **kwargs):
         __resubmit_batches.s(),
     )
 
+    # POLL LEDGER FOR STATUS OF SUBMITTED BATCHES
+    # Executes every LEDGER_POLL_INTERVAL seconds
+    sender.add_periodic_task(
+        LEDGER_POLL_INTERVAL,
+        __poll_submitted_batches.s(),
+    )
+
+    # SUBMIT QUEUED (COALESCED) BATCHES TO THE LEDGER
+    # Executes every LEDGER_COALESCE_WINDOW seconds
+    sender.add_periodic_task(
+        LEDGER_COALESCE_WINDOW,
+        __submit_queued_batches.s(),
+    )
+
     # REFRESH ACCESS TOKENS
     # Refresh tokens every 30 minutes
     sender.add_periodic_task(
@@ -54,3 +93,17 @@ def setup_periodic_tasks(sender, **kwargs):
         crontab(hour=1, minute=0),
         __import_technologies_and_insert_to_db.s(),
     )
+
+    # CREATE PARTITIONS OF THE GGO TABLE
+    # Executes every night at 02:00
+    sender.add_periodic_task(
+        crontab(hour=2, minute=0),
+        __create_ggo_partitions.s(),
+    )
+
+    # ARCHIVE SPENT AND EXPIRED GGOS
+    # Executes every night at 03:00
+    sender.add_periodic_task(
+        crontab(hour=3, minute=0),
+        __archive_ggos.s(),
+    )
@@ -1,14 +1,34 @@
 """
 Asynchronous tasks for submitting a Batch to the ledger.
+
+Batches are either submitted to the ledger one at a time, or queued and
+submitted together with other Batches belonging to the same user by the
+periodic task submit_queued_batches() (coalesced). Their status on the
+ledger is polled for by a single periodic task, poll_submitted_batches(),
+which commits or rolls back completed Batches in groups.
+
+If coalesced Batches are declined on the ledger, they are submitted
+again one at a time, so only the Batches which are actually invalid
+are rolled back.
 """
 import origin_ledger_sdk as ols
-from sqlalchemy import orm
-from celery import chain, shared_task
+from sqlalchemy import orm, func
+from celery import chain, group, signature, shared_task
+from concurrent.futures import ThreadPoolExecutor
 
 from origin import logger
-from origin.ledger import Batch
+from origin.ledger import Batch, BatchState, Transaction
 from origin.db import atomic, inject_session
-from origin.settings import LEDGER_URL, DEBUG, BATCH_RESUBMIT_AFTER_HOURS
+from origin.settings import (
+    LEDGER_URL,
+    DEBUG,
+    BATCH_RESUBMIT_AFTER_HOURS,
+    LEDGER_POLL_LIMIT,
+    LEDGER_POLL_CONCURRENCY,
+    LEDGER_POLL_DISPATCH_SIZE,
+    LEDGER_COALESCE_ENABLED,
+    LEDGER_COALESCE_MAX_REQUESTS,
+)
 
 
 # Settings
@@ -23,38 +43,315 @@ POLL_MAX_RETRIES = (BATCH_RESUBMIT_AFTER_HOURS * 60 * 60) / POLL_RETRY_DELAY
 ledger = ols.Ledger(LEDGER_URL, verify=not DEBUG)
 
 
-class InvalidBatch(Exception):
-    pass
+def start_submit_batch_pipeline(subject, batch, success=None, error=None,
+                                coalesce=False):
+    """
+    Submits the Batch to the ledger. The success and error callbacks are
+    saved on the Batch, and invoked by poll_submitted_batches() once the
+    Batch has been committed or declined on the ledger. The error callback
+    is also invoked if the Batch fails to be submitted.
 
+    If coalesce is True (and LEDGER_COALESCE_ENABLED), the Batch is queued
+    and submitted together with other queued Batches.
 
-def start_submit_batch_pipeline(subject, batch, success=None, error=None):
-    """
     :param str subject:
     :param Batch batch:
     :param celery.Task success: Success callback task
     :param celery.Task error: Error callback task
+    :param bool coalesce: Whether or not to queue the batch
+    :rtype: celery.result.AsyncResult
+    """
+    if coalesce and LEDGER_COALESCE_ENABLED:
+        return enqueue_batch \
+            .si(
+                subject=subject,
+                batch_id=batch.id,
+                on_commit=success,
+                on_rollback=error,
+            ) \
+            .apply_async()
+
+    return submit_batch(subject, batch.id, success, error)
+
+
+def submit_batch(subject, batch_id, success=None, error=None):
+    """
+    Submits a single Batch to the ledger (not coalesced).
+
+    :param str subject:
+    :param int batch_id:
+    :param celery.Task success: Success callback task
+    :param celery.Task error: Error callback task
     :rtype: celery.result.AsyncResult
     """
     pipeline = chain(
-        # submit_batch_to_ledger.si(subject=subject, batch_id=batch.id),
-        # batch_on_submitted.s(subject=subject, batch_id=batch.id),
-        # poll_batch_status.si(subject=subject, batch_id=batch.id),
-        batch_on_commit.si(subject=subject, batch_id=batch.id),
+        submit_batch_to_ledger.si(subject=subject, batch_id=batch_id),
+        batch_on_submitted.s(
+            subject=subject,
+            batch_id=batch_id,
+            on_commit=success,
+            on_rollback=error,
+        ),
     )
 
     error_pipeline = [
-        batch_on_rollback.si(subject=subject, batch_id=batch.id),
+        batch_on_rollback.si(subject=subject, batch_id=batch_id),
     ]
 
     if error:
         error_pipeline.append(error)
 
     return pipeline.apply_async(
-        link=success,
         link_error=chain(*error_pipeline),
     )
 
 
+# -- Coalescing --------------------------------------------------------------
+
+
+@shared_task(
+    bind=True,
+    name='submit_batch_to_ledger.enqueue_batch',
+    default_retry_delay=SUBMIT_RETRY_DELAY,
+    max_retries=SUBMIT_MAX_RETRIES,
+)
+@logger.wrap_task(
+    pipeline='submit_batch_to_ledger',
+    task='enqueue_batch',
+    title='Batch.on_queued()',
+)
+def enqueue_batch(task, subject, batch_id, on_commit=None, on_rollback=None):
+    """
+    Queues the Batch for coalesced submission to the ledger. Submits the
+    user's queued Batches right away if they amount to (at least)
+    LEDGER_COALESCE_MAX_REQUESTS ledger requests.
+
+    :param celery.Task task:
+    :param str subject:
+    :param int batch_id:
+    :param dict on_commit: Celery signature to invoke on commit
+    :param dict on_rollback: Celery signature to invoke on rollback
+    """
+    try:
+        user_id, queued_requests = queue_batch(batch_id, on_commit, on_rollback)
+    except orm.exc.NoResultFound:
+        raise
+    except Exception as e:
+        logger.exception('Failed to invoke on_queued() on Batch', extra={
+            'subject': subject,
+            'batch_id': str(batch_id),
+            'pipeline': 'submit_batch_to_ledger',
+            'task': 'enqueue_batch',
+        })
+        raise task.retry(exc=e)
+
+    if queued_requests >= LEDGER_COALESCE_MAX_REQUESTS:
+        submit_queued_batches.si(user_id=user_id).apply_async()
+
+
+@atomic
+def queue_batch(batch_id, on_commit, on_rollback, session):
+    """
+    Queues the Batch and returns the ID of its owner along with the
+    number of ledger requests (transactions) the owner has queued.
+
+    :param int batch_id:
+    :param dict on_commit:
+    :param dict on_rollback:
+    :param sqlalchemy.orm.Session session:
+    :rtype: (int, int)
+    """
+    batch = session \
+        .query(Batch) \
+        .filter(Batch.id == batch_id) \
+        .one()
+
+    batch.on_queued()
+    batch.on_commit_callback = on_commit
+    batch.on_rollback_callback = on_rollback
+
+    queued_requests = session \
+        .query(func.count(Transaction.id)) \
+        .join(Batch, Batch.id == Transaction.batch_id) \
+        .filter(Batch.user_id == batch.user_id) \
+        .filter(Batch.state == BatchState.PENDING) \
+        .filter(Batch.queued.isnot(None)) \
+        .scalar()
+
+    return batch.user_id, queued_requests
+
+
+@shared_task(
+    name='submit_batch_to_ledger.submit_queued_batches',
+)
+@logger.wrap_task(
+    pipeline='submit_batch_to_ledger',
+    task='submit_queued_batches',
+    title='Submit queued Batches to ledger',
+)
+def submit_queued_batches(user_id=None):
+    """
+    Submits queued Batches to the ledger, coalescing each user's Batches
+    into ledger batches of up to LEDGER_COALESCE_MAX_REQUESTS requests.
+    Queued Batches which fails to be submitted due to a temporary error
+    are left in the queue, and others are submitted one at a time.
+
+    Each group of Batches is submitted in its own database transaction,
+    so failing to submit one group does not affect the others.
+
+    :param int user_id: Only submit Batches belonging to this user
+    """
+    for batch_ids in get_queued_batch_groups(user_id):
+        try:
+            resubmit = coalesce_queued_batches(batch_ids)
+        except Exception:
+            logger.exception('Failed to submit queued batches, keeping them queued', extra={
+                'batch_ids': str(batch_ids),
+                'pipeline': 'submit_batch_to_ledger',
+                'task': 'submit_queued_batches',
+            })
+            continue
+
+        for subject, batch_id, error in resubmit:
+            submit_batch(
+                subject=subject,
+                batch_id=batch_id,
+                error=signature(error) if error else None,
+            )
+
+
+@inject_session
+def get_queued_batch_groups(user_id, session):
+    """
+    Returns the IDs of queued Batches, grouped as they should
+    be coalesced (see group_queued_batches()).
+
+    :param int user_id:
+    :param sqlalchemy.orm.Session session:
+    :rtype: list[list[int]]
+    """
+    query = session \
+        .query(Batch) \
+        .filter(Batch.state == BatchState.PENDING) \
+        .filter(Batch.queued.isnot(None))
+
+    if user_id is not None:
+        query = query.filter(Batch.user_id == user_id)
+
+    batches = query \
+        .order_by(Batch.user_id, Batch.queued, Batch.id) \
+        .options(orm.selectinload(Batch.transactions)) \
+        .all()
+
+    return [[batch.id for batch in group]
+            for group in group_queued_batches(batches)]
+
+
+@atomic
+def coalesce_queued_batches(batch_ids, session):
+    """
+    Submits a group of queued Batches to the ledger as one ledger batch.
+    Batches locked by others, or no longer queued, are skipped. Returns
+    (subject, batch_id, on_rollback_callback) for Batches which should
+    be submitted again one at a time.
+
+    :param list[int] batch_ids:
+    :param sqlalchemy.orm.Session session:
+    :rtype: list[(str, int, dict)]
+    """
+    batches = session \
+        .query(Batch) \
+        .filter(Batch.id.in_(batch_ids)) \
+        .filter(Batch.state == BatchState.PENDING) \
+        .filter(Batch.queued.isnot(None)) \
+        .order_by(Batch.queued, Batch.id) \
+        .options(orm.selectinload(Batch.transactions)) \
+        .with_for_update(of=Batch, skip_locked=True) \
+        .all()
+
+    if not batches or submit_coalesced_batches(batches):
+        return []
+
+    for batch in batches:
+        batch.queued = None
+
+    return [(b.user.sub, b.id, b.on_rollback_callback) for b in batches]
+
+
+def group_queued_batches(batches):
+    """
+    Groups Batches by their owner into groups of up to
+    LEDGER_COALESCE_MAX_REQUESTS ledger requests (transactions) each.
+    A Batch is never split across groups.
+
+    :param list[Batch] batches: Ordered by user
+    :rtype: collections.abc.Iterable[list[Batch]]
+    """
+    group = []
+    group_requests = 0
+
+    for batch in batches:
+        requests = len(batch.transactions)
+
+        if group and (batch.user_id != group[0].user_id or
+                      group_requests + requests > LEDGER_COALESCE_MAX_REQUESTS):
+            yield group
+            group = []
+            group_requests = 0
+
+        group.append(batch)
+        group_requests += requests
+
+    if group:
+        yield group
+
+
+def submit_coalesced_batches(batches):
+    """
+    Submits multiple Batches, belonging to the same user, to the
+    ledger as one ledger batch. Returns False if the Batches should
+    be submitted again one at a time, True otherwise.
+
+    :param list[Batch] batches:
+    :rtype: bool
+    """
+    __log_extra = {
+        'subject': batches[0].user.sub,
+        'batch_ids': str([batch.id for batch in batches]),
+        'pipeline': 'submit_batch_to_ledger',
+        'task': 'submit_queued_batches',
+    }
+
+    ledger_batch = ols.Batch(batches[0].user.key.PrivateKey())
+
+    for batch in batches:
+        for transaction in batch.transactions:
+            ledger_batch.add_request(transaction.build_ledger_request())
+
+    try:
+        handle = ledger.execute_batch(ledger_batch)
+    except ols.LedgerConnectionError:
+        logger.exception('Failed to submit queued batches to ledger, keeping them queued', extra=__log_extra)
+        return True
+    except ols.LedgerException as e:
+        if e.code in (15, 17, 18, 31):
+            logger.exception(f'Ledger error (code {e.code}), keeping batches queued', extra=__log_extra)
+            return True
+        else:
+            logger.exception(f'Ledger error (code {e.code}), submitting batches one at a time', extra=__log_extra)
+            return False
+
+    for batch in batches:
+        batch.on_submitted(handle)
+
+    logger.info(f'{len(batches)} queued batches submitted to ledger', extra=__log_extra)
+
+    return True
+
+
+# -- Submitting --------------------------------------------------------------
+
+
 @shared_task(
     bind=True,
     name='submit_batch_to_ledger.submit_to_ledger',
@@ -125,20 +422,30 @@ def submit_batch_to_ledger(task, subject, batch_id, session):
     title='Batch.on_submitted()',
 )
 @atomic
-def batch_on_submitted(task, handle, subject, batch_id, session):
+def batch_on_submitted(task, handle, subject, batch_id, session,
+                       on_commit=None, on_rollback=None):
     """
     :param celery.Task task:
     :param str handle:
     :param str subject:
     :param int batch_id:
     :param sqlalchemy.orm.Session session:
+    :param dict on_commit: Celery signature to invoke on commit
+    :param dict on_rollback: Celery signature to invoke on rollback
     """
     try:
-        session \
+        batch = session \
             .query(Batch) \
             .filter(Batch.id == batch_id) \
-            .one() \
-            .on_submitted(handle)
+            .one()
+
+        batch.on_submitted(handle)
+
+        # Resubmitted batches keeps their original callbacks
+        if on_commit is not None:
+            batch.on_commit_callback = on_commit
+        if on_rollback is not None:
+            batch.on_rollback_callback = on_rollback
     except orm.exc.NoResultFound:
         raise
     except Exception as e:
@@ -151,103 +458,308 @@ def batch_on_submitted(task, handle, subject, batch_id, session):
         raise task.retry(exc=e)
 
 
+@shared_task(
+    name='submit_batch_to_ledger.poll_submitted_batches',
+)
+@logger.wrap_task(
+    pipeline='submit_batch_to_ledger',
+    task='poll_submitted_batches',
+    title='Poll ledger for status of submitted Batches',
+)
+def poll_submitted_batches():
+    """
+    Polls the ledger for the status of (up to LEDGER_POLL_LIMIT) submitted
+    Batches, and dispatches tasks to commit or rollback the Batches which
+    have completed on the ledger, LEDGER_POLL_DISPATCH_SIZE Batches per task.
+
+    Batches polled the fewest times are prioritized, so every submitted
+    Batch is eventually polled even if there are more than the limit.
+
+    The ledger is polled outside of any database transaction, so the
+    transaction updating the polled Batches is kept short.
+    """
+    batches = get_submitted_batches()
+    statuses = get_batch_statuses(list({handle for _, handle in batches}))
+
+    committed = []
+    declined = []
+    pending = []
+
+    for batch_id, handle in batches:
+        status = statuses[handle]
+        if status == ols.BatchStatus.COMMITTED:
+            committed.append(batch_id)
+        elif status == ols.BatchStatus.INVALID:
+            declined.append(batch_id)
+        else:
+            pending.append(batch_id)
+
+    logger.info((
+        f'Polled ledger for {len(batches)} Batches: '
+        f'{len(committed)} committed, {len(declined)} declined, '
+        f'{len(pending)} pending/unknown'
+    ), extra={
+        'pipeline': 'submit_batch_to_ledger',
+        'task': 'poll_submitted_batches',
+    })
+
+    # Coalesced batches are submitted again one at a time
+    # instead of being rolled back
+    coalesced = on_batches_polled(
+        pending=pending,
+        declined=[(i, h) for i, h in batches if i in declined],
+    )
+
+    rollback = [batch_id for batch_id in declined if batch_id not in coalesced]
+    resubmit = [batch_id for batch_id in declined if batch_id in coalesced]
+
+    for i in range(0, len(committed), LEDGER_POLL_DISPATCH_SIZE):
+        batches_on_commit \
+            .si(batch_ids=committed[i:i+LEDGER_POLL_DISPATCH_SIZE]) \
+            .apply_async()
+
+    for i in range(0, len(rollback), LEDGER_POLL_DISPATCH_SIZE):
+        batches_on_rollback \
+            .si(batch_ids=rollback[i:i+LEDGER_POLL_DISPATCH_SIZE]) \
+            .apply_async()
+
+    for i in range(0, len(resubmit), LEDGER_POLL_DISPATCH_SIZE):
+        resubmit_coalesced_batches \
+            .si(batch_ids=resubmit[i:i+LEDGER_POLL_DISPATCH_SIZE]) \
+            .apply_async()
+
+
+@inject_session
+def get_submitted_batches(session):
+    """
+    Returns (batch_id, handle) for up to LEDGER_POLL_LIMIT submitted
+    Batches, those polled the fewest times first.
+
+    :param sqlalchemy.orm.Session session:
+    :rtype: list[(int, str)]
+    """
+    return session \
+        .query(Batch.id, Batch.handle) \
+        .filter(Batch.state == BatchState.SUBMITTED) \
+        .filter(Batch.handle.isnot(None)) \
+        .order_by(Batch.poll_count.asc(), Batch.submitted.asc()) \
+        .limit(LEDGER_POLL_LIMIT) \
+        .all()
+
+
+@atomic
+def on_batches_polled(pending, declined, session):
+    """
+    Increments the poll count of pending Batches, and returns the IDs
+    of the declined Batches which were submitted coalesced (their
+    ledger handle is shared with other Batches).
+
+    :param list[int] pending: IDs of pending Batches
+    :param list[(int, str)] declined: (batch_id, handle) of declined Batches
+    :param sqlalchemy.orm.Session session:
+    :rtype: set[int]
+    """
+    if pending:
+        session \
+            .query(Batch) \
+            .filter(Batch.id.in_(pending)) \
+            .update({Batch.poll_count: Batch.poll_count + 1},
+                    synchronize_session=False)
+
+    if not declined:
+        return set()
+
+    coalesced_handles = session \
+        .query(Batch.handle, func.count(Batch.id)) \
+        .filter(Batch.handle.in_({handle for _, handle in declined})) \
+        .group_by(Batch.handle) \
+        .having(func.count(Batch.id) > 1)
+
+    coalesced_handles = {handle for handle, _ in coalesced_handles}
+
+    return {batch_id for batch_id, handle in declined
+            if handle in coalesced_handles}
+
+
+def get_batch_statuses(handles):
+    """
+    Gets the status of multiple batches from the ledger, performing up to
+    LEDGER_POLL_CONCURRENCY requests concurrently. The status is None for
+    batches which could not be polled.
+
+    :param list[str] handles:
+    :rtype: dict[str, ols.BatchStatus]
+    """
+    def get_batch_status(handle):
+        try:
+            return ledger.get_batch_status(handle).status
+        except (ols.LedgerConnectionError, ols.LedgerException):
+            logger.exception('Failed to poll ledger for batch status', extra={
+                'handle': handle,
+                'pipeline': 'submit_batch_to_ledger',
+                'task': 'poll_submitted_batches',
+            })
+            return None
+
+    if not handles:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=LEDGER_POLL_CONCURRENCY) as executor:
+        return dict(zip(handles, executor.map(get_batch_status, handles)))
+
+
+@atomic
+def complete_batches(batch_ids, committed, session):
+    """
+    Invokes on_commit() or on_rollback() on the submitted Batches among
+    the provided IDs, and returns their callbacks to invoke. Batches
+    locked by others, or no longer submitted, are skipped.
+
+    :param list[int] batch_ids:
+    :param bool committed: Whether the Batches were committed or declined
+    :param sqlalchemy.orm.Session session:
+    :rtype: list[dict]
+    """
+    batches = session \
+        .query(Batch) \
+        .filter(Batch.id.in_(batch_ids)) \
+        .filter(Batch.state == BatchState.SUBMITTED) \
+        .options(orm.selectinload(Batch.transactions)) \
+        .with_for_update(of=Batch, skip_locked=True) \
+        .all()
+
+    callbacks = []
+
+    for batch in batches:
+        if committed:
+            batch.on_commit()
+            callback = batch.on_commit_callback
+        else:
+            batch.on_rollback()
+            callback = batch.on_rollback_callback
+
+        if callback:
+            callbacks.append(callback)
+
+    return callbacks
+
+
 @shared_task(
     bind=True,
-    name='submit_batch_to_ledger.poll_batch_status',
+    name='submit_batch_to_ledger.batches_on_commit',
     default_retry_delay=POLL_RETRY_DELAY,
     max_retries=POLL_MAX_RETRIES,
 )
 @logger.wrap_task(
     pipeline='submit_batch_to_ledger',
-    task='poll_batch_status',
-    title='Poll batch status',
+    task='batches_on_commit',
+    title='Batch.on_commit() for multiple Batches',
 )
-@atomic
-def poll_batch_status(task, subject, batch_id, session):
+def batches_on_commit(task, batch_ids):
     """
     :param celery.Task task:
-    :param str subject:
-    :param int batch_id:
-    :param sqlalchemy.orm.Session session:
+    :param list[int] batch_ids:
     """
-    __log_extra = {
-        'subject': subject,
-        'batch_id': str(batch_id),
-        'pipeline': 'submit_batch_to_ledger',
-        'task': 'poll_batch_status',
-    }
-
-    # Get batch from DB
     try:
-        batch = session \
-            .query(Batch) \
-            .filter(Batch.id == batch_id) \
-            .one()
-    except orm.exc.NoResultFound:
-        raise
+        callbacks = complete_batches(batch_ids, committed=True)
     except Exception as e:
-        logger.exception('Failed to load Batch from database', extra=__log_extra)
+        logger.exception('Failed to invoke on_commit() on Batches', extra={
+            'batch_ids': str(batch_ids),
+            'pipeline': 'submit_batch_to_ledger',
+            'task': 'batches_on_commit',
+        })
         raise task.retry(exc=e)
 
-    # Get batch status from ledger
+    for callback in callbacks:
+        signature(callback).apply_async()
+
+
+@shared_task(
+    bind=True,
+    name='submit_batch_to_ledger.batches_on_rollback',
+    default_retry_delay=POLL_RETRY_DELAY,
+    max_retries=POLL_MAX_RETRIES,
+)
+@logger.wrap_task(
+    pipeline='submit_batch_to_ledger',
+    task='batches_on_rollback',
+    title='Batch.on_rollback() for multiple Batches',
+)
+def batches_on_rollback(task, batch_ids):
+    """
+    :param celery.Task task:
+    :param list[int] batch_ids:
+    """
     try:
-        response = ledger.get_batch_status(batch.handle)
-    except ols.LedgerConnectionError as e:
-        logger.exception('Failed to poll ledger for batch status, retrying...', extra=__log_extra)
+        callbacks = complete_batches(batch_ids, committed=False)
+    except Exception as e:
+        logger.exception('Failed to invoke on_rollback() on Batches', extra={
+            'batch_ids': str(batch_ids),
+            'pipeline': 'submit_batch_to_ledger',
+            'task': 'batches_on_rollback',
+        })
         raise task.retry(exc=e)
 
-    # Assert status
-    if response.status == ols.BatchStatus.COMMITTED:
-        logger.info('Ledger batch status: COMMITTED', extra=__log_extra)
-    elif response.status == ols.BatchStatus.INVALID:
-        # Raising exception triggers the ON ERROR task (rollback_batch())
-        raise InvalidBatch('Invalid batch')
-    elif response.status == ols.BatchStatus.UNKNOWN:
-        logger.info('Ledger batch status: UNKNOWN', extra=__log_extra)
-        raise task.retry()
-    elif response.status == ols.BatchStatus.PENDING:
-        logger.info('Ledger batch status: PENDING', extra=__log_extra)
-        raise task.retry()
-    else:
-        raise RuntimeError('Unknown batch status returned, should NOT have happened!')
+    for callback in callbacks:
+        signature(callback).apply_async()
 
 
 @shared_task(
     bind=True,
-    name='submit_batch_to_ledger.batch_on_commit',
+    name='submit_batch_to_ledger.resubmit_coalesced_batches',
     default_retry_delay=POLL_RETRY_DELAY,
     max_retries=POLL_MAX_RETRIES,
 )
 @logger.wrap_task(
     pipeline='submit_batch_to_ledger',
-    task='batch_on_commit',
-    title='Batch.on_commit()',
+    task='resubmit_coalesced_batches',
+    title='Resubmit declined coalesced Batches one at a time',
 )
-@atomic
-def batch_on_commit(task, subject, batch_id, session):
+def resubmit_coalesced_batches(task, batch_ids):
     """
     :param celery.Task task:
-    :param str subject:
-    :param int batch_id:
-    :param sqlalchemy.orm.Session session:
+    :param list[int] batch_ids:
     """
     try:
-        session \
-            .query(Batch) \
-            .filter(Batch.id == batch_id) \
-            .one() \
-            .on_commit()
-    except orm.exc.NoResultFound:
-        raise
+        resubmit = reset_batches(batch_ids)
     except Exception as e:
-        logger.exception('Failed to invoke on_commit() on Batch', extra={
-            'subject': subject,
-            'batch_id': str(batch_id),
+        logger.exception('Failed to invoke on_reset() on Batches', extra={
+            'batch_ids': str(batch_ids),
             'pipeline': 'submit_batch_to_ledger',
-            'task': 'batch_on_commit',
+            'task': 'resubmit_coalesced_batches',
         })
         raise task.retry(exc=e)
 
+    for subject, batch_id, error in resubmit:
+        submit_batch(
+            subject=subject,
+            batch_id=batch_id,
+            error=signature(error) if error else None,
+        )
+
+
+@atomic
+def reset_batches(batch_ids, session):
+    """
+    Invokes on_reset() on the submitted Batches among the provided IDs,
+    and returns (subject, batch_id, on_rollback_callback) for each of them.
+
+    :param list[int] batch_ids:
+    :param sqlalchemy.orm.Session session:
+    :rtype: list[(str, int, dict)]
+    """
+    batches = session \
+        .query(Batch) \
+        .filter(Batch.id.in_(batch_ids)) \
+        .filter(Batch.state == BatchState.SUBMITTED) \
+        .with_for_update(of=Batch, skip_locked=True) \
+        .all()
+
+    for batch in batches:
+        batch.on_reset()
+
+    return [(b.user.sub, b.id, b.on_rollback_callback) for b in batches]
+
 
 @shared_task(
     bind=True,
@@ -284,3 +796,107 @@ def batch_on_rollback(task, subject, batch_id, session):
             'task': 'batch_on_rollback',
         })
         raise task.retry(exc=e)
+
+
+# -- Deprecated --------------------------------------------------------------
+
+# The tasks below belong to the previous pipeline, which polled the ledger
+# once per Batch. They are kept for one release, so tasks queued before
+# upgrading are handed over to the current flow, and will then be removed.
+
+
+@shared_task(
+    name='submit_batch_to_ledger.poll_batch_status',
+)
+@logger.wrap_task(
+    pipeline='submit_batch_to_ledger',
+    task='poll_batch_status',
+    title='Poll batch status (deprecated)',
+)
+def poll_batch_status(subject, batch_id):
+    """
+    Deprecated: The status of submitted Batches is polled for by
+    poll_submitted_batches(). Does nothing, leaving it to the next
+    task in the chain (batch_on_commit) to hand over the Batch.
+
+    :param str subject:
+    :param int batch_id:
+    """
+    pass
+
+
+@shared_task(
+    bind=True,
+    name='submit_batch_to_ledger.batch_on_commit',
+    default_retry_delay=POLL_RETRY_DELAY,
+    max_retries=POLL_MAX_RETRIES,
+)
+@logger.wrap_task(
+    pipeline='submit_batch_to_ledger',
+    task='batch_on_commit',
+    title='Batch.on_commit() (deprecated)',
+)
+def batch_on_commit(task, subject, batch_id):
+    """
+    Deprecated: Hands the Batch over to the current flow. The task's
+    success callbacks (links) are taken over by the Batch, and invoked
+    by poll_submitted_batches() once it is committed on the ledger.
+    Batches which are not yet submitted to the ledger are submitted.
+
+    :param celery.Task task:
+    :param str subject:
+    :param int batch_id:
+    """
+    callbacks = task.request.callbacks or []
+
+    if len(callbacks) > 1:
+        on_commit = group(*[signature(c) for c in callbacks])
+    elif callbacks:
+        on_commit = signature(callbacks[0])
+    else:
+        on_commit = None
+
+    try:
+        state, queued = take_over_batch(batch_id, on_commit)
+    except orm.exc.NoResultFound:
+        raise
+    except Exception as e:
+        logger.exception('Failed to hand over Batch', extra={
+            'subject': subject,
+            'batch_id': str(batch_id),
+            'pipeline': 'submit_batch_to_ledger',
+            'task': 'batch_on_commit',
+        })
+        raise task.retry(exc=e)
+
+    # Callbacks of completed Batches are invoked right away (by Celery),
+    # other Batches invoke them once committed on the ledger
+    if state != BatchState.COMPLETED:
+        task.request.callbacks = None
+
+    if state == BatchState.PENDING and not queued:
+        submit_batch(subject, batch_id, success=on_commit)
+
+
+@atomic
+def take_over_batch(batch_id, on_commit, session):
+    """
+    Saves the success callback on a pending or submitted Batch, and
+    returns the Batch's state and whether or not it is queued for
+    (coalesced) submission.
+
+    :param int batch_id:
+    :param celery.canvas.Signature on_commit:
+    :param sqlalchemy.orm.Session session:
+    :rtype: (BatchState, bool)
+    """
+    batch = session \
+        .query(Batch) \
+        .filter(Batch.id == batch_id) \
+        .one()
+
+    if on_commit is not None and \
+            batch.state in (BatchState.PENDING, BatchState.SUBMITTED):
+        batch.on_commit_callback = on_commit
+
+    return batch.state, batch.queued is not None
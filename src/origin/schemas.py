@@ -0,0 +1,262 @@
+"""
+Per-process registry of marshmallow schemas.
+
+Building a schema from a dataclass (using marshmallow_dataclass) is
+expensive, as is instantiating the schema, which constructs all its
+fields. The registry builds each schema class and instance only once
+per process, and reuses them afterwards.
+
+Schema instances are shared, and must therefore not be modified.
+They can be used with load() and dump() from multiple threads.
+
+The registry also provides precompiled dump functions (see get_dumper()),
+which produce the exact same output as Schema.dump(), but skip most of
+marshmallow's per-field overhead.
+
+Usage example::
+
+    from origin.schemas import get_schema
+
+    get_schema(MyDataclass).dump(obj)
+
+"""
+from threading import Lock
+import marshmallow_dataclass as md
+from marshmallow import Schema, fields, utils, missing
+from marshmallow.decorators import PRE_DUMP, POST_DUMP
+
+
+_lock = Lock()
+_schema_classes = {}
+_schema_instances = {}
+_dumpers = {}
+
+
+def get_schema_class(cls):
+    """
+    Returns the schema class for a dataclass.
+
+    :param type cls: The dataclass
+    :rtype: type[marshmallow.Schema]
+    """
+    try:
+        return _schema_classes[cls]
+    except KeyError:
+        with _lock:
+            if cls not in _schema_classes:
+                _schema_classes[cls] = md.class_schema(cls)
+            return _schema_classes[cls]
+
+
+def get_schema_instance(schema_class):
+    """
+    Returns a (shared) instance of a schema class.
+
+    :param type[marshmallow.Schema] schema_class:
+    :rtype: marshmallow.Schema
+    """
+    try:
+        return _schema_instances[schema_class]
+    except KeyError:
+        with _lock:
+            if schema_class not in _schema_instances:
+                _schema_instances[schema_class] = schema_class()
+            return _schema_instances[schema_class]
+
+
+def get_schema(cls):
+    """
+    Returns a (shared) schema instance for a dataclass.
+
+    :param type cls: The dataclass
+    :rtype: marshmallow.Schema
+    """
+    return get_schema_instance(get_schema_class(cls))
+
+
+def get_dumper(schema_class):
+    """
+    Returns a (shared) precompiled dump function for a schema class.
+    The function takes a single object and returns the same
+    as schema_class().dump(obj).
+
+    :param type[marshmallow.Schema] schema_class:
+    :rtype: collections.abc.Callable
+    """
+    try:
+        return _dumpers[schema_class]
+    except KeyError:
+        dumper = _compile_dumper(get_schema_instance(schema_class))
+        _dumpers[schema_class] = dumper
+        return dumper
+
+
+def _compile_dumper(schema):
+    """
+    Compiles a dump function for a schema instance. Falls back to
+    schema.dump if the schema has dump hooks or a custom attribute
+    accessor, as these can not be precompiled.
+
+    :param marshmallow.Schema schema:
+    :rtype: collections.abc.Callable
+    """
+    if schema._has_processors(PRE_DUMP) \
+            or schema._has_processors(POST_DUMP) \
+            or type(schema).get_attribute is not Schema.get_attribute:
+        return schema.dump
+
+    dict_class = schema.dict_class
+    compiled_fields = [
+        (
+            field.data_key if field.data_key is not None else attr,
+            _compile_field(attr, field, schema),
+        )
+        for attr, field in schema.dump_fields.items()
+    ]
+
+    def __dump_one(obj):
+        ret = dict_class()
+        for key, serialize in compiled_fields:
+            value = serialize(obj)
+            if value is not missing:
+                ret[key] = value
+        return ret
+
+    if schema.many:
+        def __dump_many(obj):
+            if obj is None:
+                return __dump_one(None)
+            return [__dump_one(o) for o in obj]
+        return __dump_many
+    else:
+        return __dump_one
+
+
+def _compile_field(attr, field, schema):
+    """
+    Compiles a function which returns the serialized value of a field
+    on an object, or marshmallow.missing if the value should be omitted.
+    Equivalent to Field.serialize().
+
+    :param str attr:
+    :param marshmallow.fields.Field field:
+    :param marshmallow.Schema schema:
+    :rtype: collections.abc.Callable
+    """
+    if type(field).serialize is not fields.Field.serialize \
+            or type(field).get_value is not fields.Field.get_value:
+        def __serialize_fallback(obj):
+            return field.serialize(attr, obj, accessor=schema.get_attribute)
+        return __serialize_fallback
+
+    convert = _compile_value(field)
+
+    if not field._CHECK_ATTRIBUTE:
+        def __serialize_unchecked(obj):
+            return convert(None, attr, obj)
+        return __serialize_unchecked
+
+    key = field.attribute or attr
+    default = getattr(field, 'default', missing)
+
+    if '.' in key:
+        def get_value(obj):
+            return utils.get_value(obj, key, missing)
+    else:
+        # Same as marshmallow.utils.get_value() for non-nested keys
+        def get_value(obj):
+            if not hasattr(obj, '__getitem__'):
+                return getattr(obj, key, missing)
+            try:
+                return obj[key]
+            except (KeyError, IndexError, TypeError, AttributeError):
+                return getattr(obj, key, missing)
+
+    def __serialize(obj):
+        value = get_value(obj)
+        if value is missing:
+            value = default() if callable(default) else default
+            if value is missing:
+                return missing
+        return convert(value, attr, obj)
+
+    return __serialize
+
+
+def _compile_value(field):
+    """
+    Compiles a function which serializes a value.
+    Equivalent to Field._serialize().
+
+    :param marshmallow.fields.Field field:
+    :rtype: collections.abc.Callable
+    """
+    field_type = type(field)
+
+    if field_type is fields.String:
+        def __string(value, attr, obj):
+            if value is None or type(value) is str:
+                return value
+            return utils.ensure_text_type(value)
+        return __string
+
+    elif field_type in (fields.Integer, fields.Float) and not field.as_string:
+        num_type = field.num_type
+
+        def __number(value, attr, obj):
+            if value is None:
+                return None
+            return num_type(value)
+        return __number
+
+    elif field_type is fields.DateTime and field.format in (None, 'iso'):
+        def __datetime(value, attr, obj):
+            if value is None:
+                return None
+            return value.isoformat()
+        return __datetime
+
+    elif field_type is fields.Function \
+            and field.serialize_func is not None \
+            and len(utils.get_func_args(field.serialize_func)) == 1:
+        serialize_func = field.serialize_func
+
+        def __function(value, attr, obj):
+            return serialize_func(obj)
+        return __function
+
+    elif field_type is fields.Nested:
+        nested_schema = field.schema
+        many = nested_schema.many or field.many
+        dump = _compile_dumper(nested_schema)
+
+        if nested_schema.many or dump == nested_schema.dump:
+            def __nested_fallback(value, attr, obj):
+                if value is None:
+                    return None
+                return nested_schema.dump(value, many=many)
+            return __nested_fallback
+        elif many:
+            def __nested_many(value, attr, obj):
+                if value is None:
+                    return None
+                return [dump(v) for v in value]
+            return __nested_many
+        else:
+            def __nested(value, attr, obj):
+                if value is None:
+                    return None
+                return dump(value)
+            return __nested
+
+    elif field_type is fields.List:
+        inner = _compile_value(field.inner)
+
+        def __list(value, attr, obj):
+            if value is None:
+                return None
+            return [inner(each, attr, obj) for each in value]
+        return __list
+
+    else:
+        return field._serialize
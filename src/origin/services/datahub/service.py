@@ -1,7 +1,5 @@
 import json
-import requests
 import marshmallow
-import marshmallow_dataclass as md
 
 from origin.settings import (
     PROJECT_URL,
@@ -10,7 +8,9 @@ from origin.settings import (
     DEBUG,
     WEBHOOK_SECRET,
 )
+from origin.schemas import get_schema_class, get_schema_instance
 
+from ..transport import transport
 from .models import (
     GetGgoListRequest,
     GetGgoListResponse,
@@ -48,13 +48,15 @@ class DataHubService(object):
     """
     An interface to the Project Origin DataHub Service API.
     """
-    def invoke(self, path, response_schema, token=None, request=None, request_schema=None):
+    def invoke(self, path, response_schema, token=None, request=None,
+               request_schema=None, idempotent=False):
         """
         :param str path:
         :param obj request:
         :param str token:
         :param Schema request_schema:
         :param Schema response_schema:
+        :param bool idempotent: Whether or not the request can be retried
         :rtype obj:
         """
         url = '%s%s' % (DATAHUB_SERVICE_URL, path)
@@ -64,14 +66,15 @@ class DataHubService(object):
         if token:
             headers = {TOKEN_HEADER: f'Bearer {token}'}
         if request and request_schema:
-            body = request_schema().dump(request)
+            body = get_schema_instance(request_schema).dump(request)
 
         try:
-            response = requests.post(
+            response = transport.post(
                 url=url,
                 json=body,
                 headers=headers,
                 verify=not DEBUG,
+                idempotent=idempotent,
             )
         except:
             raise DataHubServiceConnectionError(
@@ -89,7 +92,7 @@ class DataHubService(object):
 
         try:
             response_json = response.json()
-            response_model = response_schema().load(response_json)
+            response_model = get_schema_instance(response_schema).load(response_json)
         except json.decoder.JSONDecodeError:
             raise DataHubServiceError(
                 f'Failed to parse response JSON: {url}\n\n{response.content}',
@@ -116,8 +119,9 @@ class DataHubService(object):
             token=token,
             path='/meteringpoints/set-key',
             request=SetKeyRequest(gsrn=gsrn, key=key),
-            request_schema=md.class_schema(SetKeyRequest),
-            response_schema=md.class_schema(SetKeyResponse),
+            request_schema=get_schema_class(SetKeyRequest),
+            response_schema=get_schema_class(SetKeyResponse),
+            idempotent=True,
         )
 
     def get_meteringpoints(self, token):
@@ -128,7 +132,8 @@ class DataHubService(object):
         return self.invoke(
             token=token,
             path='/meteringpoints',
-            response_schema=md.class_schema(GetMeteringPointsResponse),
+            response_schema=get_schema_class(GetMeteringPointsResponse),
+            idempotent=True,
         )
 
     def get_measurements(self, token, request):
@@ -141,8 +146,9 @@ class DataHubService(object):
             token=token,
             path='/measurements',
             request=request,
-            request_schema=md.class_schema(GetMeasurementListRequest),
-            response_schema=md.class_schema(GetMeasurementListResponse),
+            request_schema=get_schema_class(GetMeasurementListRequest),
+            response_schema=get_schema_class(GetMeasurementListResponse),
+            idempotent=True,
         )
 
     def get_ggo_list(self, token, request):
@@ -155,8 +161,9 @@ class DataHubService(object):
             token=token,
             path='/ggo',
             request=request,
-            request_schema=md.class_schema(GetGgoListRequest),
-            response_schema=md.class_schema(GetGgoListResponse),
+            request_schema=get_schema_class(GetGgoListRequest),
+            response_schema=get_schema_class(GetGgoListResponse),
+            idempotent=True,
         )
 
     def get_consumption(self, token, request):
@@ -169,8 +176,9 @@ class DataHubService(object):
             token=token,
             path='/measurements/consumed',
             request=request,
-            request_schema=md.class_schema(GetMeasurementRequest),
-            response_schema=md.class_schema(GetMeasurementResponse),
+            request_schema=get_schema_class(GetMeasurementRequest),
+            response_schema=get_schema_class(GetMeasurementResponse),
+            idempotent=True,
         )
 
     def webhook_on_meteringpoint_available_subscribe(self, token):
@@ -184,8 +192,8 @@ class DataHubService(object):
             token=token,
             path='/webhook/on-meteringpoint-available/subscribe',
             request=WebhookSubscribeRequest(url=callback_url, secret=WEBHOOK_SECRET),
-            request_schema=md.class_schema(WebhookSubscribeRequest),
-            response_schema=md.class_schema(WebhookSubscribeResponse),
+            request_schema=get_schema_class(WebhookSubscribeRequest),
+            response_schema=get_schema_class(WebhookSubscribeResponse),
         )
 
     def webhook_on_ggo_issued_subscribe(self, token):
@@ -199,8 +207,8 @@ class DataHubService(object):
             token=token,
             path='/webhook/on-ggo-issued/subscribe',
             request=WebhookSubscribeRequest(url=callback_url, secret=WEBHOOK_SECRET),
-            request_schema=md.class_schema(WebhookSubscribeRequest),
-            response_schema=md.class_schema(WebhookSubscribeResponse),
+            request_schema=get_schema_class(WebhookSubscribeRequest),
+            response_schema=get_schema_class(WebhookSubscribeResponse),
         )
 
     def get_technologies(self):
@@ -209,5 +217,6 @@ class DataHubService(object):
         """
         return self.invoke(
             path='/technologies',
-            response_schema=md.class_schema(GetTechnologiesResponse),
+            response_schema=get_schema_class(GetTechnologiesResponse),
+            idempotent=True,
         )
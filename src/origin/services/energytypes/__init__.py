@@ -1,2 +1,3 @@
 from .service import *
 from .models import *
+from .cache import *
@@ -0,0 +1,147 @@
+import json
+from datetime import timezone, timedelta
+
+from origin.cache import redis
+from origin.common import EmissionValues
+
+from .models import EmissionData, EmissionPart
+
+
+class ResidualMixCache(object):
+    """
+    Persistent cache of residual mix emission data in Redis, mapped by
+    sector and hour (UTC). Residual mix for a past hour never changes,
+    so entries never expire.
+
+    Each sector is stored as a Redis hash, mapping the hour (as
+    POSIX timestamp) to its EmissionParts as JSON.
+    """
+
+    def get_residual_mix(self, service, sector, begin_from, begin_to):
+        """
+        Returns residual mix emission data for the hours between
+        begin_from and begin_to (both included). Only hours which are
+        not already cached are fetched from EnergyTypeService, in a
+        single ranged request.
+
+        :param EnergyTypeService service:
+        :param list[str] sector:
+        :param datetime.datetime begin_from:
+        :param datetime.datetime begin_to:
+        :rtype: list[EmissionData]
+        """
+        hours = list(self.get_hours(begin_from, begin_to))
+        sector = sorted(set(sector))
+
+        # Redis refuses HMGET without any fields
+        if not hours:
+            return []
+
+        mix_emissions = []
+        missing = {}
+
+        for s in sector:
+            cached = redis.hmget(
+                self.get_key(s),
+                [int(h.timestamp()) for h in hours],
+            )
+
+            for hour, data in zip(hours, cached):
+                if data is not None:
+                    mix_emissions.append(self.deserialize(s, hour, data))
+                else:
+                    missing.setdefault(s, []).append(hour)
+
+        if missing:
+            fetched = service.get_residual_mix(
+                sector=list(missing.keys()),
+                begin_from=min(min(h) for h in missing.values()),
+                begin_to=max(max(h) for h in missing.values()),
+            )
+
+            # The ranged request may include hours which are already
+            # cached (for this or other sectors)
+            missing_keys = set(
+                (s, h) for s, hours in missing.items() for h in hours)
+
+            fetched_missing = [
+                d for d in fetched.mix_emissions
+                if (d.sector, d.timestamp_utc) in missing_keys
+            ]
+
+            self.store(fetched_missing)
+            mix_emissions.extend(fetched_missing)
+
+        return mix_emissions
+
+    def store(self, mix_emissions):
+        """
+        :param list[EmissionData] mix_emissions:
+        """
+        mapping = {}
+
+        for d in mix_emissions:
+            mapping.setdefault(self.get_key(d.sector), {}) \
+                [int(d.timestamp_utc.timestamp())] = self.serialize(d)
+
+        if mapping:
+            pipeline = redis.pipeline()
+            for key, values in mapping.items():
+                pipeline.hset(key, mapping=values)
+            pipeline.execute()
+
+    def get_key(self, sector):
+        """
+        :param str sector:
+        :rtype: str
+        """
+        return f'residual-mix:{sector}'
+
+    def get_hours(self, begin_from, begin_to):
+        """
+        Yields every whole hour (in UTC) between begin_from
+        and begin_to (both included).
+
+        :param datetime.datetime begin_from:
+        :param datetime.datetime begin_to:
+        :rtype: collections.abc.Iterable[datetime.datetime]
+        """
+        hour = begin_from.astimezone(timezone.utc) \
+            .replace(minute=0, second=0, microsecond=0)
+
+        if hour < begin_from:
+            hour += timedelta(hours=1)
+
+        while hour <= begin_to:
+            yield hour
+            hour += timedelta(hours=1)
+
+    def serialize(self, emission_data):
+        """
+        :param EmissionData emission_data:
+        :rtype: str
+        """
+        return json.dumps([
+            (part.technology, part.amount, dict(part.emissions))
+            for part in emission_data.parts
+        ])
+
+    def deserialize(self, sector, timestamp_utc, data):
+        """
+        :param str sector:
+        :param datetime.datetime timestamp_utc:
+        :param bytes data:
+        :rtype: EmissionData
+        """
+        return EmissionData(
+            sector=sector,
+            timestamp_utc=timestamp_utc,
+            parts=[
+                EmissionPart(
+                    technology=technology,
+                    amount=amount,
+                    emissions=EmissionValues(**emissions),
+                )
+                for technology, amount, emissions in json.loads(data)
+            ],
+        )
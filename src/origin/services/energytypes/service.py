@@ -1,10 +1,10 @@
 import json
-import requests
 import marshmallow
-import marshmallow_dataclass as md
 
 from origin.settings import ENERGY_TYPE_SERVICE_URL, DEBUG
+from origin.schemas import get_schema_class, get_schema_instance
 
+from ..transport import transport
 from .models import GetMixEmissionsResponse
 
 
@@ -52,7 +52,7 @@ class EnergyTypeService(object):
         }
 
         try:
-            response = requests.get(
+            response = transport.get(
                 url=url,
                 params=query,
                 verify=not DEBUG,
@@ -74,7 +74,7 @@ class EnergyTypeService(object):
 
         try:
             response_json = response.json()
-            response_model = response_schema().load(response_json)
+            response_model = get_schema_instance(response_schema).load(response_json)
         except json.decoder.JSONDecodeError:
             raise EnergyTypeServiceError(
                 f'Failed to parse response JSON: {url}\n\n{response.content}',
@@ -101,7 +101,7 @@ class EnergyTypeService(object):
         """
         return self.invoke(
             path='/residual-mix',
-            response_schema=md.class_schema(GetMixEmissionsResponse),
+            response_schema=get_schema_class(GetMixEmissionsResponse),
             query={
                 'sector': sector,
                 'begin_from': begin_from.isoformat(),
@@ -0,0 +1,120 @@
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+from origin.settings import (
+    SERVICE_POOL_SIZE,
+    SERVICE_CONNECT_TIMEOUT,
+    SERVICE_READ_TIMEOUT,
+    SERVICE_MAX_RETRIES,
+    SERVICE_RETRY_BACKOFF,
+)
+
+
+class HttpTransport(object):
+    """
+    HTTP transport shared by the service interfaces.
+
+    Wraps a requests.Session, which keeps a pool of keep-alive
+    connections per host, and applies connect/read timeouts to every
+    request. Requests flagged as idempotent are retried with exponential
+    backoff on connection errors, timeouts and 502/503/504 responses.
+    """
+
+    RETRY_STATUS_CODES = (502, 503, 504)
+
+    def __init__(self, pool_size, connect_timeout, read_timeout,
+                 max_retries, retry_backoff):
+        """
+        :param int pool_size: Max connections kept alive per host
+        :param float connect_timeout: In seconds
+        :param float read_timeout: In seconds
+        :param int max_retries:
+        :param float retry_backoff: In seconds, doubled for each retry
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+        )
+
+        self.session = requests.Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+    def request(self, method, url, idempotent=False, **kwargs):
+        """
+        :param str method:
+        :param str url:
+        :param bool idempotent: Whether or not the request can be retried
+        :param kwargs: Passed on to requests.Session.request()
+        :rtype: requests.Response
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        retries = self.max_retries if idempotent else 0
+
+        for attempt in range(retries + 1):
+            if attempt > 0:
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt < retries:
+                    continue
+                raise
+
+            if response.status_code in self.RETRY_STATUS_CODES \
+                    and attempt < retries:
+                continue
+
+            return response
+
+    def get(self, url, idempotent=True, **kwargs):
+        """
+        :param str url:
+        :param bool idempotent:
+        :rtype: requests.Response
+        """
+        return self.request('GET', url, idempotent, **kwargs)
+
+    def post(self, url, idempotent=False, **kwargs):
+        """
+        :param str url:
+        :param bool idempotent:
+        :rtype: requests.Response
+        """
+        return self.request('POST', url, idempotent, **kwargs)
+
+    def get_pool_stats(self):
+        """
+        Returns statistics for each connection pool (one per host).
+
+        :rtype: dict[str, dict[str, int]]
+        """
+        stats = {}
+        pools = self.adapter.poolmanager.pools
+
+        for key in pools.keys():
+            pool = pools[key]
+            stats[f'{pool.scheme}://{pool.host}:{pool.port}'] = {
+                'connections_created': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle_connections': sum(
+                    1 for conn in list(pool.pool.queue) if conn is not None
+                ) if pool.pool else 0,
+            }
+
+        return stats
+
+
+transport = HttpTransport(
+    pool_size=SERVICE_POOL_SIZE,
+    connect_timeout=SERVICE_CONNECT_TIMEOUT,
+    read_timeout=SERVICE_READ_TIMEOUT,
+    max_retries=SERVICE_MAX_RETRIES,
+    retry_backoff=SERVICE_RETRY_BACKOFF,
+)
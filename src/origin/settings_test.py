@@ -19,6 +19,7 @@ LOG_LEVEL = None
 
 SQL_ALCHEMY_SETTINGS = {}
 DATABASE_URI = None
+DATABASE_READ_URI = None
 
 
 # -- Services ----------------------------------------------------------------
@@ -28,6 +29,22 @@ LEDGER_URL = None
 ENERGY_TYPE_SERVICE_URL = None
 
 
+# Connections to services are pooled (per host) and kept alive.
+# Timeouts are in seconds. Idempotent requests are retried up to
+# SERVICE_MAX_RETRIES times, waiting SERVICE_RETRY_BACKOFF seconds
+# before the first retry and doubling for each subsequent retry.
+SERVICE_POOL_SIZE = 10
+SERVICE_CONNECT_TIMEOUT = 5
+SERVICE_READ_TIMEOUT = 60
+SERVICE_MAX_RETRIES = 3
+SERVICE_RETRY_BACKOFF = 0.5
+
+# Statistics of in-process caches and connection pools to services are
+# logged at most once every STATS_LOG_INTERVAL seconds per process, after
+# a request or task has completed (0 disables logging statistics)
+STATS_LOG_INTERVAL = 0
+
+
 # -- webhook -----------------------------------------------------------------
 
 HMAC_HEADER = 'x-hub-signature'
@@ -53,6 +70,14 @@ HYDRA_USER_ENDPOINT = None
 HYDRA_WANTED_SCOPES = None
 
 
+# Introspected tokens are cached (in-process and in Redis) for at most
+# this many seconds, and never beyond the token's expire time.
+# Inactive tokens are cached for TOKEN_INACTIVE_CACHE_TTL seconds.
+TOKEN_CACHE_TTL = 60
+TOKEN_INACTIVE_CACHE_TTL = 10
+TOKEN_CACHE_MAX_SIZE = 10000
+
+
 # -- Task broker and locking -------------------------------------------------
 
 REDIS_HOST = None
@@ -76,3 +101,51 @@ AZURE_APP_INSIGHTS_CONN_STRING = None
 UNKNOWN_TECHNOLOGY_LABEL = 'Unknown'
 
 BATCH_RESUBMIT_AFTER_HOURS = 6
+
+# Polling the ledger for the status of submitted Batches: Interval (in
+# seconds), max Batches per poll, number of concurrent requests to the
+# ledger, and number of Batches to commit/rollback per task
+LEDGER_POLL_INTERVAL = 10
+LEDGER_POLL_LIMIT = 1000
+LEDGER_POLL_CONCURRENCY = 10
+LEDGER_POLL_DISPATCH_SIZE = 100
+
+# Coalescing Batches: Composed Batches are queued and submitted to the
+# ledger together, per user, every LEDGER_COALESCE_WINDOW seconds, or
+# once LEDGER_COALESCE_MAX_REQUESTS ledger requests are queued
+LEDGER_COALESCE_ENABLED = True
+LEDGER_COALESCE_WINDOW = 2
+LEDGER_COALESCE_MAX_REQUESTS = 100
+
+# Max number of derived ledger keys to keep in memory (per process)
+LEDGER_KEY_CACHE_SIZE = 10000
+
+# Number of GGOs to insert per query when importing from DataHubService
+GGO_IMPORT_CHUNK_SIZE = 1000
+
+# Number of GGOs to fetch from the database (using a server side cursor)
+# per round trip when exporting GGOs
+GGO_EXPORT_CHUNK_SIZE = 1000
+
+# Number of seconds to cache built eco declarations for (they are
+# invalidated when GGOs are retired, but new measurements may arrive)
+ECO_DECLARATION_CACHE_TTL = 3600
+
+# Results of GGO summaries are cached (in-process) for
+# GGO_SUMMARY_CACHE_TTL seconds, using at most GGO_SUMMARY_CACHE_MAX_BYTES
+# of memory per process.
+# Disabled when testing, as tests modify the database between summaries.
+GGO_SUMMARY_CACHE_TTL = 0
+GGO_SUMMARY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Number of months ahead to create partitions of the GGO table for
+GGO_PARTITION_MONTHS_AHEAD = 3
+
+# GGOs which are spent, or stored but expired, are moved to the archive
+# tables once they begin more than GGO_ARCHIVE_AFTER_DAYS days ago,
+# GGO_ARCHIVE_CHUNK_SIZE GGOs per database transaction
+GGO_ARCHIVE_AFTER_DAYS = 365
+GGO_ARCHIVE_CHUNK_SIZE = 1000
+
+# Max number of composes in a single ComposeGgoBulk request
+COMPOSE_BULK_MAX_SIZE = 1000
@@ -0,0 +1,74 @@
+"""
+Logging of statistics which are only available from within the process
+that collects them: in-process caches (see origin.cache.caches) and
+connection pools to services (see origin.services.transport).
+
+The statistics are logged (as custom dimensions, when logging to Azure
+Application Insights) at most once every STATS_LOG_INTERVAL seconds per
+process. Logging is triggered after each HTTP request (see origin.app)
+and Celery task (see origin.pipelines) has completed.
+"""
+import time
+from threading import Lock
+
+from origin import logger
+from origin.cache import get_cache_stats
+from origin.services.transport import transport
+from origin.settings import STATS_LOG_INTERVAL
+
+
+def get_stats():
+    """
+    Returns the statistics of in-process caches and connection pools
+    as a flat dict, with keys like "cache.<name>.hits" and
+    "pool.<scheme://host:port>.requests".
+
+    :rtype: dict[str, int]
+    """
+    stats = {}
+
+    for name, cache_stats in get_cache_stats().items():
+        for key, value in cache_stats.items():
+            stats[f'cache.{name}.{key}'] = value
+
+    for pool, pool_stats in transport.get_pool_stats().items():
+        for key, value in pool_stats.items():
+            stats[f'pool.{pool}.{key}'] = value
+
+    return stats
+
+
+class StatsLogger(object):
+    """
+    Logs statistics, at most once every "interval" seconds.
+    """
+    def __init__(self, interval):
+        """
+        :param float interval: Seconds between logging (0 disables)
+        """
+        self.interval = interval
+        self.last_logged = time.monotonic()
+        self.lock = Lock()
+
+    def log_if_due(self):
+        """
+        Logs statistics if at least "interval" seconds has passed
+        since they were last logged.
+        """
+        if self.interval <= 0:
+            return
+
+        now = time.monotonic()
+
+        with self.lock:
+            if now - self.last_logged < self.interval:
+                return
+            self.last_logged = now
+
+        try:
+            logger.info('In-process statistics', extra=get_stats())
+        except Exception:
+            logger.exception('Failed to log in-process statistics')
+
+
+stats_logger = StatsLogger(STATS_LOG_INTERVAL)
@@ -19,7 +19,9 @@ urls = (
 
     # GGOs
     ('/ggo', ggo.GetGgoList()),
+    ('/ggo/export', ggo.ExportGgoList()),
     ('/ggo/compose', ggo.ComposeGgo()),
+    ('/ggo/compose-bulk', ggo.ComposeGgoBulk()),
     ('/ggo/summary', ggo.GetGgoSummary()),
     ('/ggo/get-total-amount', ggo.GetTotalAmount()),
 
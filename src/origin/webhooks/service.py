@@ -1,12 +1,12 @@
 import json
 import hmac
 import requests
-import marshmallow_dataclass as md
 from hashlib import sha256
 from base64 import b64encode
 
 from origin.settings import DEBUG, HMAC_HEADER
 from origin.db import atomic
+from origin.schemas import get_schema
 
 from .models import (
     WebhookEvent,
@@ -139,7 +139,7 @@ class WebhookService(object):
         """
         self.publish(
             subscription=subscription,
-            schema=md.class_schema(OnGgoReceivedRequest)(),
+            schema=get_schema(OnGgoReceivedRequest),
             request=OnGgoReceivedRequest(
                 sub=subscription.subject,
                 ggo=ggo,
@@ -153,7 +153,7 @@ class WebhookService(object):
         """
         self.publish(
             subscription=subscription,
-            schema=md.class_schema(OnForecastReceivedRequest)(),
+            schema=get_schema(OnForecastReceivedRequest),
             request=OnForecastReceivedRequest(
                 sub=subscription.subject,
                 forecast=forecast,
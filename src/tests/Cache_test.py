@@ -0,0 +1,177 @@
+import pytest
+import sqlalchemy as sa
+from unittest.mock import patch, Mock
+from sqlalchemy.orm import sessionmaker
+
+from origin import cache
+
+
+def get_session():
+    return sessionmaker(bind=sa.create_engine('sqlite://'))()
+
+
+@patch('origin.cache.bump_versions')
+def test__bump_versions_on_commit__after_commit__bumps_versions(bump_versions):
+    session = Mock(info={})
+
+    # Act
+    cache.bump_versions_on_commit(session, 'namespace', ['key1', 'key2'])
+    cache.bump_versions_on_commit(session, 'namespace', ['key2'])
+    cache.__bump_versions_after_commit(session)
+
+    # Assert
+    bump_versions.assert_called_once_with('namespace', {'key1', 'key2'})
+    assert session.info == {}
+
+
+@pytest.mark.parametrize('end_transaction', (
+    lambda session: session.rollback(),
+    lambda session: session.close(),
+))
+@patch('origin.cache.bump_versions')
+def test__bump_versions_on_commit__transaction_not_committed__does_not_bump_versions(
+        bump_versions, end_transaction):
+
+    session = get_session()
+    session.execute('SELECT 1')
+
+    # Act
+    cache.bump_versions_on_commit(session, 'namespace', ['key1'])
+    end_transaction(session)
+    session.execute('SELECT 1')
+    session.commit()
+
+    # Assert
+    bump_versions.assert_not_called()
+    assert session.info == {}
+
+
+@patch('origin.cache.redis')
+def test__get_versions__returns_zero_for_missing_versions(redis):
+    redis.mget.return_value = [b'3', None]
+
+    # Act
+    result = cache.get_versions('namespace', ['key1', 'key2'])
+
+    # Assert
+    assert result == [3, 0]
+    redis.mget.assert_called_once_with(
+        ['version:namespace:key1', 'version:namespace:key2'])
+
+
+@patch('origin.cache.time')
+def test__TTLCache__get__entry_expired__returns_default(time):
+    uut = cache.TTLCache(max_bytes=1024)
+
+    # Act
+    time.monotonic.return_value = 100
+    uut.set('key', [1, 2, 3], ttl=10)
+    value1 = uut.get('key')
+
+    time.monotonic.return_value = 110
+    value2 = uut.get('key')
+
+    # Assert
+    assert value1 == [1, 2, 3]
+    assert value2 is None
+    assert uut.stats()['hits'] == 1
+    assert uut.stats()['misses'] == 1
+    assert uut.stats()['entries'] == 0
+    assert uut.stats()['bytes'] == 0
+
+
+def test__TTLCache__exceeds_max_bytes__evicts_least_recently_used():
+    entry_size = len(cache.pickle.dumps('x' * 100, protocol=cache.pickle.HIGHEST_PROTOCOL))
+    uut = cache.TTLCache(max_bytes=entry_size * 2)
+
+    # Act
+    uut.set('key1', 'x' * 100, ttl=60)
+    uut.set('key2', 'x' * 100, ttl=60)
+    uut.get('key1')
+    uut.set('key3', 'x' * 100, ttl=60)
+
+    # Assert
+    assert uut.get('key1') is not None
+    assert uut.get('key2') is None
+    assert uut.get('key3') is not None
+    assert uut.stats()['evictions'] == 1
+    assert uut.stats()['bytes'] == entry_size * 2
+
+
+def test__TTLCache__set__value_larger_than_max_bytes__is_not_cached():
+    uut = cache.TTLCache(max_bytes=10)
+
+    # Act
+    uut.set('key', 'x' * 100, ttl=60)
+
+    # Assert
+    assert uut.get('key') is None
+    assert uut.stats()['bytes'] == 0
+
+
+def test__TTLCache__set__ttl_is_zero__is_not_cached():
+    uut = cache.TTLCache(max_bytes=1024)
+
+    # Act
+    uut.set('key', 'value', ttl=0)
+
+    # Assert
+    assert uut.get('key') is None
+
+
+def test__TTLCache__get__returns_copy_of_value():
+    uut = cache.TTLCache(max_bytes=1024)
+    uut.set('key', [1, 2], ttl=60)
+
+    # Act
+    uut.get('key').append(3)
+
+    # Assert
+    assert uut.get('key') == [1, 2]
+
+
+def test__TTLCache__exceeds_max_size__evicts_least_recently_used():
+    uut = cache.TTLCache(max_size=2)
+
+    # Act
+    uut.set('key1', 'value1', ttl=60)
+    uut.set('key2', 'value2', ttl=60)
+    uut.get('key1')
+    uut.set('key3', 'value3', ttl=60)
+
+    # Assert
+    assert uut.get('key1') == 'value1'
+    assert uut.get('key2') is None
+    assert uut.get('key3') == 'value3'
+    assert uut.stats()['entries'] == 2
+    assert uut.stats()['evictions'] == 1
+
+
+def test__TTLCache__delete__removes_entry():
+    uut = cache.TTLCache(max_size=10)
+    uut.set('key', 'value', ttl=60)
+
+    # Act
+    uut.delete('key')
+    uut.delete('unknown-key')
+
+    # Assert
+    assert uut.get('key') is None
+    assert uut.stats()['bytes'] == 0
+
+
+@patch('origin.cache.caches', new_callable=dict)
+def test__get_cache_stats__returns_stats_of_named_caches(caches):
+    named = cache.TTLCache(max_size=10, name='named')
+    cache.TTLCache(max_size=10)
+
+    named.set('key', 'value', ttl=60)
+    named.get('key')
+
+    # Act
+    stats = cache.get_cache_stats()
+
+    # Assert
+    assert list(stats) == ['named']
+    assert stats['named']['entries'] == 1
+    assert stats['named']['hits'] == 1
@@ -0,0 +1,139 @@
+import sqlalchemy as sa
+from unittest.mock import patch, Mock
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.ext.declarative import declarative_base
+
+from origin import db
+
+
+Base = declarative_base()
+
+
+class Thing(Base):
+    __tablename__ = 'thing'
+    id = sa.Column(sa.Integer(), primary_key=True)
+
+
+def get_scoped_session():
+    engine = sa.create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    return scoped_session(sessionmaker(bind=engine, expire_on_commit=False))
+
+
+def test__has_writes__tracks_flushed_writes_until_commit():
+    session = get_scoped_session()()
+
+    # Act + Assert
+    assert not db.has_writes(session)
+
+    session.add(Thing())
+    assert db.has_writes(session)
+
+    session.flush()
+    assert db.has_writes(session)
+
+    session.commit()
+    assert not db.has_writes(session)
+
+
+def test__has_writes__rollback__resets_writes():
+    session = get_scoped_session()()
+    session.add(Thing())
+    session.flush()
+
+    # Act
+    session.rollback()
+
+    # Assert
+    assert not db.has_writes(session)
+
+
+def test__has_writes__close__resets_writes():
+    session = get_scoped_session()()
+    session.add(Thing())
+    session.flush()
+
+    # Act
+    session.close()
+
+    # Assert
+    assert not db.has_writes(session)
+    assert session.info == {}
+
+
+def test__inject_read_session__no_session_provided__injects_and_closes_read_session():
+    primary = get_scoped_session()
+    replica = get_scoped_session()
+    func = Mock()
+
+    # Act
+    with patch('origin.db.Session', primary), patch('origin.db.ReadSession', replica):
+        db.inject_read_session(func)()
+
+    # Assert
+    assert func.call_args[1]['session'] is replica()
+    assert not primary.registry.has()
+
+
+def test__inject_read_session__session_provided__uses_provided_session():
+    session = Mock()
+    func = Mock()
+
+    # Act
+    db.inject_read_session(func)(session=session)
+
+    # Assert
+    func.assert_called_once_with(session=session)
+    session.close.assert_not_called()
+
+
+def test__inject_read_session__primary_session_has_writes__injects_primary_session():
+    primary = get_scoped_session()
+    replica = get_scoped_session()
+    func = Mock()
+
+    primary().add(Thing())
+    primary().flush()
+
+    # Act
+    with patch('origin.db.Session', primary), patch('origin.db.ReadSession', replica):
+        db.inject_read_session(func)()
+
+    # Assert
+    assert func.call_args[1]['session'] is primary()
+    assert db.has_writes(primary())
+
+
+def test__inject_read_session__primary_session_without_writes__injects_read_session():
+    primary = get_scoped_session()
+    replica = get_scoped_session()
+    func = Mock()
+
+    primary().add(Thing())
+    primary().commit()
+
+    # Act
+    with patch('origin.db.Session', primary), patch('origin.db.ReadSession', replica):
+        db.inject_read_session(func)()
+
+    # Assert
+    assert func.call_args[1]['session'] is replica()
+
+
+def test__inject_read_session__primary_session_flushed_and_closed__injects_read_session():
+    primary = get_scoped_session()
+    replica = get_scoped_session()
+    func = Mock()
+
+    # Eg. a request which flushed, but did not commit, before
+    # inject_session closed the (thread-local) session
+    primary().add(Thing())
+    primary().flush()
+    primary().close()
+
+    # Act
+    with patch('origin.db.Session', primary), patch('origin.db.ReadSession', replica):
+        db.inject_read_session(func)()
+
+    # Assert
+    assert func.call_args[1]['session'] is replica()
@@ -0,0 +1,208 @@
+import json
+import pytest
+from enum import Enum
+from itertools import product
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from origin.urls import urls
+from origin.ggo import Ggo, Technology, MappedGgo, GetGgoListResponse
+from origin.ggo.controllers import GetGgoList
+from origin.schemas import (
+    get_schema,
+    get_schema_class,
+    get_schema_instance,
+    get_dumper,
+)
+
+
+@dataclass
+class SomeDataclass:
+    name: str
+    amount: int
+
+
+# -- TEST CASES --------------------------------------------------------------
+
+
+def test__get_schema_class__called_twice__returns_same_schema_class():
+    assert get_schema_class(SomeDataclass) is get_schema_class(SomeDataclass)
+
+
+def test__get_schema_instance__called_twice__returns_same_instance():
+
+    # Arrange
+    schema_class = get_schema_class(SomeDataclass)
+
+    # Act
+    schema1 = get_schema_instance(schema_class)
+    schema2 = get_schema_instance(schema_class)
+
+    # Assert
+    assert isinstance(schema1, schema_class)
+    assert schema1 is schema2
+
+
+def test__get_schema__loads_and_dumps_dataclass():
+
+    # Arrange
+    uut = get_schema(SomeDataclass)
+
+    # Act
+    loaded = uut.load({'name': 'foo', 'amount': 10})
+    dumped = uut.dump(SomeDataclass(name='bar', amount=20))
+
+    # Assert
+    assert loaded == SomeDataclass(name='foo', amount=10)
+    assert dumped == {'name': 'bar', 'amount': 20}
+
+
+# -- Precompiled dumpers (conformance with Schema.dump) ----------------------
+
+
+class SomeEnum(Enum):
+    A = 'a'
+    B = 'b'
+
+
+@dataclass
+class SomeNestedDataclass:
+    value: float
+    when: datetime = field(default=None)
+
+
+@dataclass
+class SomeComplexDataclass:
+    name: str
+    amount: int
+    ratio: float
+    flag: bool
+    begin: datetime
+    enum: SomeEnum = field(metadata=dict(by_value=True))
+    nested: SomeNestedDataclass
+    nested_list: List[SomeNestedDataclass]
+    strings: List[str]
+    mapping: Dict[str, float]
+    optional_name: Optional[str] = field(default=None, metadata=dict(data_key='optionalName'))
+    optional_nested: Optional[SomeNestedDataclass] = field(default=None)
+
+
+SOME_COMPLEX_OBJECTS = (
+    SomeComplexDataclass(
+        name='æøå "quoted" \n',
+        amount=123,
+        ratio=0.1,
+        flag=True,
+        begin=datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+        enum=SomeEnum.B,
+        nested=SomeNestedDataclass(value=1.5, when=datetime(2020, 1, 1, 12, 30, 15, 123)),
+        nested_list=[SomeNestedDataclass(value=1), SomeNestedDataclass(value=2e-10)],
+        strings=['a', 'b'],
+        mapping={'CO2': 1.23456789, 'NOx': 0},
+        optional_name='name',
+        optional_nested=SomeNestedDataclass(value=3),
+    ),
+    SomeComplexDataclass(
+        name='',
+        amount=0,
+        ratio=0,
+        flag=False,
+        begin=datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone(timedelta(hours=2))),
+        enum=SomeEnum.A,
+        nested=SomeNestedDataclass(value=0),
+        nested_list=[],
+        strings=[],
+        mapping={},
+    ),
+)
+
+
+def get_ggos():
+    technology = Technology(
+        technology='Wind',
+        technology_code='T010101',
+        fuel_code='F01010101',
+    )
+
+    for i, (issued, tech) in enumerate(product((True, False), (technology, None))):
+        yield Ggo(
+            id=i,
+            address=f'address-{i}',
+            issue_time=datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+            expire_time=datetime(2020, 6, 1, 0, 0, 0, tzinfo=timezone.utc),
+            begin=datetime(2020, 1, 1, i, 0, 0, tzinfo=timezone.utc),
+            end=datetime(2020, 1, 1, i + 1, 0, 0, tzinfo=timezone.utc),
+            amount=100 + i,
+            sector='DK1',
+            technology_code='T010101',
+            fuel_code='F01010101',
+            technology=tech,
+            emissions={'CO2': 12.5} if issued else None,
+            issued=issued,
+            issue_gsrn='GSRN1' if issued else None,
+        )
+
+
+@pytest.mark.parametrize('obj', SOME_COMPLEX_OBJECTS)
+def test__get_dumper__complex_dataclass__produces_same_json_as_schema(obj):
+    schema_class = get_schema_class(SomeComplexDataclass)
+
+    # Act
+    expected = json.dumps(schema_class().dump(obj))
+    actual = json.dumps(get_dumper(schema_class)(obj))
+
+    # Assert
+    assert actual == expected
+
+
+@pytest.mark.parametrize('response', (
+    GetGgoListResponse(success=True),
+    GetGgoListResponse(success=True, total=4, results=list(get_ggos()), next_cursor='CURSOR'),
+    GetGgoListResponse(success=True, results=[MappedGgo(
+        address='address',
+        sector='DK1',
+        begin=datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+        end=datetime(2020, 1, 1, 1, 0, 0, tzinfo=timezone.utc),
+        amount=100,
+        technology=None,
+    )]),
+))
+def test__get_dumper__GetGgoListResponse__produces_same_json_as_schema(response):
+    schema_class = GetGgoList.Response
+
+    # Act
+    expected = json.dumps(schema_class().dump(response))
+    actual = json.dumps(get_dumper(schema_class)(response))
+
+    # Assert
+    assert actual == expected
+
+
+@pytest.mark.parametrize('schema_class', [
+    schema_class
+    for _, controller in urls
+    for schema_class in (controller.Request, controller.Response)
+    if schema_class is not None
+])
+def test__get_dumper__all_controller_schemas__can_be_compiled(schema_class):
+    assert callable(get_dumper(schema_class))
+
+
+@pytest.mark.parametrize('response', (
+    GetGgoListResponse(success=True),
+    GetGgoListResponse(success=True, total=4, results=list(get_ggos()), next_cursor='CURSOR'),
+))
+def test__Controller__parse_response__fast_serialize__produces_identical_bytes(response):
+    uut = GetGgoList()
+
+    # Act
+    with patch.object(GetGgoList, 'FAST_SERIALIZE', False):
+        expected = uut.parse_response(response)
+
+    with patch.object(GetGgoList, 'FAST_SERIALIZE', True):
+        actual = uut.parse_response(response)
+
+    # Assert
+    assert actual.encode() == expected.encode()
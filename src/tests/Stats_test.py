@@ -0,0 +1,70 @@
+from unittest.mock import patch
+
+from origin import stats
+from origin.app import app
+
+
+@patch('origin.stats.transport')
+@patch('origin.stats.get_cache_stats')
+def test__get_stats__returns_flattened_cache_and_pool_stats(get_cache_stats, transport):
+    get_cache_stats.return_value = {
+        'token': {'hits': 1, 'misses': 2},
+    }
+    transport.get_pool_stats.return_value = {
+        'https://ledger:443': {'requests': 3},
+    }
+
+    # Act
+    result = stats.get_stats()
+
+    # Assert
+    assert result == {
+        'cache.token.hits': 1,
+        'cache.token.misses': 2,
+        'pool.https://ledger:443.requests': 3,
+    }
+
+
+@patch('origin.stats.get_stats')
+@patch('origin.stats.logger')
+@patch('origin.stats.time')
+def test__StatsLogger__log_if_due__logs_at_most_once_per_interval(time, logger, get_stats):
+    get_stats.return_value = {'cache.token.hits': 1}
+
+    time.monotonic.return_value = 1000
+    uut = stats.StatsLogger(interval=60)
+
+    # Act
+    time.monotonic.return_value = 1059
+    uut.log_if_due()
+    calls_before_interval = logger.info.call_count
+
+    time.monotonic.return_value = 1060
+    uut.log_if_due()
+    uut.log_if_due()
+
+    # Assert
+    assert calls_before_interval == 0
+    logger.info.assert_called_once_with(
+        'In-process statistics', extra={'cache.token.hits': 1})
+
+
+@patch('origin.stats.logger')
+@patch('origin.stats.time')
+def test__StatsLogger__log_if_due__interval_is_zero__never_logs(time, logger):
+    time.monotonic.return_value = 1000
+    uut = stats.StatsLogger(interval=0)
+
+    # Act
+    time.monotonic.return_value = 100000
+    uut.log_if_due()
+
+    # Assert
+    logger.info.assert_not_called()
+
+
+@patch('origin.app.stats_logger')
+def test__app__after_request__logs_stats_if_due(stats_logger):
+    app.test_client().get('/does-not-exist')
+
+    stats_logger.log_if_due.assert_called_once()
@@ -0,0 +1,171 @@
+import json
+import time
+import pytest
+from unittest.mock import Mock, patch
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from origin.auth.token import TokenValidator, Token, token_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+def get_introspection_response(active=True, expire_in=3600):
+    return {
+        'active': active,
+        'sub': 'SUBJECT',
+        'scope': 'openid ggo.read',
+        'exp': int(time.time()) + expire_in,
+    }
+
+
+# -- TEST CASES --------------------------------------------------------------
+
+
+@patch('origin.auth.token.redis')
+@patch('origin.auth.token.transport')
+def test__TokenValidator__authenticate_token__active_token__returns_Token_and_caches_it(transport, redis):
+
+    # Arrange
+    transport.post.return_value = Mock(
+        status_code=200, json=Mock(return_value=get_introspection_response()))
+    redis.get.return_value = None
+
+    uut = TokenValidator()
+
+    # Act
+    token1 = uut.authenticate_token('TOKEN')
+    token2 = uut.authenticate_token('TOKEN')
+
+    # Assert
+    assert isinstance(token1, Token)
+    assert token1.subject == 'SUBJECT'
+    assert token2 == token1
+    transport.post.assert_called_once()
+    redis.set.assert_called_once()
+    assert 'TOKEN' not in redis.set.call_args[0][0]
+    assert 0 < redis.set.call_args[1]['ex'] <= 60
+
+
+@patch('origin.auth.token.redis')
+@patch('origin.auth.token.transport')
+def test__TokenValidator__authenticate_token__inactive_token__returns_None_and_caches_it(transport, redis):
+
+    # Arrange
+    transport.post.return_value = Mock(
+        status_code=200, json=Mock(return_value={'active': False}))
+    redis.get.return_value = None
+
+    uut = TokenValidator()
+
+    # Act
+    token1 = uut.authenticate_token('TOKEN')
+    token2 = uut.authenticate_token('TOKEN')
+
+    # Assert
+    assert token1 is None
+    assert token2 is None
+    transport.post.assert_called_once()
+    redis.set.assert_called_once()
+
+
+@patch('origin.auth.token.redis')
+@patch('origin.auth.token.transport')
+def test__TokenValidator__authenticate_token__token_cached_in_redis__does_not_introspect(transport, redis):
+
+    # Arrange
+    redis.get.return_value = json.dumps(get_introspection_response())
+    redis.ttl.return_value = 30
+
+    uut = TokenValidator()
+
+    # Act
+    token1 = uut.authenticate_token('TOKEN')
+    token2 = uut.authenticate_token('TOKEN')
+
+    # Assert
+    assert token1.subject == 'SUBJECT'
+    assert token2 == token1
+    transport.post.assert_not_called()
+    redis.get.assert_called_once()
+
+
+@patch('origin.auth.token.redis')
+@patch('origin.auth.token.transport')
+def test__TokenValidator__authenticate_token__token_expired__does_not_cache_it(transport, redis):
+
+    # Arrange
+    transport.post.return_value = Mock(
+        status_code=200, json=Mock(return_value=get_introspection_response(expire_in=-10)))
+    redis.get.return_value = None
+
+    uut = TokenValidator()
+
+    # Act
+    uut.authenticate_token('TOKEN')
+    uut.authenticate_token('TOKEN')
+
+    # Assert
+    assert transport.post.call_count == 2
+    redis.set.assert_not_called()
+
+
+@patch('origin.auth.token.redis')
+@patch('origin.auth.token.transport')
+def test__TokenValidator__authenticate_token__introspection_fails__returns_None_and_does_not_cache(transport, redis):
+
+    # Arrange
+    transport.post.return_value = Mock(status_code=500)
+    redis.get.return_value = None
+
+    uut = TokenValidator()
+
+    # Act
+    token = uut.authenticate_token('TOKEN')
+
+    # Assert
+    assert token is None
+    redis.set.assert_not_called()
+
+
+@patch('origin.auth.token.redis')
+@patch('origin.auth.token.transport')
+def test__TokenValidator__authenticate_token__redis_unavailable__introspects_and_caches_in_process(transport, redis):
+
+    # Arrange
+    transport.post.return_value = Mock(
+        status_code=200, json=Mock(return_value=get_introspection_response()))
+    redis.get.side_effect = RedisConnectionError()
+    redis.set.side_effect = RedisConnectionError()
+
+    uut = TokenValidator()
+
+    # Act
+    token1 = uut.authenticate_token('TOKEN')
+    token2 = uut.authenticate_token('TOKEN')
+
+    # Assert
+    assert token1.subject == 'SUBJECT'
+    assert token2 == token1
+    transport.post.assert_called_once()
+
+
+@patch('origin.auth.token.transport')
+def test__TokenValidator__introspect_token__uses_shared_transport(transport):
+
+    # Arrange
+    transport.post.return_value = Mock(
+        status_code=200, json=Mock(return_value=get_introspection_response()))
+
+    uut = TokenValidator()
+
+    # Act
+    json_response = uut.introspect_token('TOKEN')
+
+    # Assert
+    assert json_response['sub'] == 'SUBJECT'
+    assert transport.post.call_args[1]['data']['token'] == 'TOKEN'
@@ -0,0 +1,134 @@
+import pytest
+import numpy as np
+
+from origin.common import EmissionValues, EmissionMatrix
+
+
+def test__EmissionMatrix__from_dicts__rows_keep_their_own_keys():
+
+    # Act
+    uut = EmissionMatrix.from_dicts([
+        {'CO2': 1, 'CH4': 2},
+        {'CO2': 3},
+        None,
+    ])
+
+    # Assert
+    assert uut.keys == ('CH4', 'CO2')
+    assert uut.to_dicts() == [
+        EmissionValues(CO2=1, CH4=2),
+        EmissionValues(CO2=3),
+        EmissionValues(),
+    ]
+
+
+def test__EmissionMatrix__from_dicts__value_is_None__counts_as_zero():
+
+    # Act
+    uut = EmissionMatrix.from_dicts([{'CO2': None}])
+
+    # Assert
+    assert uut.row(0) == {'CO2': 0}
+
+
+def test__EmissionMatrix__invalid_shape__should_raise_ValueError():
+    with pytest.raises(ValueError):
+        EmissionMatrix(keys=('CO2',), values=np.zeros((2, 2)))
+
+
+def test__EmissionMatrix__add_two_together__returns_same_result_as_EmissionValues():
+    ev1 = [EmissionValues(CO2=1, CH4=2), EmissionValues(CO2=3), EmissionValues()]
+    ev2 = [EmissionValues(CO2=10), EmissionValues(NOX=20), EmissionValues()]
+
+    # Act
+    result = EmissionMatrix.from_dicts(ev1) + EmissionMatrix.from_dicts(ev2)
+
+    # Assert
+    assert result.to_dicts() == [a + b for a, b in zip(ev1, ev2)]
+
+
+def test__EmissionMatrix__add_matrices_with_different_number_of_rows__should_raise_ValueError():
+    with pytest.raises(ValueError):
+        EmissionMatrix.from_dicts([{'CO2': 1}]) + EmissionMatrix.from_dicts([])
+
+
+@pytest.mark.parametrize('i', (0, 1, 2.5, np.int64(3), np.float64(4.5)))
+def test__EmissionMatrix__multiply_and_divide_by_number(i):
+    uut = EmissionMatrix.from_dicts([{'CO2': 1, 'CH4': 2}, {'CO2': 3}])
+
+    # Act
+    multiplied = uut * i
+    reverse_multiplied = i * uut
+    divided = uut / 2
+
+    # Assert
+    assert multiplied.to_dicts() == [{'CO2': 1 * i, 'CH4': 2 * i}, {'CO2': 3 * i}]
+    assert reverse_multiplied.to_dicts() == multiplied.to_dicts()
+    assert divided.to_dicts() == [{'CO2': 0.5, 'CH4': 1}, {'CO2': 1.5}]
+
+
+def test__EmissionMatrix__multiply_by_sequence__multiplies_each_row_by_its_factor():
+    uut = EmissionMatrix.from_dicts([{'CO2': 1, 'CH4': 2}, {'CO2': 3}])
+
+    # Act
+    result = uut * [10, 100]
+
+    # Assert
+    assert result.to_dicts() == [{'CO2': 10, 'CH4': 20}, {'CO2': 300}]
+
+
+def test__EmissionMatrix__multiply_by_sequence_of_wrong_length__should_raise_ValueError():
+    uut = EmissionMatrix.from_dicts([{'CO2': 1}, {'CO2': 3}])
+
+    with pytest.raises(ValueError):
+        uut * [1, 2, 3]
+
+
+def test__EmissionMatrix__take__returns_rows_at_indexes():
+    uut = EmissionMatrix.from_dicts([{'CO2': 1}, {'CH4': 2}])
+
+    # Act
+    result = uut.take([1, 1, 0])
+
+    # Assert
+    assert result.to_dicts() == [{'CH4': 2}, {'CH4': 2}, {'CO2': 1}]
+
+
+def test__EmissionMatrix__group_sum__sums_rows_per_group():
+    uut = EmissionMatrix.from_dicts([
+        {'CO2': 1},
+        {'CO2': 2, 'CH4': 3},
+        {'CH4': 4},
+    ])
+
+    # Act
+    result = uut.group_sum(groups=[0, 2, 0], count=3)
+
+    # Assert
+    assert result.to_dicts() == [
+        {'CO2': 1, 'CH4': 4},
+        {},
+        {'CO2': 2, 'CH4': 3},
+    ]
+
+
+def test__EmissionMatrix__sum__returns_same_result_as_summing_EmissionValues():
+    values = [EmissionValues(CO2=1, CH4=2), EmissionValues(NOX=3)]
+
+    # Act
+    result = EmissionMatrix.from_dicts(values).sum()
+
+    # Assert
+    assert isinstance(result, EmissionValues)
+    assert result == sum(values, EmissionValues())
+
+
+def test__EmissionMatrix__reindex__adds_empty_columns_and_drops_others():
+    uut = EmissionMatrix.from_dicts([{'CO2': 1, 'CH4': 2}])
+
+    # Act
+    result = uut.reindex(('CO2', 'NOX'))
+
+    # Assert
+    assert result.keys == ('CO2', 'NOX')
+    assert result.to_dicts() == [{'CO2': 1}]
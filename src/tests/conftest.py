@@ -15,7 +15,7 @@ from origin.tasks import celery_app
 
 @pytest.fixture(scope='module')
 def session():
-    with PostgresContainer('postgres:9.6') as psql:
+    with PostgresContainer('postgres:12') as psql:
         engine = create_engine(psql.get_connection_url())
         ModelBase.metadata.create_all(engine)
         Session = sessionmaker(bind=engine, expire_on_commit=False)
@@ -0,0 +1,145 @@
+import pytest
+from datetime import datetime, timezone, timedelta
+
+from origin.common import EmissionValues
+from origin.eco import EcoDeclarationResolution
+from origin.eco.declaration import EcoDeclaration, ColumnarEcoDeclaration
+
+
+utc = timezone.utc
+
+begin1 = datetime(2020, 1, 1, 22, 0, tzinfo=utc)
+begin2 = datetime(2020, 1, 1, 23, 0, tzinfo=utc)
+begin3 = datetime(2020, 1, 2, 0, 0, tzinfo=utc)
+
+
+def get_declaration():
+    return EcoDeclaration(
+        emissions={
+            begin1: EmissionValues(CO2=1, NO2=2),
+            begin2: EmissionValues(CO2=3, NO2=4),
+            begin3: EmissionValues(CO2=5, NO2=6),
+        },
+        consumed_amount={begin1: 10, begin2: 20, begin3: 0},
+        retired_amount={begin1: 5, begin3: 0},
+        technologies={
+            begin1: EmissionValues(Solar=10),
+            begin2: EmissionValues(Solar=5, Wind=15),
+            begin3: EmissionValues(),
+        },
+        resolution=EcoDeclarationResolution.hour,
+        utc_offset=0,
+    )
+
+
+def test__ColumnarEcoDeclaration__to_declaration__returns_same_declaration():
+    declaration = get_declaration()
+
+    # Act
+    result = ColumnarEcoDeclaration \
+        .from_declaration(declaration) \
+        .to_declaration()
+
+    # Assert
+    assert result.emissions == declaration.emissions
+    assert result.consumed_amount == declaration.consumed_amount
+    assert result.retired_amount == {begin1: 5, begin2: 0, begin3: 0}
+    assert result.technologies == declaration.technologies
+
+
+def test__ColumnarEcoDeclaration__as_resolution__day_in_utc():
+    uut = ColumnarEcoDeclaration.from_declaration(get_declaration())
+
+    # Act
+    result = uut.as_resolution(EcoDeclarationResolution.day, 0).to_declaration()
+
+    # Assert
+    day1 = datetime(2020, 1, 1, tzinfo=utc)
+    day2 = datetime(2020, 1, 2, tzinfo=utc)
+
+    assert result.emissions == {
+        day1: {'CO2': 1 + 3, 'NO2': 2 + 4},
+        day2: {'CO2': 5, 'NO2': 6},
+    }
+    assert result.consumed_amount == {day1: 30, day2: 0}
+    assert result.retired_amount == {day1: 5, day2: 0}
+    assert result.technologies == {
+        day1: {'Solar': 15, 'Wind': 15},
+        day2: {},
+    }
+
+
+def test__ColumnarEcoDeclaration__as_resolution__day_with_utc_offset__buckets_by_local_time():
+    uut = ColumnarEcoDeclaration.from_declaration(get_declaration())
+
+    # Act
+    result = uut.as_resolution(EcoDeclarationResolution.day, 1).to_declaration()
+
+    # Assert
+    tz = timezone(timedelta(hours=1))
+    day1 = datetime(2020, 1, 1, tzinfo=tz)
+    day2 = datetime(2020, 1, 2, tzinfo=tz)
+
+    # begin1 is 23:00 on Jan 1st, begin2 and begin3 are on Jan 2nd (UTC+1)
+    assert result.consumed_amount == {day1: 10, day2: 20}
+    assert list(result.consumed_amount.keys())[0].utcoffset() == timedelta(hours=1)
+
+
+def test__ColumnarEcoDeclaration__as_resolution__naive_begins__returns_naive_begins():
+    declaration = EcoDeclaration(
+        emissions={datetime(2020, 1, 1, 1, 0): EmissionValues(CO2=1)},
+        consumed_amount={datetime(2020, 1, 1, 1, 0): 10},
+        retired_amount={},
+        technologies={datetime(2020, 1, 1, 1, 0): EmissionValues(Solar=10)},
+        resolution=EcoDeclarationResolution.hour,
+        utc_offset=0,
+    )
+
+    # Act
+    result = ColumnarEcoDeclaration \
+        .from_declaration(declaration) \
+        .as_resolution(EcoDeclarationResolution.year, 0) \
+        .to_declaration()
+
+    # Assert
+    assert result.consumed_amount == {datetime(2020, 1, 1): 10}
+
+
+def test__ColumnarEcoDeclaration__as_resolution__resolution_all__should_raise_ValueError():
+    uut = ColumnarEcoDeclaration.from_declaration(get_declaration())
+
+    with pytest.raises(ValueError):
+        uut.as_resolution(EcoDeclarationResolution.all, 0)
+
+
+def test__ColumnarEcoDeclaration__to_mapped__returns_same_values_as_EcoDeclaration():
+    declaration = get_declaration()
+
+    # Act
+    mapped = ColumnarEcoDeclaration.from_declaration(declaration).to_mapped()
+
+    # Assert
+    assert mapped.emissions == declaration.emissions
+    assert mapped.emissions_per_wh == declaration.emissions_per_wh
+    assert mapped.consumed_amount == declaration.consumed_amount
+    assert mapped.technologies == declaration.technologies
+    assert mapped.total_emissions == declaration.total_emissions
+    assert mapped.total_emissions_per_wh == declaration.total_emissions_per_wh
+    assert mapped.total_consumed_amount == declaration.total_consumed_amount
+    assert mapped.total_retired_amount == declaration.total_retired_amount
+    assert mapped.total_technologies == declaration.total_technologies
+
+
+def test__ColumnarEcoDeclaration__from_mapped__returns_same_declaration():
+    declaration = get_declaration()
+    mapped = ColumnarEcoDeclaration.from_declaration(declaration).to_mapped()
+
+    # Act
+    result = ColumnarEcoDeclaration \
+        .from_mapped(mapped, EcoDeclarationResolution.hour, 0) \
+        .to_declaration()
+
+    # Assert
+    assert result.emissions == declaration.emissions
+    assert result.consumed_amount == declaration.consumed_amount
+    assert result.technologies == declaration.technologies
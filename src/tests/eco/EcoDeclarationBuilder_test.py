@@ -369,12 +369,16 @@ def test__EcoDeclarationBuilder__build_general_declaration():
     }
 
 
+@patch('origin.services.energytypes.cache.redis')
 @patch('origin.eco.builder.datahub_service')
 @patch('origin.eco.builder.energytype_service')
-def test__EcoDeclarationBuilder__integration(energytype_service_mock, datahub_service_mock):
+def test__EcoDeclarationBuilder__integration(energytype_service_mock, datahub_service_mock, redis_mock):
 
     # -- Arrange -------------------------------------------------------------
 
+    # Nothing cached
+    redis_mock.hmget.side_effect = lambda key, fields: [None] * len(fields)
+
     uut = EcoDeclarationBuilder()
 
     user = Mock()
@@ -0,0 +1,102 @@
+from unittest.mock import patch, Mock
+from datetime import datetime, timezone
+
+from origin.common import EmissionValues, DateTimeRange
+from origin.eco import EcoDeclarationResolution
+from origin.eco.declaration import EcoDeclaration
+from origin.eco.cache import (
+    EcoDeclarationCache,
+    serialize_declarations,
+    deserialize_declarations,
+)
+
+
+utc = timezone.utc
+
+begin1 = datetime(2020, 1, 1, 0, 0, tzinfo=utc)
+begin2 = datetime(2020, 1, 1, 1, 0, tzinfo=utc)
+
+begin_range = DateTimeRange(begin=begin1, end=begin2)
+
+
+def get_declaration(factor):
+    return EcoDeclaration(
+        emissions={
+            begin1: EmissionValues(CO2=1 * factor, NOX=None),
+            begin2: EmissionValues(CO2=3 * factor, NOX=4 * factor),
+        },
+        consumed_amount={begin1: 10 * factor, begin2: 20 * factor},
+        retired_amount={begin1: 5 * factor, begin2: 0},
+        technologies={
+            begin1: EmissionValues(Solar=10 * factor),
+            begin2: EmissionValues(Solar=5 * factor, Wind=15 * factor),
+        },
+        resolution=EcoDeclarationResolution.hour,
+        utc_offset=0,
+    )
+
+
+def test__serialize_declarations__deserialize__returns_same_declarations():
+    individual = get_declaration(1)
+    general = get_declaration(2)
+
+    # Act
+    result = deserialize_declarations(
+        serialize_declarations(individual, general))
+
+    # Assert
+    assert len(result) == 2
+
+    for actual, expected in zip(result, (individual, general)):
+        assert actual.emissions == expected.emissions
+        assert actual.consumed_amount == expected.consumed_amount
+        assert actual.retired_amount == expected.retired_amount
+        assert actual.technologies == expected.technologies
+        assert actual.resolution == expected.resolution
+        assert actual.utc_offset == expected.utc_offset
+        assert list(actual.consumed_amount.keys())[0].tzinfo is not None
+
+
+@patch('origin.eco.cache.get_versions')
+def test__EcoDeclarationCache__get_key__depends_on_versions(get_versions):
+    uut = EcoDeclarationCache()
+    user = Mock(id=1)
+
+    # Act
+    get_versions.return_value = [0, 0]
+    key1 = uut.get_key(user, ['GSRN2', 'GSRN1'], begin_range)
+    key2 = uut.get_key(user, ['GSRN1', 'GSRN2'], begin_range)
+
+    get_versions.return_value = [0, 1]
+    key3 = uut.get_key(user, ['GSRN1', 'GSRN2'], begin_range)
+
+    # Assert
+    assert key1 == key2
+    assert key1 != key3
+    assert key1.startswith('eco-declaration:1:')
+    get_versions.assert_called_with('retired-ggos', ['GSRN1', 'GSRN2'])
+
+
+@patch('origin.eco.cache.redis')
+def test__EcoDeclarationCache__get__nothing_cached__returns_None(redis):
+    redis.get.return_value = None
+
+    # Act
+    result = EcoDeclarationCache().get('key')
+
+    # Assert
+    assert result is None
+
+
+@patch('origin.eco.cache.redis')
+def test__EcoDeclarationCache__set_then_get__returns_declarations(redis):
+    uut = EcoDeclarationCache()
+
+    # Act
+    uut.set('key', get_declaration(1), get_declaration(2))
+    redis.get.return_value = redis.set.call_args[0][1]
+    individual, general = uut.get('key')
+
+    # Assert
+    assert individual.consumed_amount == {begin1: 10, begin2: 20}
+    assert general.consumed_amount == {begin1: 20, begin2: 40}
@@ -0,0 +1,179 @@
+import time
+import pytest
+from unittest.mock import Mock, patch
+from werkzeug.exceptions import BadRequest
+
+from origin.app import app
+from origin.auth.token import Token
+from origin.ggo.composer import GgoComposer
+from origin.ggo.controllers import ComposeGgoBulk
+from origin.ggo.models import ComposeGgoRequest, TransferRequest, RetireRequest
+
+
+def get_composer(batch=None, recipients=(), error=None):
+    composer = Mock(Empty=GgoComposer.Empty, AmountUnavailable=GgoComposer.AmountUnavailable)
+    if error is not None:
+        composer.build_batch.side_effect = error
+    else:
+        composer.build_batch.return_value = (batch or Mock(), list(recipients))
+    return composer
+
+
+def get_uut(composers, users=None, meteringpoints=None):
+    uut = ComposeGgoBulk()
+    uut.get_ggos = Mock(side_effect=lambda user, composes, session: {
+        c.address: Mock(address=c.address) for c in composes})
+    uut.get_users = Mock(return_value=users or {})
+    uut.get_metering_points = Mock(return_value=meteringpoints or {})
+    uut.get_measurements = Mock(return_value=Mock())
+    uut.get_composer = Mock(side_effect=composers)
+    return uut
+
+
+# -- compose_bulk() ----------------------------------------------------------
+
+
+def test__ComposeGgoBulk__compose_bulk__returns_one_batch_per_compose():
+    user = Mock()
+    recipient = Mock(sub='SUB1')
+    session = Mock()
+
+    batch1, batch2 = Mock(), Mock()
+    ggo = Mock()
+    composer1 = get_composer(batch1, [(recipient, ggo)])
+    composer2 = get_composer(batch2)
+
+    uut = get_uut(
+        composers=[composer1, composer2],
+        users={'SUB1': recipient},
+        meteringpoints={'GSRN1': Mock()},
+    )
+
+    composes = [
+        ComposeGgoRequest(address='ADDRESS1', transfers=[
+            TransferRequest(amount=10, reference='REF', account='SUB1')], retires=[]),
+        ComposeGgoRequest(address='ADDRESS2', transfers=[], retires=[
+            RetireRequest(amount=20, gsrn='GSRN1')]),
+    ]
+
+    # Act
+    batches = uut.compose_bulk(user, composes, session=session)
+
+    # Assert
+    assert batches == [(batch1, [(recipient, ggo)]), (batch2, [])]
+    composer1.add_transfer.assert_called_once_with(recipient, 10, 'REF')
+    composer2.add_retire.assert_called_once()
+    session.add.assert_any_call(batch1)
+    session.add.assert_any_call(batch2)
+    session.commit.assert_called_once()
+
+
+@pytest.mark.parametrize('error', (GgoComposer.Empty, GgoComposer.AmountUnavailable))
+def test__ComposeGgoBulk__compose_bulk__compose_invalid__should_raise_BadRequest_and_roll_back(error):
+    session = Mock()
+    uut = get_uut(composers=[get_composer(), get_composer(error=error())])
+
+    composes = [
+        ComposeGgoRequest(address='ADDRESS1', transfers=[], retires=[]),
+        ComposeGgoRequest(address='ADDRESS2', transfers=[], retires=[]),
+    ]
+
+    # Act + Assert
+    with pytest.raises(BadRequest) as e:
+        uut.compose_bulk(Mock(), composes, session=session)
+
+    assert 'compose #1' in e.value.description
+    session.rollback.assert_called_once()
+    session.commit.assert_not_called()
+
+
+def test__ComposeGgoBulk__compose_bulk__account_unavailable__should_raise_BadRequest():
+    uut = get_uut(composers=[get_composer()])
+
+    composes = [
+        ComposeGgoRequest(address='ADDRESS1', transfers=[
+            TransferRequest(amount=10, reference='REF', account='UNKNOWN')], retires=[]),
+    ]
+
+    # Act + Assert
+    with pytest.raises(BadRequest):
+        uut.compose_bulk(Mock(), composes, session=Mock())
+
+
+def test__ComposeGgoBulk__get_ggos__same_address_twice__should_raise_BadRequest():
+    uut = ComposeGgoBulk()
+
+    composes = [
+        ComposeGgoRequest(address='ADDRESS1', transfers=[], retires=[]),
+        ComposeGgoRequest(address='ADDRESS1', transfers=[], retires=[]),
+    ]
+
+    # Act + Assert
+    with pytest.raises(BadRequest):
+        uut.get_ggos(Mock(), composes, Mock())
+
+
+# -- POST /ggo/compose-bulk --------------------------------------------------
+
+
+def get_token():
+    return Token({
+        'active': True,
+        'sub': 'SUBJECT',
+        'scope': 'ggo.transfer ggo.retire',
+        'exp': int(time.time()) + 3600,
+    })
+
+
+@patch('origin.ggo.controllers.start_handle_composed_ggo_pipeline')
+@patch.object(ComposeGgoBulk, 'compose_bulk')
+@patch('origin.auth.decorators._get_user')
+@patch('origin.auth.token.TokenValidator.validate_token')
+@patch('origin.auth.token.TokenValidator.authenticate_token')
+def test__POST_compose_bulk__starts_one_pipeline_per_batch(
+        authenticate_token, validate_token, get_user, compose_bulk, start_pipeline):
+
+    # Arrange
+    user = Mock()
+    batch1, batch2 = Mock(), Mock()
+    recipients1 = [(Mock(), Mock())]
+
+    authenticate_token.return_value = get_token()
+    get_user.return_value = user
+    compose_bulk.return_value = [(batch1, recipients1), (batch2, [])]
+
+    # Act
+    response = app.test_client().post(
+        '/ggo/compose-bulk',
+        json={'composes': [
+            {'address': 'ADDRESS1', 'transfers': [], 'retires': [{'amount': 10, 'gsrn': 'GSRN1'}]},
+            {'address': 'ADDRESS2', 'transfers': [], 'retires': [{'amount': 20, 'gsrn': 'GSRN1'}]},
+        ]},
+        headers={'Authorization': 'Bearer TOKEN'},
+    )
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json['success'] is True
+
+    composes = compose_bulk.call_args[0][1]
+    assert [c.address for c in composes] == ['ADDRESS1', 'ADDRESS2']
+
+    assert start_pipeline.call_count == 2
+    assert start_pipeline.call_args_list[0][0][:2] == (batch1, recipients1)
+    assert start_pipeline.call_args_list[1][0][:2] == (batch2, [])
+
+
+@patch('origin.auth.token.TokenValidator.validate_token')
+@patch('origin.auth.token.TokenValidator.authenticate_token')
+def test__POST_compose_bulk__no_composes__returns_400(authenticate_token, validate_token):
+    authenticate_token.return_value = get_token()
+
+    with patch('origin.auth.decorators._get_user', return_value=Mock()):
+        response = app.test_client().post(
+            '/ggo/compose-bulk',
+            json={'composes': []},
+            headers={'Authorization': 'Bearer TOKEN'},
+        )
+
+    assert response.status_code == 400
@@ -0,0 +1,272 @@
+import csv
+import json
+import time
+import pytest
+from io import StringIO
+from unittest.mock import Mock, patch
+from datetime import datetime, timedelta, timezone
+
+from origin.app import app
+from origin.auth import User
+from origin.auth.token import Token
+from origin.ggo import Ggo, GgoFilters
+from origin.ggo.controllers import ExportGgoList, chunked
+
+
+begin = datetime(2020, 1, 1, 0, 0, tzinfo=timezone.utc)
+end = datetime(2020, 1, 1, 1, 0, tzinfo=timezone.utc)
+expire_time = datetime(2020, 4, 1, 0, 0, tzinfo=timezone.utc)
+
+
+def get_rows(count):
+    return [
+        (f'address{i}', 'DK1', begin, end, i, 'T010101', 'F01010101',
+         'GSRN1', None, None, expire_time)
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize('items, size, expected', (
+    ([], 2, []),
+    ([1, 2, 3], 2, [[1, 2], [3]]),
+    ([1, 2, 3, 4], 2, [[1, 2], [3, 4]]),
+))
+def test__chunked__returns_correct_chunks(items, size, expected):
+    assert list(chunked(iter(items), size)) == expected
+
+
+@patch('origin.ggo.controllers.GGO_EXPORT_CHUNK_SIZE', 2)
+def test__ExportGgoList__render_ndjson__yields_one_json_object_per_line():
+    uut = ExportGgoList()
+
+    # Act
+    chunks = list(uut.render_ndjson(iter(get_rows(3))))
+
+    # Assert
+    assert len(chunks) == 2
+
+    lines = ''.join(chunks).splitlines()
+
+    assert len(lines) == 3
+    assert json.loads(lines[2]) == {
+        'address': 'address2',
+        'sector': 'DK1',
+        'begin': '2020-01-01T00:00:00+00:00',
+        'end': '2020-01-01T01:00:00+00:00',
+        'amount': 2,
+        'technologyCode': 'T010101',
+        'fuelCode': 'F01010101',
+        'issueGsrn': 'GSRN1',
+        'retireGsrn': None,
+        'retireAddress': None,
+        'expireTime': '2020-04-01T00:00:00+00:00',
+    }
+
+
+@patch('origin.ggo.controllers.GGO_EXPORT_CHUNK_SIZE', 2)
+def test__ExportGgoList__render_csv__yields_header_and_rows():
+    uut = ExportGgoList()
+
+    # Act
+    chunks = list(uut.render_csv(iter(get_rows(3))))
+
+    # Assert
+    assert len(chunks) == 2
+
+    rows = list(csv.reader(StringIO(''.join(chunks))))
+
+    assert len(rows) == 4
+    assert rows[0] == [name for name, _ in ExportGgoList.COLUMNS]
+    assert rows[1][0] == 'address0'
+    assert rows[3][2] == '2020-01-01T00:00:00+00:00'
+
+
+def test__ExportGgoList__render_csv__no_rows__yields_header_only():
+    uut = ExportGgoList()
+
+    # Act
+    chunks = list(uut.render_csv(iter([])))
+
+    # Assert
+    rows = list(csv.reader(StringIO(''.join(chunks))))
+
+    assert rows == [[name for name, _ in ExportGgoList.COLUMNS]]
+
+
+# -- get_rows() --------------------------------------------------------------
+
+
+user1 = User(
+    id=1,
+    sub='28a7240c-088e-4659-bd66-d76afb8c762f',
+    access_token='access_token',
+    refresh_token='access_token',
+    token_expire=datetime(2030, 1, 1, 0, 0, 0),
+    master_extended_key=(
+        'xprv9s21ZrQH143K2CK5syo8PdeX5Y4TYFkcU'
+        'KonHhm1e7znhaKj6odQFbbBa7T2Y77AtiNmU6'
+        'aatP2qJBTwvhqxvaSBHA9hEfZ5gViAS3bBj7F'
+    ),
+)
+
+user2 = User(
+    id=2,
+    sub='972cfd2e-cbd3-42e6-8e0e-c0c5c502f25f',
+    access_token='access_token',
+    refresh_token='access_token',
+    token_expire=datetime(2030, 1, 1, 0, 0, 0),
+    master_extended_key=(
+        'xprv9s21ZrQH143K2CK5syo8PdeX5Y4TYFkcU'
+        'KonHhm1e7znhaKj6odQFbbBa7T2Y77AtiNmU6'
+        'aatP2qJBTwvhqxvaSBHA9hEfZ5gViAS3bBj7F'
+    ),
+)
+
+
+@pytest.fixture(scope='module')
+def seeded_session(session):
+    session.add(user1)
+    session.add(user2)
+
+    # (id, user, sector, hours after "begin", synchronized)
+    ggos = (
+        (1, user1, 'DK1', 2, True),
+        (2, user1, 'DK2', 0, True),
+        (3, user1, 'DK1', 1, True),
+        (4, user1, 'DK1', 0, True),
+        (5, user1, 'DK1', 0, False),
+        (6, user2, 'DK1', 0, True),
+    )
+
+    for ggo_id, user, sector, hours, synchronized in ggos:
+        session.add(Ggo(
+            id=ggo_id,
+            user=user,
+            address=f'address{ggo_id}',
+            issue_time=begin,
+            expire_time=expire_time,
+            begin=begin + timedelta(hours=hours),
+            end=end + timedelta(hours=hours),
+            amount=ggo_id * 100,
+            sector=sector,
+            technology_code='T010101',
+            fuel_code='F01010101',
+            issued=False,
+            stored=True,
+            retired=False,
+            synchronized=synchronized,
+            locked=False,
+        ))
+
+    session.flush()
+    session.commit()
+
+    yield session
+
+
+@patch('origin.ggo.controllers.make_read_session')
+def test__ExportGgoList__get_rows__returns_non_pending_ggos_belonging_to_user_in_order(
+        make_read_session, seeded_session):
+
+    make_read_session.return_value = seeded_session
+    uut = ExportGgoList()
+
+    # Act
+    rows = list(uut.get_rows(user1, GgoFilters()))
+
+    # Assert
+    assert [row[0] for row in rows] == [
+        'address2', 'address4', 'address3', 'address1']
+
+    assert rows[0] == (
+        'address2', 'DK2', begin, end, 200, 'T010101', 'F01010101',
+        None, None, None, expire_time,
+    )
+
+
+@patch('origin.ggo.controllers.make_read_session')
+def test__ExportGgoList__get_rows__applies_filters(make_read_session, seeded_session):
+    make_read_session.return_value = seeded_session
+    uut = ExportGgoList()
+
+    # Act
+    rows = list(uut.get_rows(user1, GgoFilters(sector=['DK1'])))
+
+    # Assert
+    assert [row[0] for row in rows] == ['address4', 'address3', 'address1']
+
+
+@patch('origin.ggo.controllers.GgoQuery')
+@patch('origin.ggo.controllers.make_read_session')
+def test__ExportGgoList__get_rows__closes_session_when_done(make_read_session, ggo_query):
+    session = make_read_session.return_value
+
+    ggo_query.return_value.belongs_to.return_value.is_pending.return_value \
+        .apply_filters.return_value.order_by.return_value \
+        .with_entities.return_value.execution_options.return_value \
+        .yield_per.return_value = iter(get_rows(2))
+
+    uut = ExportGgoList()
+
+    # Act
+    rows = uut.get_rows(user1, GgoFilters())
+
+    # Assert: The session is only opened once rows are read
+    make_read_session.assert_not_called()
+    assert len(list(rows)) == 2
+    ggo_query.assert_called_once_with(session)
+    session.close.assert_called_once()
+
+
+# -- POST /ggo/export --------------------------------------------------------
+
+
+def get_token():
+    return Token({
+        'active': True,
+        'sub': user1.sub,
+        'scope': 'ggo.read',
+        'exp': int(time.time()) + 3600,
+    })
+
+
+@pytest.mark.parametrize('format, mimetype', (
+    ('ndjson', 'application/x-ndjson'),
+    ('csv', 'text/csv'),
+))
+@patch('origin.ggo.controllers.GGO_EXPORT_CHUNK_SIZE', 2)
+@patch.object(ExportGgoList, 'get_rows')
+@patch('origin.auth.decorators._get_user')
+@patch('origin.auth.token.TokenValidator.validate_token')
+@patch('origin.auth.token.TokenValidator.authenticate_token')
+def test__POST_export__streams_ggos_as_attachment(
+        authenticate_token, validate_token, get_user, get_rows_mock, format, mimetype):
+
+    # Arrange
+    authenticate_token.return_value = get_token()
+    get_user.return_value = user1
+    get_rows_mock.return_value = iter(get_rows(3))
+
+    # Act
+    response = app.test_client().post(
+        '/ggo/export',
+        json={'filters': {'sector': ['DK1']}, 'format': format},
+        headers={'Authorization': 'Bearer TOKEN'},
+    )
+
+    # Assert
+    assert response.status_code == 200
+    assert response.mimetype == mimetype
+    assert response.headers['Content-Disposition'] == f'attachment; filename=ggos.{format}'
+
+    user, filters = get_rows_mock.call_args[0]
+    assert user is user1
+    assert filters.sector == ['DK1']
+
+    body = response.get_data(as_text=True)
+
+    if format == 'csv':
+        assert len(list(csv.reader(StringIO(body)))) == 4
+    else:
+        assert [json.loads(line)['address'] for line in body.splitlines()] == [
+            'address0', 'address1', 'address2']
@@ -0,0 +1,82 @@
+import sqlalchemy as sa
+from unittest.mock import Mock, patch
+from datetime import datetime, timezone
+from sqlalchemy.dialects import postgresql
+
+from origin.ggo.archive import archive_ggos, get_archived_ggos_union, ggo_archive, is_archivable
+from origin.ggo import Ggo
+
+
+def test__ggo_archive__has_same_columns_as_ggo_table_plus_archived():
+    live_columns = [c.name for c in Ggo.__table__.columns]
+    archive_columns = [c.name for c in ggo_archive.columns]
+
+    assert archive_columns == live_columns + ['archived']
+    assert not ggo_archive.foreign_keys
+
+
+def test__get_archived_ggos_union__has_same_columns_as_ggo_table():
+    union = get_archived_ggos_union()
+
+    assert [c.name for c in union.columns] == [c.name for c in Ggo.__table__.columns]
+
+
+def test__is_archivable__excludes_ggos_with_live_children():
+    clause = is_archivable(datetime(2020, 1, 1, tzinfo=timezone.utc))
+    query = sa.select([Ggo.id]).where(clause)
+    sql = str(query.compile(dialect=postgresql.dialect()))
+
+    assert 'NOT (EXISTS (SELECT *' in sql
+    assert 'FROM ledger_transaction, ledger_split_target, ggo_ggo AS child' in sql
+    assert 'ledger_transaction.parent_ggo_id = ggo_ggo.id' in sql
+    assert 'ledger_split_target.transaction_id = ledger_transaction.id' in sql
+    assert 'child.id = ledger_split_target.ggo_id' in sql
+    assert 'child.begin = ggo_ggo.begin' in sql
+
+
+def test__archive_ggos__nothing_to_archive__returns_zero_and_moves_nothing():
+    session = Mock()
+    session.query.return_value.filter.return_value.order_by.return_value \
+        .limit.return_value.with_for_update.return_value = []
+
+    # Act
+    count = archive_ggos(session, datetime(2020, 1, 1, tzinfo=timezone.utc), 100)
+
+    # Assert
+    assert count == 0
+    session.execute.assert_not_called()
+
+
+@patch('origin.ggo.archive.apply_rollup_deltas')
+def test__archive_ggos__moves_rows_and_subtracts_ggos_from_rollup(apply_rollup_deltas):
+    begin = datetime(2019, 1, 1, 0, 0, tzinfo=timezone.utc)
+    expire_time = datetime(2019, 4, 1, 0, 0, tzinfo=timezone.utc)
+
+    ggo_rows = [
+        dict(
+            id=ggo_id, user_id=1, begin=begin, expire_time=expire_time,
+            amount=amount, issued=True, issue_gsrn='GSRN', stored=False,
+            retired=False, retire_gsrn=None, retire_address=None,
+            sector='DK1', technology_code='T010101', fuel_code='F01010101',
+        )
+        for ggo_id, amount in ((1, 100), (2, 200))
+    ]
+
+    session = Mock()
+    session.query.return_value.filter.return_value.order_by.return_value \
+        .limit.return_value.with_for_update.return_value = [Mock(id=1), Mock(id=2)]
+
+    # Split targets, transactions and GGOs are deleted (returning the
+    # deleted rows), and each non-empty result is inserted into its archive
+    session.execute.return_value.fetchall.side_effect = [[], [], ggo_rows]
+
+    # Act
+    count = archive_ggos(session, datetime(2020, 1, 1, tzinfo=timezone.utc), 100)
+
+    # Assert
+    assert count == 2
+    assert session.execute.call_count == 4
+
+    apply_rollup_deltas.assert_called_once()
+    _, deltas = apply_rollup_deltas.call_args[0]
+    assert list(deltas.values()) == [(-300, -2)]
@@ -225,6 +225,38 @@ def test__GgoComposer__add_retire__should_retire_actual_amount(
         assert composer.retires[0][2] == actual
 
 
+@patch('origin.ggo.composer.datahub_service')
+def test__GgoComposer__add_retire__with_MeasurementCache__should_use_cache_and_register_retired_amount(datahub):
+
+    # Arrange
+    sector = 'DK1'
+    begin = datetime(2020, 1, 1, 0, 0, 0)
+
+    ggo = Mock(amount=100, begin=begin, sector=sector, user_id=1)
+    ggo.is_tradable.return_value = True
+    ggo.is_expired.return_value = False
+
+    measurement = Mock(sector=sector, begin=begin, amount=200)
+    meteringpoint = Mock(user_id=1, gsrn='GSRN1', type=MeteringPointType.CONSUMPTION)
+
+    measurements = Mock()
+    measurements.get_consumption.return_value = measurement
+    measurements.get_retired_amount.return_value = 50
+
+    composer = GgoComposer(ggo=ggo, session=Mock(), measurements=measurements)
+
+    # Act
+    composer.add_retire(meteringpoint=meteringpoint, amount=100)
+
+    # Assert
+    datahub.get_consumption.assert_not_called()
+    measurements.get_consumption.assert_called_once_with('GSRN1', begin)
+    measurements.get_retired_amount.assert_called_once_with(measurement)
+    measurements.add_retired_amount.assert_called_once_with(measurement, 100)
+    assert composer.retires[0][0] is measurement
+    assert composer.retires[0][2] == 100
+
+
 # -- build_batch() -----------------------------------------------------------
 
 
@@ -1,6 +1,6 @@
 import pytest
 import marshmallow_dataclass as md
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 from datetime import datetime, timezone
 
 from origin.auth import User, MeteringPoint
@@ -114,6 +114,33 @@ def test__GgoImportController__map_imported_ggo__maps_Ggo_correctly():
     assert mapped_ggo.locked is False
 
 
+@patch('origin.ggo.importing.datahub_service')
+@patch.object(GgoImportController, 'insert_ggos')
+def test__GgoImportController__import_ggos__inserts_ggos_in_chunks(insert_ggos, datahub_service):
+
+    def __get_ggo_list(access_token, request):
+        datahub_response_schema = md.class_schema(GetGgoListResponse)
+        datahub_response = datahub_response_schema()
+        return datahub_response.loads(IMPORT_GGO_DATA1)
+
+    # Arrange
+    datahub_service.get_ggo_list.side_effect = __get_ggo_list
+    insert_ggos.side_effect = lambda ggos, session: ggos
+    begin_from = datetime(2020, 9, 1, 0, 0, tzinfo=timezone.utc)
+    begin_to = datetime(2020, 9, 30, 23, 0, tzinfo=timezone.utc)
+    session = Mock()
+    uut = GgoImportController(chunk_size=100)
+
+    # Act
+    new_ggos = uut.import_ggos(user, '571313180400240049', begin_from, begin_to, session)
+
+    # Assert
+    assert len(new_ggos) == 720
+    assert insert_ggos.call_count == 8
+    assert [len(c[0][0]) for c in insert_ggos.call_args_list] == [100] * 7 + [20]
+    assert all(c[0][1] is session for c in insert_ggos.call_args_list)
+
+
 @patch('origin.ggo.importing.datahub_service')
 def test__GgoImportController__integration(datahub_service, seeded_session):
 
@@ -0,0 +1,105 @@
+import pytest
+from unittest.mock import Mock, patch
+from datetime import datetime, timezone, timedelta
+
+from origin.ggo.partitions import (
+    get_month,
+    add_months,
+    get_partition_name,
+    create_ggo_partition,
+    create_future_ggo_partitions,
+)
+
+
+def test__get_month__returns_first_moment_of_month_in_utc():
+    dt = datetime(2020, 3, 1, 0, 30, 0, tzinfo=timezone(timedelta(hours=1)))
+
+    assert get_month(dt) == datetime(2020, 2, 1, 0, 0, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize('month, months, expected', (
+    (datetime(2020, 1, 1, tzinfo=timezone.utc), 0, datetime(2020, 1, 1, tzinfo=timezone.utc)),
+    (datetime(2020, 1, 1, tzinfo=timezone.utc), 1, datetime(2020, 2, 1, tzinfo=timezone.utc)),
+    (datetime(2020, 11, 1, tzinfo=timezone.utc), 3, datetime(2021, 2, 1, tzinfo=timezone.utc)),
+    (datetime(2020, 12, 1, tzinfo=timezone.utc), 12, datetime(2021, 12, 1, tzinfo=timezone.utc)),
+))
+def test__add_months__returns_correct_month(month, months, expected):
+    assert add_months(month, months) == expected
+
+
+def test__get_partition_name__returns_correct_name():
+    month = datetime(2020, 3, 1, tzinfo=timezone.utc)
+
+    assert get_partition_name(month) == 'ggo_ggo_y2020m03'
+
+
+@patch('origin.ggo.partitions.is_partitioned')
+def test__create_future_ggo_partitions__table_not_partitioned__does_nothing(is_partitioned):
+    session = Mock()
+    is_partitioned.return_value = False
+
+    # Act
+    partitions = create_future_ggo_partitions(session, months=3)
+
+    # Assert
+    assert partitions == []
+    session.execute.assert_not_called()
+
+
+@patch('origin.ggo.partitions.datetime')
+@patch('origin.ggo.partitions.has_default_partition_rows')
+@patch('origin.ggo.partitions.is_partitioned')
+def test__create_future_ggo_partitions__creates_current_and_future_partitions(
+        is_partitioned, has_default_partition_rows, datetime_mock):
+
+    session = Mock()
+    is_partitioned.return_value = True
+    has_default_partition_rows.return_value = False
+    datetime_mock.side_effect = datetime
+    datetime_mock.now.return_value = datetime(2020, 11, 15, 12, 0, 0, tzinfo=timezone.utc)
+
+    # Act
+    partitions = create_future_ggo_partitions(session, months=2)
+
+    # Assert
+    assert partitions == [
+        'ggo_ggo_y2020m11',
+        'ggo_ggo_y2020m12',
+        'ggo_ggo_y2021m01',
+    ]
+
+    assert session.execute.call_count == 3
+    assert session.execute.call_args_list[2][0][0] == (
+        "CREATE TABLE IF NOT EXISTS ggo_ggo_y2021m01 PARTITION OF ggo_ggo "
+        "FOR VALUES FROM ('2021-01-01T00:00:00+00:00') TO ('2021-02-01T00:00:00+00:00')"
+    )
+
+
+@patch('origin.ggo.partitions.has_default_partition_rows')
+def test__create_ggo_partition__default_partition_has_rows_in_month__moves_rows_to_new_partition(
+        has_default_partition_rows):
+
+    session = Mock()
+    has_default_partition_rows.return_value = True
+    month = datetime(2021, 1, 1, tzinfo=timezone.utc)
+
+    # Act
+    create_ggo_partition(session, month)
+
+    # Assert
+    statements = [c[0][0] for c in session.execute.call_args_list]
+
+    assert statements == [
+        "ALTER TABLE ggo_ggo DETACH PARTITION ggo_ggo_default",
+        "CREATE TABLE IF NOT EXISTS ggo_ggo_y2021m01 PARTITION OF ggo_ggo "
+        "FOR VALUES FROM ('2021-01-01T00:00:00+00:00') TO ('2021-02-01T00:00:00+00:00')",
+        "INSERT INTO ggo_ggo_y2021m01 SELECT * FROM ggo_ggo_default "
+        "WHERE begin >= :begin AND begin < :end",
+        "DELETE FROM ggo_ggo_default WHERE begin >= :begin AND begin < :end",
+        "ALTER TABLE ggo_ggo ATTACH PARTITION ggo_ggo_default DEFAULT",
+    ]
+
+    assert session.execute.call_args_list[2][0][1] == {
+        'begin': month,
+        'end': datetime(2021, 2, 1, tzinfo=timezone.utc),
+    }
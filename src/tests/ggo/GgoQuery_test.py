@@ -196,6 +196,31 @@ def test__GgoQuery__begins_at__Ggo_does_not_exist__returs_nothing(seeded_session
     assert query.count() == 0
 
 
+@pytest.mark.parametrize('page_size', (1, 7, 100))
+def test__GgoQuery__ordered_after__paging_through_all_ggos__returns_same_ggos_as_offset(seeded_session, page_size):
+    query = GgoQuery(seeded_session) \
+        .belongs_to(user1) \
+        .is_stored(True)
+
+    # Act
+    actual = []
+    page = query.order_by(Ggo.begin, Ggo.id).limit(page_size).all()
+
+    while page:
+        actual.extend(ggo.id for ggo in page)
+        page = query \
+            .ordered_after(page[-1].begin, page[-1].id) \
+            .order_by(Ggo.begin, Ggo.id) \
+            .limit(page_size) \
+            .all()
+
+    # Assert
+    expected = [ggo.id for ggo in query.order_by(Ggo.begin, Ggo.id)]
+
+    assert len(expected) > 0
+    assert actual == expected
+
+
 @pytest.mark.parametrize('ggo_issued', (True, False))
 def test__GgoQuery__is_issued__returns_correct_ggos(seeded_session, ggo_issued):
     query = GgoQuery(seeded_session) \
@@ -277,6 +302,15 @@ def test__GgoQuery__is_locked__returns_correct_ggos(seeded_session, ggo_locked):
     assert all(ggo.locked == ggo_locked for ggo in query.all())
 
 
+@pytest.mark.parametrize('ggo_pending', (True, False))
+def test__GgoQuery__is_pending__returns_correct_ggos(seeded_session, ggo_pending):
+    query = GgoQuery(seeded_session) \
+        .is_pending(ggo_pending)
+
+    assert query.count() > 0
+    assert all((ggo.locked or not ggo.synchronized) == ggo_pending for ggo in query.all())
+
+
 def test__GgoQuery__is_tradable__returns_correct_ggos(seeded_session):
     query = GgoQuery(seeded_session) \
         .is_tradable()
@@ -305,6 +339,18 @@ def test__GgoQuery__get_total_amount__has_no_results__returns_zero(seeded_sessio
     assert query.get_total_amount() == 0
 
 
+def test__GgoQuery__get_total_amount_per_retire_address__returns_correct_amounts(seeded_session):
+    addresses = ['RETIRE-ADDRESS-1', 'RETIRE-ADDRESS-2']
+    query = GgoQuery(seeded_session) \
+        .is_retired_to_any_address(addresses)
+
+    amounts = query.get_total_amount_per_retire_address()
+
+    assert sorted(amounts.keys()) == addresses
+    assert all(amounts[address] == GgoQuery(seeded_session).is_retired_to_address(address).get_total_amount()
+               for address in addresses)
+
+
 def test__GgoQuery__get_distinct_begins__has_results__returns_list_of_correct_begins(seeded_session):
     query = GgoQuery(seeded_session)
     distinct_begins = query.get_distinct_begins()
@@ -0,0 +1,278 @@
+import pytest
+import sqlalchemy as sa
+from itertools import product
+from datetime import datetime, timedelta, timezone
+
+from origin.auth import User, MeteringPoint
+from origin.common import DateTimeRange
+from origin.ggo import (
+    Ggo,
+    GgoQuery,
+    GgoFilters,
+    GgoCategory,
+    SummaryResolution,
+    GgoSummaryRollupQuery,
+    GgoStoredRollup,
+)
+from origin.ggo.rollup import ROLLUP_KEY, get_stored_deltas
+
+
+GGO_AMOUNT = 100
+
+
+user1 = User(
+    id=1,
+    sub='28a7240c-088e-4659-bd66-d76afb8c762f',
+    access_token='access_token',
+    refresh_token='access_token',
+    token_expire=datetime(2030, 1, 1, 0, 0, 0),
+    master_extended_key=(
+        'xprv9s21ZrQH143K2CK5syo8PdeX5Y4TYFkcU'
+        'KonHhm1e7znhaKj6odQFbbBa7T2Y77AtiNmU6'
+        'aatP2qJBTwvhqxvaSBHA9hEfZ5gViAS3bBj7F'
+    ),
+)
+
+user2 = User(
+    id=2,
+    sub='972cfd2e-cbd3-42e6-8e0e-c0c5c502f25f',
+    access_token='access_token',
+    refresh_token='access_token',
+    token_expire=datetime(2030, 1, 1, 0, 0, 0),
+    master_extended_key=(
+        'xprv9s21ZrQH143K2CK5syo8PdeX5Y4TYFkcU'
+        'KonHhm1e7znhaKj6odQFbbBa7T2Y77AtiNmU6'
+        'aatP2qJBTwvhqxvaSBHA9hEfZ5gViAS3bBj7F'
+    ),
+)
+
+meteringpoint1 = MeteringPoint(
+    id=1,
+    user=user1,
+    gsrn='GSRN1',
+    sector='DK1',
+    key_index=0,
+)
+
+
+@pytest.fixture(scope='module')
+def seeded_session(session):
+    session.add(user1)
+    session.add(user2)
+    session.add(meteringpoint1)
+
+    # Input for combinations
+    users = (user1, user2)
+    issue_meteringpoints = (None, meteringpoint1)
+    retire_meteringpoints = (None, meteringpoint1)
+    issued = (True, False)
+    stored = (True, False)
+    retired = (True, False)
+    sector = ('DK1', 'DK2')
+    technology_code = ('T010101', 'T020202')
+    expire_time = (
+        datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+        datetime(2030, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+    )
+    begin = (
+        datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+        datetime(2020, 1, 1, 1, 0, 0, tzinfo=timezone.utc),
+        datetime(2020, 1, 2, 1, 0, 0, tzinfo=timezone.utc),
+        datetime(2020, 2, 1, 1, 0, 0, tzinfo=timezone.utc),
+        datetime(2021, 2, 1, 1, 0, 0, tzinfo=timezone.utc),
+    )
+
+    # Combinations
+    combinations = product(
+        users, issue_meteringpoints, retire_meteringpoints, issued,
+        stored, retired, sector, technology_code, expire_time, begin
+    )
+
+    # Seed GGOs
+    for i, (usr, iss_mp, ret_mp, iss, st, ret, sec, tech, exp, begin) \
+            in enumerate(combinations, start=1):
+
+        session.add(Ggo(
+            id=i,
+            user=usr,
+            address=str(i),
+            issue_time=datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+            expire_time=exp,
+            begin=begin,
+            end=begin + timedelta(hours=1),
+            amount=GGO_AMOUNT + i,
+            sector=sec,
+            technology_code=tech,
+            fuel_code='F01010101',
+            issued=iss,
+            stored=st,
+            retired=ret,
+            synchronized=True,
+            locked=False,
+            issue_meteringpoint=iss_mp,
+            retire_meteringpoint=ret_mp,
+            retire_address='RETIRE-ADDRESS' if ret_mp else None,
+        ))
+
+        if i % 500 == 0:
+            session.flush()
+
+    session.flush()
+    session.commit()
+
+    yield session
+
+
+def get_summary(session, user, filters, resolution, grouping, use_rollup):
+    """
+    :rtype: (list[str], list[SummaryGroup])
+    """
+    query = GgoQuery(session) \
+        .belongs_to(user) \
+        .apply_filters(filters)
+
+    if use_rollup:
+        rollup = GgoSummaryRollupQuery(session) \
+            .belongs_to(user) \
+            .apply_filters(filters)
+    else:
+        rollup = None
+
+    summary = query.get_summary(resolution, grouping, 0, rollup)
+
+    return summary.labels, summary.groups
+
+
+# -- TEST CASES --------------------------------------------------------------
+
+
+@pytest.mark.parametrize('filters', (
+    GgoFilters(address=['1']),
+    GgoFilters(issue_gsrn=['GSRN1']),
+    GgoFilters(retire_gsrn=['GSRN1']),
+    GgoFilters(retire_address=['RETIRE-ADDRESS']),
+))
+def test__GgoSummaryRollupQuery__supports_filters__unsupported_filters__returns_False(filters):
+    assert GgoSummaryRollupQuery.supports_filters(filters) is False
+
+
+@pytest.mark.parametrize('filters', (
+    GgoFilters(),
+    GgoFilters(sector=['DK1'], technology_code=['T010101'], fuel_code=['F01010101']),
+    GgoFilters(category=GgoCategory.RETIRED),
+    GgoFilters(begin=datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone.utc)),
+))
+def test__GgoSummaryRollupQuery__supports_filters__supported_filters__returns_True(filters):
+    assert GgoSummaryRollupQuery.supports_filters(filters) is True
+
+
+@pytest.mark.parametrize('user, filters, resolution, grouping', product(
+    (user1, user2),
+    (
+        GgoFilters(),
+        GgoFilters(sector=['DK1']),
+        GgoFilters(technology_code=['T020202']),
+        GgoFilters(category=GgoCategory.ISSUED),
+        GgoFilters(category=GgoCategory.STORED),
+        GgoFilters(category=GgoCategory.RETIRED),
+        GgoFilters(category=GgoCategory.EXPIRED),
+        GgoFilters(begin=datetime(2020, 1, 1, 1, 0, 0, tzinfo=timezone.utc)),
+        GgoFilters(begin_range=DateTimeRange(
+            begin=datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+            end=datetime(2020, 12, 31, 23, 0, 0, tzinfo=timezone.utc),
+        )),
+    ),
+    (SummaryResolution.ALL, SummaryResolution.DAY, SummaryResolution.HOUR),
+    ([], ['begin'], ['sector', 'technologyCode'], ['technology', 'fuelCode']),
+))
+def test__GgoSummary__with_rollup__returns_same_result_as_without_rollup(
+        seeded_session, user, filters, resolution, grouping):
+
+    # Act
+    expected = get_summary(seeded_session, user, filters, resolution, grouping, False)
+    actual = get_summary(seeded_session, user, filters, resolution, grouping, True)
+
+    # Assert
+    assert actual == expected
+
+
+def test__GgoSummaryRollup__Ggos_updated_and_deleted__rollup_is_updated_accordingly(seeded_session):
+    filters = GgoFilters(category=GgoCategory.STORED)
+
+    # Act
+    for ggo in GgoQuery(seeded_session).belongs_to(user1).is_stored(True).limit(10):
+        ggo.stored = False
+    for ggo in GgoQuery(seeded_session).belongs_to(user1).is_retired(True).limit(10):
+        seeded_session.delete(ggo)
+
+    seeded_session.flush()
+
+    # Assert
+    for resolution, grouping in product(
+            (SummaryResolution.ALL, SummaryResolution.HOUR),
+            ([], ['begin', 'sector'])):
+
+        expected = get_summary(seeded_session, user1, filters, resolution, grouping, False)
+        actual = get_summary(seeded_session, user1, filters, resolution, grouping, True)
+
+        assert actual == expected
+
+    seeded_session.rollback()
+
+
+def get_stored_amounts(session, user):
+    expected = session \
+        .query(Ggo.begin, sa.func.sum(Ggo.amount)) \
+        .filter(Ggo.user_id == user.id) \
+        .filter(Ggo.stored.is_(True)) \
+        .group_by(Ggo.begin) \
+        .all()
+
+    actual = session \
+        .query(GgoStoredRollup.begin, GgoStoredRollup.amount) \
+        .filter(GgoStoredRollup.user_id == user.id) \
+        .filter(GgoStoredRollup.ggo_count > 0) \
+        .all()
+
+    return sorted(expected), sorted(actual)
+
+
+def test__GgoStoredRollup__Ggos_updated__rollup_contains_stored_amount_per_hour(seeded_session):
+
+    # Act
+    for ggo in GgoQuery(seeded_session).belongs_to(user1).is_stored(True).limit(10):
+        ggo.stored = False
+
+    seeded_session.flush()
+
+    # Assert
+    expected, actual = get_stored_amounts(seeded_session, user1)
+
+    assert len(actual) > 0
+    assert actual == expected
+
+    seeded_session.rollback()
+
+
+def test__get_stored_deltas__only_includes_stored_ggos_mapped_by_user_and_begin():
+    begin = datetime(2020, 1, 1, 0, 0, tzinfo=timezone.utc)
+
+    def key(stored, sector):
+        values = dict(
+            user_id=1, begin=begin, expire_time=begin, issued=True,
+            stored=stored, retired=False, sector=sector,
+            technology_code='T010101', fuel_code='F01010101',
+        )
+        return tuple(values[k] for k in ROLLUP_KEY)
+
+    deltas = {
+        key(True, 'DK1'): (100, 1),
+        key(True, 'DK2'): (50, 2),
+        key(False, 'DK1'): (-100, -1),
+    }
+
+    # Act
+    stored_deltas = get_stored_deltas(deltas)
+
+    # Assert
+    assert stored_deltas == {(1, begin): (150, 3)}
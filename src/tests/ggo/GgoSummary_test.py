@@ -0,0 +1,156 @@
+import pytest
+import sqlalchemy as sa
+from unittest.mock import patch, Mock
+from datetime import datetime, timezone, timedelta
+
+from origin.common import DateTimeRange
+from origin.cache import TTLCache, get_query_cache_key
+from origin.ggo import Ggo
+from origin.ggo.models import SummaryResolution
+from origin.ggo.queries import GgoSummary
+
+
+def get_query(session, amount):
+    return session.query(Ggo.begin) \
+        .filter(Ggo.amount == amount) \
+        .filter(Ggo.sector == 'DK1')
+
+
+def test__get_query_cache_key__depends_on_sql_and_parameters():
+    session = sa.orm.Session(bind=sa.create_engine('sqlite://'))
+
+    # Act
+    key1 = get_query_cache_key(get_query(session, 100))
+    key2 = get_query_cache_key(get_query(session, 100))
+    key3 = get_query_cache_key(get_query(session, 200))
+    key4 = get_query_cache_key(get_query(session, 100).order_by(Ggo.begin))
+
+    # Assert
+    assert key1 == key2
+    assert key1 != key3
+    assert key1 != key4
+
+
+@patch('origin.ggo.queries.GGO_SUMMARY_CACHE_TTL', 60)
+@patch('origin.ggo.queries.get_query_cache_key', Mock(return_value='key'))
+@patch('origin.ggo.queries.summary_cache', new_callable=lambda: TTLCache(max_bytes=1024))
+def test__GgoSummary__raw_results__queries_database_once(summary_cache):
+    query = Mock()
+    query.all.return_value = [(datetime(2020, 1, 1, tzinfo=timezone.utc), 'DK1', 100)]
+
+    uut1 = GgoSummary(Mock(), Mock(), SummaryResolution.DAY, ['sector'])
+    uut1.build_query = Mock(return_value=query)
+
+    uut2 = GgoSummary(Mock(), Mock(), SummaryResolution.DAY, ['sector'])
+    uut2.build_query = Mock(return_value=query)
+
+    # Act
+    results1 = uut1.raw_results
+    results2 = uut1.raw_results
+    results3 = uut2.raw_results
+
+    # Assert
+    assert results1 == results2 == results3 == [('2020-01-01', 'DK1', 100)]
+    assert uut1.build_query.call_count == 1
+    assert query.all.call_count == 1
+    assert summary_cache.stats()['hits'] == 1
+
+
+def test__GgoSummary__groups__fills_missing_labels_with_None():
+    uut = GgoSummary(Mock(), Mock(), SummaryResolution.DAY, ['sector'])
+    uut._raw_results = [
+        ('2020-01-01', 'DK1', 100),
+        ('2020-01-03', 'DK1', 300),
+        ('2020-01-02', 'DK2', 200),
+    ]
+
+    # Act
+    uut.fill(DateTimeRange(
+        begin=datetime(2020, 1, 1, tzinfo=timezone.utc),
+        end=datetime(2020, 1, 3, tzinfo=timezone.utc),
+    ))
+
+    # Assert
+    assert uut.labels == ['2020-01-01', '2020-01-02', '2020-01-03']
+    assert [(g.group, g.values) for g in uut.groups] == [
+        (('DK1',), [100, None, 300]),
+        (('DK2',), [None, 200, None]),
+    ]
+
+
+@pytest.mark.parametrize('resolution, begin, end, expected', (
+    (SummaryResolution.HOUR, datetime(2020, 1, 1, 22, 30), datetime(2020, 1, 2, 1, 0),
+     ['2020-01-01 22:00', '2020-01-01 23:00', '2020-01-02 00:00']),
+    (SummaryResolution.HOUR, datetime(2020, 1, 1, 0, 0), datetime(2020, 1, 1, 0, 0),
+     ['2020-01-01 00:00']),
+    (SummaryResolution.DAY, datetime(2020, 2, 28, 12, 0), datetime(2020, 3, 1, 12, 0),
+     ['2020-02-28', '2020-02-29', '2020-03-01']),
+    (SummaryResolution.MONTH, datetime(2020, 11, 1, 0, 0), datetime(2021, 1, 1, 0, 0),
+     ['2020-11', '2020-12', '2021-01']),
+    (SummaryResolution.DAY, datetime(2020, 1, 2, 0, 0), datetime(2020, 1, 1, 0, 0),
+     []),
+))
+def test__GgoSummary__labels__fill_range__returns_labels_in_local_time(resolution, begin, end, expected):
+    tz = timezone(timedelta(hours=2))
+    uut = GgoSummary(Mock(), Mock(), resolution, ['sector'])
+
+    # Act
+    uut.fill(DateTimeRange(
+        begin=begin.replace(tzinfo=tz),
+        end=end.replace(tzinfo=tz),
+    ))
+
+    # Assert
+    assert uut.labels == expected
+
+
+def test__GgoSummary__groups__no_results__returns_no_groups():
+    uut = GgoSummary(Mock(), Mock(), SummaryResolution.DAY, ['sector'])
+    uut._raw_results = []
+
+    # Act
+    uut.fill(DateTimeRange(
+        begin=datetime(2020, 1, 1, tzinfo=timezone.utc),
+        end=datetime(2020, 1, 3, tzinfo=timezone.utc),
+    ))
+
+    # Assert
+    assert uut.groups == []
+
+
+@pytest.mark.parametrize('resolution, expected', (
+    (SummaryResolution.HOUR, ['2020-01-01 00:00', '2020-01-01 01:00', '2020-01-01 00:00']),
+    (SummaryResolution.DAY, ['2020-01-01', '2020-01-01', '2020-01-01']),
+    (SummaryResolution.MONTH, ['2020-01', '2020-01', '2020-01']),
+    (SummaryResolution.YEAR, ['2020', '2020', '2020']),
+))
+def test__GgoSummary__format_labels__formats_buckets_as_labels(resolution, expected):
+    tz = timezone(timedelta(hours=1))
+    bucket1 = datetime(2020, 1, 1, 0, 0, tzinfo=tz)
+    bucket2 = datetime(2020, 1, 1, 1, 0, tzinfo=tz)
+
+    uut = GgoSummary(Mock(), Mock(), resolution, ['sector'])
+
+    # Act
+    result = uut.format_labels([
+        (bucket1, 'DK1', 100),
+        (bucket2, 'DK1', 200),
+        (bucket1, 'DK2', 300),
+    ])
+
+    # Assert
+    assert result == [
+        (expected[0], 'DK1', 100),
+        (expected[1], 'DK1', 200),
+        (expected[2], 'DK2', 300),
+    ]
+
+
+def test__GgoSummary__format_labels__resolution_all__returns_rows_unchanged():
+    uut = GgoSummary(Mock(), Mock(), SummaryResolution.ALL, ['sector'])
+
+    # Act
+    result = uut.format_labels([('All-time', 'DK1', 100)])
+
+    # Assert
+    assert result == [('All-time', 'DK1', 100)]
@@ -1,9 +1,10 @@
 import pytest
 from unittest.mock import patch
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
 
 from origin.auth import User, MeteringPoint
-from origin.ggo import Ggo, GgoQuery, Technology
+from origin.ggo import Ggo, GgoQuery, GgoState, GgoKeyIndex, Technology
 
 
 GGO_AMOUNT = 100
@@ -199,3 +200,31 @@ def test__Ggo__create_child__returns_correctly_mapped_new_Ggo(ggo_id, seeded_ses
     assert child_ggo.retired is False
     assert child_ggo.synchronized is False
     assert child_ggo.locked is False
+
+
+def test__Ggo__create_child__key_index_already_used__should_raise_IntegrityError(seeded_session):
+    parent_ggo = GgoQuery(seeded_session).has_id(1).one()
+    child_ggo = parent_ggo.create_child(88, user2)
+    seeded_session.flush()
+
+    # Another GGO using the same key index
+    seeded_session.add(GgoKeyIndex(user_id=user2.id, key_index=child_ggo.key_index))
+
+    with pytest.raises(IntegrityError):
+        seeded_session.flush()
+
+    seeded_session.rollback()
+
+
+@pytest.mark.parametrize('stored, retired, synchronized, locked, state', (
+    (True, False, True, False, GgoState.STORED),
+    (True, False, False, False, GgoState.PENDING),
+    (True, False, True, True, GgoState.PENDING),
+    (False, True, True, True, GgoState.PENDING),
+    (False, True, True, False, GgoState.RETIRED),
+    (False, False, True, False, GgoState.SPENT),
+))
+def test__Ggo__compute_state__returns_correct_state(stored, retired, synchronized, locked, state):
+    ggo = Ggo(stored=stored, retired=retired, synchronized=synchronized, locked=locked)
+
+    assert ggo.compute_state() is state
@@ -0,0 +1,129 @@
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+from origin.ggo.composer import MeasurementCache
+
+
+begin1 = datetime(2020, 1, 1, 0, 0, 0)
+begin2 = datetime(2020, 1, 1, 1, 0, 0)
+begin3 = datetime(2020, 1, 1, 2, 0, 0)
+
+
+@patch('origin.ggo.composer.GgoQuery')
+@patch('origin.ggo.composer.MEASUREMENT_PAGE_SIZE', new=2)
+@patch('origin.ggo.composer.datahub_service')
+def test__MeasurementCache__prefetch__should_fetch_all_pages_and_map_by_gsrn_and_begin(datahub, ggo_query):
+
+    # Arrange
+    m1 = Mock(gsrn='GSRN1', begin=begin1, address='A1')
+    m2 = Mock(gsrn='GSRN1', begin=begin2, address='A2')
+    m3 = Mock(gsrn='GSRN2', begin=begin1, address='A3')
+
+    datahub.get_measurements.side_effect = (
+        Mock(total=3, measurements=[m1, m2]),
+        Mock(total=3, measurements=[m3]),
+    )
+
+    uut = MeasurementCache(Mock(access_token='TOKEN'), Mock())
+
+    # Act
+    uut.prefetch(['GSRN1', 'GSRN2'], begin1, begin2)
+
+    # Assert
+    assert datahub.get_measurements.call_count == 2
+    assert datahub.get_measurements.call_args_list[0][0][1].offset == 0
+    assert datahub.get_measurements.call_args_list[1][0][1].offset == 2
+
+    assert uut.get_consumption('GSRN1', begin1) is m1
+    assert uut.get_consumption('GSRN1', begin2) is m2
+    assert uut.get_consumption('GSRN2', begin1) is m3
+    datahub.get_consumption.assert_not_called()
+
+
+@patch('origin.ggo.composer.GgoQuery')
+@patch('origin.ggo.composer.datahub_service')
+def test__MeasurementCache__get_consumption__prefetched_but_missing__should_return_None(datahub, ggo_query):
+
+    # Arrange
+    datahub.get_measurements.return_value = Mock(total=0, measurements=[])
+
+    uut = MeasurementCache(Mock(access_token='TOKEN'), Mock())
+    uut.prefetch(['GSRN1'], begin1, begin2)
+
+    # Act + Assert
+    assert uut.get_consumption('GSRN1', begin2) is None
+    datahub.get_consumption.assert_not_called()
+
+
+@patch('origin.ggo.composer.GgoQuery')
+@patch('origin.ggo.composer.datahub_service')
+def test__MeasurementCache__get_consumption__not_prefetched__should_fetch_once(datahub, ggo_query):
+
+    # Arrange
+    measurement = Mock(gsrn='GSRN1', begin=begin3)
+    datahub.get_measurements.return_value = Mock(total=0, measurements=[])
+    datahub.get_consumption.return_value = Mock(measurement=measurement)
+
+    uut = MeasurementCache(Mock(access_token='TOKEN'), Mock())
+    uut.prefetch(['GSRN1'], begin1, begin2)
+
+    # Act
+    result1 = uut.get_consumption('GSRN1', begin3)
+    result2 = uut.get_consumption('GSRN1', begin3)
+
+    # Assert
+    assert result1 is measurement
+    assert result2 is measurement
+    datahub.get_consumption.assert_called_once()
+
+
+@patch('origin.ggo.composer.GgoQuery')
+@patch('origin.ggo.composer.datahub_service')
+def test__MeasurementCache__prefetch__should_load_retired_amounts_using_one_query(datahub, ggo_query):
+
+    # Arrange
+    m1 = Mock(gsrn='GSRN1', begin=begin1, address='A1')
+    m2 = Mock(gsrn='GSRN1', begin=begin2, address='A2')
+
+    datahub.get_measurements.return_value = Mock(total=2, measurements=[m1, m2])
+
+    query = ggo_query.return_value.belongs_to.return_value.begins_within.return_value \
+        .is_retired.return_value \
+        .is_retired_to_any_address.return_value
+
+    query.get_total_amount_per_retire_address.return_value = {'A1': 10}
+
+    uut = MeasurementCache(Mock(access_token='TOKEN'), Mock())
+
+    # Act
+    uut.prefetch(['GSRN1'], begin1, begin2)
+
+    # Assert
+    assert uut.get_retired_amount(m1) == 10
+    assert uut.get_retired_amount(m2) == 0
+    query.get_total_amount_per_retire_address.assert_called_once()
+    ggo_query.return_value.belongs_to.return_value.begins_within.return_value \
+        .is_retired.return_value \
+        .is_retired_to_any_address.assert_called_once_with(['A1', 'A2'])
+
+
+@patch('origin.ggo.composer.GgoQuery')
+@patch('origin.ggo.composer.datahub_service')
+def test__MeasurementCache__add_retired_amount__should_add_to_retired_amount(datahub, ggo_query):
+
+    # Arrange
+    measurement = Mock(gsrn='GSRN1', begin=begin1, address='A1')
+
+    ggo_query.return_value.belongs_to.return_value.begins_within.return_value \
+        .is_retired.return_value \
+        .is_retired_to_any_address.return_value \
+        .get_total_amount_per_retire_address.return_value = {'A1': 10}
+
+    uut = MeasurementCache(Mock(access_token='TOKEN'), Mock())
+
+    # Act
+    uut.add_retired_amount(measurement, 5)
+    uut.add_retired_amount(measurement, 20)
+
+    # Assert
+    assert uut.get_retired_amount(measurement) == 35
@@ -1,10 +1,12 @@
 import pytest
 from datetime import datetime, timezone
 from itertools import product
+from unittest.mock import Mock
 
 from origin.auth import User
-from origin.ggo.models import Ggo
-from origin.ggo.queries import TransactionQuery
+from origin.ggo.models import Ggo, GgoState
+from origin.ggo.queries import TransactionQuery, ArchivedTransactionQuery
+from origin.ggo.archive import ggo_archive, transaction_archive, split_target_archive
 from origin.ledger import Batch, BatchState, SplitTransaction
 
 
@@ -220,3 +222,60 @@ def test__TransactionQuery__has_reference__Ggos_does_not_exists__returns_nothing
         .has_reference('A-REFERENCE-THAT-DOESNT-EXISTS')
 
     assert query.count() == 0
+
+
+def test__TransactionQuery__include_archived__cascades_ArchivedTransactionQuery():
+    query = TransactionQuery(Mock(), include_archived=True) \
+        .sent_by_user(user1) \
+        .has_reference('REF1')
+
+    assert type(query) is ArchivedTransactionQuery
+
+
+@pytest.mark.parametrize('user', (user1, user2, user3, user4))
+def test__TransactionQuery__include_archived__nothing_archived__returns_live_Ggos(seeded_session, user):
+    query = TransactionQuery(seeded_session, include_archived=True) \
+        .sent_by_user(user)
+
+    assert query.count() == 12
+
+
+def test__TransactionQuery__include_archived__transfer_is_archived__returns_archived_Ggos(seeded_session):
+    ggo = dict(
+        issue_time=datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+        expire_time=datetime(2020, 4, 1, 0, 0, 0, tzinfo=timezone.utc),
+        begin=datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+        end=datetime(2020, 1, 1, 1, 0, 0, tzinfo=timezone.utc),
+        amount=GGO_AMOUNT,
+        sector='DK1',
+        technology_code='T010000',
+        fuel_code='F00000000',
+        issued=False,
+        stored=False,
+        retired=False,
+        synchronized=True,
+        locked=False,
+        state=GgoState.SPENT.value,
+    )
+
+    seeded_session.execute(ggo_archive.insert().values([
+        dict(ggo, id=1000, user_id=user5.id, address='ARCHIVED-PARENT'),
+        dict(ggo, id=1001, user_id=user1.id, address='ARCHIVED-CHILD', parent_id=1000),
+    ]))
+    seeded_session.execute(transaction_archive.insert().values(
+        id=1000, order=0, type='split', batch_id=1000, parent_ggo_id=1000))
+    seeded_session.execute(split_target_archive.insert().values(
+        id=1000, transaction_id=1000, ggo_id=1001, reference='ARCHIVED-REF'))
+
+    try:
+        live = TransactionQuery(seeded_session) \
+            .sent_by_user(user5)
+
+        archived = TransactionQuery(seeded_session, include_archived=True) \
+            .sent_by_user(user5) \
+            .has_reference('ARCHIVED-REF')
+
+        assert live.count() == 0
+        assert [g.address for g in archived] == ['ARCHIVED-CHILD']
+    finally:
+        seeded_session.rollback()
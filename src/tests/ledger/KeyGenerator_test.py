@@ -1,8 +1,8 @@
 from datetime import datetime, timezone
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 from bip32utils import BIP32Key
 
-from origin.ledger.keys import KeyGenerator
+from origin.ledger.keys import KeyGenerator, KeyCache
 
 
 A_VALID_EXTENDED_KEY = (
@@ -118,3 +118,58 @@ def test__KeyGenerator__get_key_for_issued_ggo():
 
     # Assert
     assert key.ExtendedKey() == A_VALID_KEY.ChildKey(1).ChildKey(123).ChildKey(1577836800).ExtendedKey()
+
+
+def test__KeyGenerator__get_key_for_ggo__issued_and_traded__returns_correct_keys():
+
+    # Arrange
+    user = Mock(master_extended_key=A_VALID_EXTENDED_KEY)
+    issued_ggo = Mock(
+        begin=datetime(2020, 1, 1, 0, 0, 12, 21, tzinfo=timezone.utc),
+        issued=True,
+        issue_meteringpoint=Mock(user=user, key_index=123),
+    )
+    traded_ggo = Mock(user=user, key_index=123, issued=False)
+
+    # Act
+    keys = [KeyGenerator.get_key_for_ggo(ggo) for ggo in (issued_ggo, traded_ggo)]
+
+    # Assert
+    assert len(keys) == 2
+    assert keys[0].ExtendedKey() == A_VALID_KEY.ChildKey(1).ChildKey(123).ChildKey(1577836800).ExtendedKey()
+    assert keys[1].ExtendedKey() == A_VALID_KEY.ChildKey(0).ChildKey(123).ExtendedKey()
+
+
+def test__KeyCache__derive__shared_prefix__derives_prefix_only_once():
+
+    # Arrange
+    uut = KeyCache(max_size=100)
+
+    # Act
+    with patch.object(BIP32Key, 'ChildKey', autospec=True, side_effect=BIP32Key.ChildKey) as child_key:
+        key1 = uut.derive(A_VALID_EXTENDED_KEY, (1, 123, 10))
+        key2 = uut.derive(A_VALID_EXTENDED_KEY, (1, 123, 20))
+        key3 = uut.derive(A_VALID_EXTENDED_KEY, (1, 123, 10))
+
+    # Assert
+    assert child_key.call_count == 4
+    assert key1.ExtendedKey() == A_VALID_KEY.ChildKey(1).ChildKey(123).ChildKey(10).ExtendedKey()
+    assert key2.ExtendedKey() == A_VALID_KEY.ChildKey(1).ChildKey(123).ChildKey(20).ExtendedKey()
+    assert key3 is key1
+
+
+def test__KeyCache__set__exceeds_max_size__evicts_least_recently_used():
+
+    # Arrange
+    uut = KeyCache(max_size=2)
+
+    # Act
+    uut.set(b'fingerprint', (1,), 'key1')
+    uut.set(b'fingerprint', (2,), 'key2')
+    uut.get(b'fingerprint', (1,))
+    uut.set(b'fingerprint', (3,), 'key3')
+
+    # Assert
+    assert uut.get(b'fingerprint', (1,)) == 'key1'
+    assert uut.get(b'fingerprint', (2,)) is None
+    assert uut.get(b'fingerprint', (3,)) == 'key3'
@@ -1,6 +1,11 @@
 import origin_ledger_sdk as ols
+from datetime import datetime
 from unittest.mock import MagicMock, patch, Mock
 
+from origin.auth import MeteringPointType
+from origin.cache import RETIRED_GGOS
+from origin.ggo.composer import GgoComposer
+from origin.ledger import models
 from origin.ledger.models import RetireTransaction
 
 
@@ -131,3 +136,46 @@ def test__RetireTransaction__build_ledger_request__should_build_correct_request(
     assert type(request.parts[0]) is ols.RetireGGOPart
     assert request.parts[0].address == 'parent_ggo_address'
     assert request.parts[0].private_key == parent_ggo.key.PrivateKey()
+
+
+@patch('origin.ggo.composer.datahub_service')
+@patch('origin.ledger.models.bump_versions_on_commit')
+@patch('origin.ledger.models.Session.object_session')
+def test__RetireTransaction__split_then_retire__should_invalidate_retired_ggos_after_flush(
+        object_session, bump_versions_on_commit, datahub):
+
+    # Arrange
+    begin = datetime(2020, 1, 1, 0, 0, 0)
+    session = Mock()
+
+    ggo = Mock(amount=100, begin=begin, sector='DK1', stored=True, retired=False, locked=False, synchronized=True, user_id=1)
+    ggo.is_tradable.return_value = True
+    ggo.is_expired.return_value = False
+    ggo.create_child.side_effect = lambda amount, user: Mock(amount=amount, user=user, begin=begin)
+
+    meteringpoint1 = Mock(gsrn='GSRN1', user_id=1, type=MeteringPointType.CONSUMPTION)
+    meteringpoint2 = Mock(gsrn='GSRN2', user_id=1, type=MeteringPointType.CONSUMPTION)
+    measurement = Mock(sector='DK1', begin=begin, amount=100, address='MEASUREMENT-ADDRESS')
+
+    datahub.get_consumption.return_value = Mock(measurement=measurement)
+
+    composer = GgoComposer(ggo=ggo, session=Mock())
+    composer.get_retired_amount = Mock(return_value=0)
+    composer.add_retire(meteringpoint=meteringpoint1, amount=80)
+    composer.add_retire(meteringpoint=meteringpoint2, amount=20)
+
+    # The batch (and its transactions) has not been added to a session yet
+    object_session.return_value = None
+    batch, recipients = composer.build_batch()
+
+    bump_versions_on_commit.assert_not_called()
+
+    # Act
+    object_session.return_value = session
+    session.new = [batch] + batch.transactions
+    models.__invalidate_retired_ggos_after_flush(session, Mock())
+
+    # Assert
+    assert bump_versions_on_commit.call_count == 2
+    bump_versions_on_commit.assert_any_call(session, RETIRED_GGOS, ['GSRN1'])
+    bump_versions_on_commit.assert_any_call(session, RETIRED_GGOS, ['GSRN2'])
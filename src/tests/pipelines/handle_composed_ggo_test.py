@@ -154,8 +154,6 @@
 # @patch('origin.pipelines.webhooks.invoke_on_ggo_received.default_retry_delay', 0)
 # @patch('origin.pipelines.submit_batch_to_ledger.submit_batch_to_ledger.default_retry_delay', 0)
 # @patch('origin.pipelines.submit_batch_to_ledger.batch_on_submitted.default_retry_delay', 0)
-# @patch('origin.pipelines.submit_batch_to_ledger.poll_batch_status.default_retry_delay', 0)
-# @patch('origin.pipelines.submit_batch_to_ledger.batch_on_commit.default_retry_delay', 0)
 # @patch('origin.pipelines.submit_batch_to_ledger.batch_on_rollback.default_retry_delay', 0)
 # @pytest.mark.usefixtures('celery_worker')
 # def test__handle_composed_ggo__happy_path__Batch_should_be_COMPLETED(
@@ -251,8 +249,6 @@
 # @patch('origin.pipelines.webhooks.invoke_on_ggo_received.default_retry_delay', 0)
 # @patch('origin.pipelines.submit_batch_to_ledger.submit_batch_to_ledger.default_retry_delay', 0)
 # @patch('origin.pipelines.submit_batch_to_ledger.batch_on_submitted.default_retry_delay', 0)
-# @patch('origin.pipelines.submit_batch_to_ledger.poll_batch_status.default_retry_delay', 0)
-# @patch('origin.pipelines.submit_batch_to_ledger.batch_on_commit.default_retry_delay', 0)
 # @patch('origin.pipelines.submit_batch_to_ledger.batch_on_rollback.default_retry_delay', 0)
 # @pytest.mark.usefixtures('celery_worker')
 # def test__handle_composed_ggo__execute_batch_raises_LedgerException__Batch_should_be_DECLINED(
@@ -295,8 +291,6 @@
 # @patch('origin.pipelines.webhooks.invoke_on_ggo_received.default_retry_delay', 0)
 # @patch('origin.pipelines.submit_batch_to_ledger.submit_batch_to_ledger.default_retry_delay', 0)
 # @patch('origin.pipelines.submit_batch_to_ledger.batch_on_submitted.default_retry_delay', 0)
-# @patch('origin.pipelines.submit_batch_to_ledger.poll_batch_status.default_retry_delay', 0)
-# @patch('origin.pipelines.submit_batch_to_ledger.batch_on_commit.default_retry_delay', 0)
 # @patch('origin.pipelines.submit_batch_to_ledger.batch_on_rollback.default_retry_delay', 0)
 # @pytest.mark.usefixtures('celery_worker')
 # def test__handle_composed_ggo__get_batch_status_raises_LedgerException__Batch_should_be_DECLINED(
@@ -344,8 +338,6 @@
 # @patch('origin.pipelines.webhooks.invoke_on_ggo_received.default_retry_delay', 0)
 # @patch('origin.pipelines.submit_batch_to_ledger.submit_batch_to_ledger.default_retry_delay', 0)
 # @patch('origin.pipelines.submit_batch_to_ledger.batch_on_submitted.default_retry_delay', 0)
-# @patch('origin.pipelines.submit_batch_to_ledger.poll_batch_status.default_retry_delay', 0)
-# @patch('origin.pipelines.submit_batch_to_ledger.batch_on_commit.default_retry_delay', 0)
 # @patch('origin.pipelines.submit_batch_to_ledger.batch_on_rollback.default_retry_delay', 0)
 # @pytest.mark.usefixtures('celery_worker')
 # def test__handle_composed_ggo__get_batch_status_returns_INVALID__Batch_should_be_DECLINED(
@@ -0,0 +1,36 @@
+from unittest.mock import Mock, patch
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql
+
+from origin.pipelines.resubmit_batches import resubmit_batches, get_batches_to_resubmit
+
+
+def test__get_batches_to_resubmit__skips_queued_and_locked_batches():
+    query = get_batches_to_resubmit(Session())
+
+    # Act
+    sql = str(query.statement.compile(dialect=postgresql.dialect()))
+
+    # Assert
+    assert 'ledger_batch.queued IS NULL' in sql
+    assert sql.endswith('FOR UPDATE OF ledger_batch SKIP LOCKED')
+
+
+@patch('origin.pipelines.resubmit_batches.start_submit_batch_pipeline')
+@patch('origin.pipelines.resubmit_batches.get_batches_to_resubmit')
+def test__resubmit_batches__should_submit_each_batch(get_batches_to_resubmit, start_submit_batch_pipeline):
+    batch1 = Mock(user=Mock(sub='SUBJECT1'))
+    batch2 = Mock(user=Mock(sub='SUBJECT2'))
+    session = Mock()
+
+    get_batches_to_resubmit.return_value = [batch1, batch2]
+
+    # Act
+    resubmit_batches.run(session=session)
+
+    # Assert
+    get_batches_to_resubmit.assert_called_once_with(session)
+
+    assert start_submit_batch_pipeline.call_count == 2
+    start_submit_batch_pipeline.assert_any_call(subject='SUBJECT1', batch=batch1)
+    start_submit_batch_pipeline.assert_any_call(subject='SUBJECT2', batch=batch2)
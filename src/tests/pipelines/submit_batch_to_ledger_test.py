@@ -0,0 +1,340 @@
+import pytest
+import origin_ledger_sdk as ols
+from unittest.mock import Mock, patch
+
+from origin.ledger import BatchState
+
+from origin.pipelines.submit_batch_to_ledger import (
+    get_batch_statuses,
+    poll_submitted_batches,
+    on_batches_polled,
+    batch_on_commit,
+    poll_batch_status,
+    batches_on_commit,
+    group_queued_batches,
+    submit_queued_batches,
+    coalesce_queued_batches,
+    submit_coalesced_batches,
+)
+
+
+def test__get_batch_statuses__should_return_status_per_handle():
+
+    # Arrange
+    statuses = {
+        'HANDLE1': ols.BatchStatus.COMMITTED,
+        'HANDLE2': ols.BatchStatus.PENDING,
+    }
+
+    def __get_batch_status(handle):
+        if handle == 'HANDLE3':
+            raise ols.LedgerConnectionError('Failed')
+        return Mock(status=statuses[handle])
+
+    # Act
+    with patch('origin.pipelines.submit_batch_to_ledger.ledger') as ledger:
+        ledger.get_batch_status.side_effect = __get_batch_status
+        result = get_batch_statuses(['HANDLE1', 'HANDLE2', 'HANDLE3'])
+
+    # Assert
+    assert result == {
+        'HANDLE1': ols.BatchStatus.COMMITTED,
+        'HANDLE2': ols.BatchStatus.PENDING,
+        'HANDLE3': None,
+    }
+
+
+@patch('origin.pipelines.submit_batch_to_ledger.LEDGER_POLL_DISPATCH_SIZE', new=2)
+@patch('origin.pipelines.submit_batch_to_ledger.resubmit_coalesced_batches')
+@patch('origin.pipelines.submit_batch_to_ledger.batches_on_rollback')
+@patch('origin.pipelines.submit_batch_to_ledger.batches_on_commit')
+@patch('origin.pipelines.submit_batch_to_ledger.on_batches_polled')
+@patch('origin.pipelines.submit_batch_to_ledger.get_batch_statuses')
+@patch('origin.pipelines.submit_batch_to_ledger.get_submitted_batches')
+def test__poll_submitted_batches__should_dispatch_commits_and_rollbacks_in_groups(
+        get_submitted_batches_mock, get_batch_statuses_mock, on_batches_polled_mock,
+        batches_on_commit_mock, batches_on_rollback_mock, resubmit_coalesced_batches_mock):
+
+    # Arrange
+    get_submitted_batches_mock.return_value = [
+        (1, 'HANDLE1'),
+        (2, 'HANDLE2'),
+        (3, 'HANDLE3'),
+        (4, 'HANDLE4'),
+        (5, 'HANDLE5'),
+        (6, 'HANDLE6'),
+        (7, 'HANDLE6'),
+    ]
+
+    get_batch_statuses_mock.return_value = {
+        'HANDLE1': ols.BatchStatus.COMMITTED,
+        'HANDLE2': ols.BatchStatus.COMMITTED,
+        'HANDLE3': ols.BatchStatus.COMMITTED,
+        'HANDLE4': ols.BatchStatus.INVALID,
+        'HANDLE5': ols.BatchStatus.PENDING,
+        'HANDLE6': ols.BatchStatus.INVALID,
+    }
+
+    # HANDLE6 is shared by two coalesced batches
+    on_batches_polled_mock.return_value = {6, 7}
+
+    # Act
+    poll_submitted_batches()
+
+    # Assert
+    on_batches_polled_mock.assert_called_once_with(
+        pending=[5],
+        declined=[(4, 'HANDLE4'), (6, 'HANDLE6'), (7, 'HANDLE6')],
+    )
+
+    assert [c[1] for c in batches_on_commit_mock.si.call_args_list] == [
+        {'batch_ids': [1, 2]},
+        {'batch_ids': [3]},
+    ]
+    assert [c[1] for c in batches_on_rollback_mock.si.call_args_list] == [
+        {'batch_ids': [4]},
+    ]
+    assert [c[1] for c in resubmit_coalesced_batches_mock.si.call_args_list] == [
+        {'batch_ids': [6, 7]},
+    ]
+
+
+@patch('origin.pipelines.submit_batch_to_ledger.get_batch_statuses')
+@patch('origin.pipelines.submit_batch_to_ledger.get_submitted_batches')
+def test__poll_submitted_batches__should_poll_ledger_outside_transaction(
+        get_submitted_batches_mock, get_batch_statuses_mock):
+
+    # Arrange
+    session = Mock()
+    get_submitted_batches_mock.return_value = [(1, 'HANDLE1'), (2, 'HANDLE2')]
+
+    def __get_batch_statuses(handles):
+        session.commit.assert_not_called()
+        return {h: ols.BatchStatus.PENDING for h in handles}
+
+    get_batch_statuses_mock.side_effect = __get_batch_statuses
+
+    # Act
+    with patch('origin.db.make_session', return_value=session):
+        poll_submitted_batches()
+
+    # Assert
+    session.query.return_value.filter.return_value.update.assert_called_once()
+    session.commit.assert_called_once()
+
+
+@pytest.mark.parametrize('declined, coalesced_handles, expected', (
+    ([], [], set()),
+    ([(4, 'HANDLE4')], [], set()),
+    ([(4, 'HANDLE4'), (6, 'HANDLE6'), (7, 'HANDLE6')], [('HANDLE6', 2)], {6, 7}),
+))
+def test__on_batches_polled__should_return_coalesced_declined_batches(
+        declined, coalesced_handles, expected):
+
+    # Arrange
+    session = Mock()
+    session.query.return_value.filter.return_value.group_by.return_value \
+        .having.return_value = coalesced_handles
+
+    # Act
+    result = on_batches_polled(pending=[], declined=declined, session=session)
+
+    # Assert
+    assert result == expected
+    session.commit.assert_called_once()
+
+
+@patch('origin.pipelines.submit_batch_to_ledger.signature')
+@patch('origin.pipelines.submit_batch_to_ledger.complete_batches')
+def test__batches_on_commit__should_invoke_callbacks_of_committed_batches(
+        complete_batches_mock, signature_mock):
+
+    # Arrange
+    callback1 = {'task': 'task1'}
+    callback2 = {'task': 'task2'}
+    complete_batches_mock.return_value = [callback1, callback2]
+
+    # Act
+    batches_on_commit.run(batch_ids=[1, 2])
+
+    # Assert
+    complete_batches_mock.assert_called_once_with([1, 2], committed=True)
+    assert [c[0][0] for c in signature_mock.call_args_list] == [callback1, callback2]
+    assert signature_mock.return_value.apply_async.call_count == 2
+
+
+@patch('origin.pipelines.submit_batch_to_ledger.LEDGER_COALESCE_MAX_REQUESTS', new=3)
+def test__group_queued_batches__should_group_by_user_and_max_requests():
+
+    # Arrange
+    batch1 = Mock(user_id=1, transactions=[Mock(), Mock()])
+    batch2 = Mock(user_id=1, transactions=[Mock()])
+    batch3 = Mock(user_id=1, transactions=[Mock()])
+    batch4 = Mock(user_id=2, transactions=[Mock(), Mock(), Mock(), Mock()])
+    batch5 = Mock(user_id=2, transactions=[Mock()])
+
+    # Act
+    groups = list(group_queued_batches([batch1, batch2, batch3, batch4, batch5]))
+
+    # Assert
+    assert groups == [
+        [batch1, batch2],
+        [batch3],
+        [batch4],
+        [batch5],
+    ]
+
+
+@patch('origin.pipelines.submit_batch_to_ledger.ols.Batch')
+@patch('origin.pipelines.submit_batch_to_ledger.ledger')
+def test__submit_coalesced_batches__should_submit_one_ledger_batch(ledger, ledger_batch_cls):
+
+    # Arrange
+    transaction1 = Mock()
+    transaction2 = Mock()
+    transaction3 = Mock()
+    batch1 = Mock(transactions=[transaction1, transaction2])
+    batch2 = Mock(transactions=[transaction3])
+
+    ledger.execute_batch.return_value = 'HANDLE'
+
+    # Act
+    result = submit_coalesced_batches([batch1, batch2])
+
+    # Assert
+    assert result is True
+    ledger.execute_batch.assert_called_once_with(ledger_batch_cls.return_value)
+    assert [c[0][0] for c in ledger_batch_cls.return_value.add_request.call_args_list] == [
+        transaction1.build_ledger_request.return_value,
+        transaction2.build_ledger_request.return_value,
+        transaction3.build_ledger_request.return_value,
+    ]
+    batch1.on_submitted.assert_called_once_with('HANDLE')
+    batch2.on_submitted.assert_called_once_with('HANDLE')
+
+
+@pytest.mark.parametrize('code, expected', (
+    (17, True),
+    (31, True),
+    (1, False),
+))
+@patch('origin.pipelines.submit_batch_to_ledger.ols.Batch')
+@patch('origin.pipelines.submit_batch_to_ledger.ledger')
+def test__submit_coalesced_batches__ledger_error__should_return_whether_to_keep_batches_queued(
+        ledger, ledger_batch_cls, code, expected):
+
+    # Arrange
+    batch = Mock(transactions=[Mock()])
+    ledger.execute_batch.side_effect = ols.LedgerException('Error', code=code)
+
+    # Act
+    result = submit_coalesced_batches([batch])
+
+    # Assert
+    assert result is expected
+    batch.on_submitted.assert_not_called()
+
+
+@patch('origin.pipelines.submit_batch_to_ledger.submit_batch')
+@patch('origin.pipelines.submit_batch_to_ledger.coalesce_queued_batches')
+@patch('origin.pipelines.submit_batch_to_ledger.get_queued_batch_groups')
+def test__submit_queued_batches__group_fails__should_submit_other_groups(
+        get_queued_batch_groups_mock, coalesce_queued_batches_mock, submit_batch_mock):
+
+    # Arrange
+    get_queued_batch_groups_mock.return_value = [[1, 2], [3], [4, 5]]
+
+    coalesce_queued_batches_mock.side_effect = (
+        [],
+        Exception('Database error'),
+        [('SUBJECT', 4, None), ('SUBJECT', 5, None)],
+    )
+
+    # Act
+    submit_queued_batches.run()
+
+    # Assert
+    assert [c[0][0] for c in coalesce_queued_batches_mock.call_args_list] == [
+        [1, 2],
+        [3],
+        [4, 5],
+    ]
+    assert [c[1]['batch_id'] for c in submit_batch_mock.call_args_list] == [4, 5]
+
+
+@patch('origin.pipelines.submit_batch_to_ledger.submit_coalesced_batches')
+def test__coalesce_queued_batches__submit_declined__should_dequeue_batches_for_resubmission(
+        submit_coalesced_batches_mock):
+
+    # Arrange
+    session = Mock()
+    batch1 = Mock(id=1, user=Mock(sub='SUBJECT'), on_rollback_callback={'task': 'task1'})
+    batch2 = Mock(id=2, user=Mock(sub='SUBJECT'), on_rollback_callback=None)
+
+    session.query.return_value.filter.return_value.filter.return_value \
+        .filter.return_value.order_by.return_value.options.return_value \
+        .with_for_update.return_value.all.return_value = [batch1, batch2]
+
+    submit_coalesced_batches_mock.return_value = False
+
+    # Act
+    result = coalesce_queued_batches([1, 2], session=session)
+
+    # Assert
+    assert result == [
+        ('SUBJECT', 1, {'task': 'task1'}),
+        ('SUBJECT', 2, None),
+    ]
+    assert batch1.queued is None
+    assert batch2.queued is None
+    session.commit.assert_called_once()
+
+
+# -- Deprecated tasks --------------------------------------------------------
+
+
+def test__poll_batch_status__should_do_nothing():
+    with patch('origin.pipelines.submit_batch_to_ledger.ledger') as ledger:
+        poll_batch_status.run(subject='SUBJECT', batch_id=1)
+
+    ledger.get_batch_status.assert_not_called()
+
+
+@pytest.mark.parametrize('state, queued, should_submit, should_clear_callbacks', (
+    (BatchState.PENDING, False, True, True),
+    (BatchState.PENDING, True, False, True),
+    (BatchState.SUBMITTED, False, False, True),
+    (BatchState.DECLINED, False, False, True),
+    (BatchState.COMPLETED, False, False, False),
+))
+@patch('origin.pipelines.submit_batch_to_ledger.submit_batch')
+@patch('origin.pipelines.submit_batch_to_ledger.take_over_batch')
+def test__batch_on_commit__should_hand_over_batch_to_current_flow(
+        take_over_batch_mock, submit_batch_mock, state, queued,
+        should_submit, should_clear_callbacks):
+
+    # Arrange
+    callback = {'task': 'task1', 'args': [], 'kwargs': {}, 'options': {}}
+    take_over_batch_mock.return_value = (state, queued)
+
+    # Act
+    batch_on_commit.push_request(callbacks=[callback])
+    try:
+        batch_on_commit.run(subject='SUBJECT', batch_id=1)
+        callbacks = batch_on_commit.request.callbacks
+    finally:
+        batch_on_commit.pop_request()
+
+    # Assert
+    on_commit = take_over_batch_mock.call_args[0][1]
+    assert on_commit['task'] == 'task1'
+
+    if should_submit:
+        submit_batch_mock.assert_called_once_with('SUBJECT', 1, success=on_commit)
+    else:
+        submit_batch_mock.assert_not_called()
+
+    if should_clear_callbacks:
+        assert callbacks is None
+    else:
+        assert callbacks == [callback]
@@ -0,0 +1,107 @@
+import pytest
+import requests
+from unittest.mock import Mock, patch
+
+from origin.services.transport import HttpTransport
+
+
+@pytest.fixture
+def uut():
+    transport = HttpTransport(
+        pool_size=2,
+        connect_timeout=1,
+        read_timeout=2,
+        max_retries=3,
+        retry_backoff=0,
+    )
+    transport.session = Mock()
+    return transport
+
+
+# -- TEST CASES --------------------------------------------------------------
+
+
+def test__HttpTransport__request__applies_default_timeout(uut):
+
+    # Arrange
+    uut.session.request.return_value = Mock(status_code=200)
+
+    # Act
+    uut.get('http://example.com/')
+
+    # Assert
+    uut.session.request.assert_called_once_with(
+        'GET', 'http://example.com/', timeout=(1, 2))
+
+
+@pytest.mark.parametrize('status_code', (502, 503, 504))
+def test__HttpTransport__request__idempotent_and_status_retryable__retries_until_success(uut, status_code):
+
+    # Arrange
+    uut.session.request.side_effect = [
+        Mock(status_code=status_code),
+        Mock(status_code=status_code),
+        Mock(status_code=200),
+    ]
+
+    # Act
+    response = uut.post('http://example.com/', idempotent=True)
+
+    # Assert
+    assert response.status_code == 200
+    assert uut.session.request.call_count == 3
+
+
+def test__HttpTransport__request__idempotent_and_retries_exhausted__returns_last_response(uut):
+
+    # Arrange
+    uut.session.request.return_value = Mock(status_code=503)
+
+    # Act
+    response = uut.post('http://example.com/', idempotent=True)
+
+    # Assert
+    assert response.status_code == 503
+    assert uut.session.request.call_count == 4
+
+
+def test__HttpTransport__request__idempotent_and_connection_error__retries_then_raises(uut):
+
+    # Arrange
+    uut.session.request.side_effect = requests.ConnectionError()
+
+    # Act + Assert
+    with pytest.raises(requests.ConnectionError):
+        uut.get('http://example.com/')
+
+    assert uut.session.request.call_count == 4
+
+
+def test__HttpTransport__request__NOT_idempotent__does_not_retry(uut):
+
+    # Arrange
+    uut.session.request.side_effect = requests.Timeout()
+
+    # Act + Assert
+    with pytest.raises(requests.Timeout):
+        uut.post('http://example.com/')
+
+    assert uut.session.request.call_count == 1
+
+
+@patch('origin.services.transport.time.sleep')
+def test__HttpTransport__request__waits_with_exponential_backoff(sleep, uut):
+
+    # Arrange
+    uut.retry_backoff = 0.5
+    uut.session.request.return_value = Mock(status_code=503)
+
+    # Act
+    uut.get('http://example.com/')
+
+    # Assert
+    assert [c[0][0] for c in sleep.call_args_list] == [0.5, 1.0, 2.0]
+
+
+def test__HttpTransport__get_pool_stats__no_requests__returns_empty_dict(uut):
+    assert uut.get_pool_stats() == {}
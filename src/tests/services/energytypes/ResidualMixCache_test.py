@@ -0,0 +1,151 @@
+from unittest.mock import patch, Mock
+from datetime import datetime, timezone, timedelta
+
+from origin.common import EmissionValues
+from origin.services.energytypes import (
+    ResidualMixCache,
+    EmissionData,
+    EmissionPart,
+    GetMixEmissionsResponse,
+)
+
+
+begin1 = datetime(2020, 1, 1, 0, 0, tzinfo=timezone.utc)
+begin2 = datetime(2020, 1, 1, 1, 0, tzinfo=timezone.utc)
+begin3 = datetime(2020, 1, 1, 2, 0, tzinfo=timezone.utc)
+
+
+def get_emission_data(sector, begin):
+    return EmissionData(sector=sector, timestamp_utc=begin, parts=[
+        EmissionPart(technology='Solar', amount=10, emissions=EmissionValues(CO2=1)),
+        EmissionPart(technology='Wind', amount=20, emissions=EmissionValues(CO2=2, CH4=3)),
+    ])
+
+
+class FakeRedis(object):
+    def __init__(self):
+        self.hashes = {}
+
+    def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(f) for f in fields]
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def pipeline(self):
+        return Mock(hset=self.hset)
+
+
+def test__ResidualMixCache__get_hours__returns_whole_hours_in_utc():
+    uut = ResidualMixCache()
+    tz = timezone(timedelta(hours=1))
+
+    # Act
+    hours = list(uut.get_hours(
+        begin_from=datetime(2020, 1, 1, 1, 30, tzinfo=tz),
+        begin_to=datetime(2020, 1, 1, 3, 59, 59, tzinfo=tz),
+    ))
+
+    # Assert
+    assert hours == [begin2, begin3]
+    assert all(h.tzinfo is timezone.utc for h in hours)
+
+
+def test__ResidualMixCache__serialize__deserialize__returns_same_emission_data():
+    uut = ResidualMixCache()
+    emission_data = get_emission_data('DK1', begin1)
+
+    # Act
+    result = uut.deserialize('DK1', begin1, uut.serialize(emission_data))
+
+    # Assert
+    assert result == emission_data
+    assert result.emissions == emission_data.emissions
+    assert result.technologies == emission_data.technologies
+
+
+@patch('origin.services.energytypes.cache.redis', new_callable=FakeRedis)
+def test__ResidualMixCache__get_residual_mix__fetches_only_missing_hours(redis):
+    uut = ResidualMixCache()
+    service = Mock()
+
+    # Arrange: DK1 is cached for all hours, DK2 only for the first
+    uut.store([
+        get_emission_data('DK1', begin1),
+        get_emission_data('DK1', begin2),
+        get_emission_data('DK1', begin3),
+        get_emission_data('DK2', begin1),
+    ])
+
+    service.get_residual_mix.return_value = GetMixEmissionsResponse(
+        success=True,
+        mix_emissions=[
+            get_emission_data('DK2', begin1),
+            get_emission_data('DK2', begin2),
+            get_emission_data('DK2', begin3),
+        ],
+    )
+
+    # Act
+    result = uut.get_residual_mix(
+        service=service,
+        sector=['DK1', 'DK2'],
+        begin_from=begin1,
+        begin_to=begin3,
+    )
+
+    # Assert
+    service.get_residual_mix.assert_called_once_with(
+        sector=['DK2'],
+        begin_from=begin2,
+        begin_to=begin3,
+    )
+
+    assert sorted((d.sector, d.timestamp_utc) for d in result) == [
+        ('DK1', begin1), ('DK1', begin2), ('DK1', begin3),
+        ('DK2', begin1), ('DK2', begin2), ('DK2', begin3),
+    ]
+
+    assert len(redis.hashes['residual-mix:DK2']) == 3
+
+
+@patch('origin.services.energytypes.cache.redis', new_callable=FakeRedis)
+def test__ResidualMixCache__get_residual_mix__everything_cached__does_not_invoke_service(redis):
+    uut = ResidualMixCache()
+    service = Mock()
+
+    uut.store([
+        get_emission_data('DK1', begin1),
+        get_emission_data('DK1', begin2),
+    ])
+
+    # Act
+    result = uut.get_residual_mix(
+        service=service,
+        sector=['DK1'],
+        begin_from=begin1,
+        begin_to=begin2,
+    )
+
+    # Assert
+    service.get_residual_mix.assert_not_called()
+    assert [d.timestamp_utc for d in result] == [begin1, begin2]
+
+
+@patch('origin.services.energytypes.cache.redis')
+def test__ResidualMixCache__get_residual_mix__no_hours_in_range__returns_empty_list(redis):
+    uut = ResidualMixCache()
+    service = Mock()
+
+    # Act
+    result = uut.get_residual_mix(
+        service=service,
+        sector=['DK1'],
+        begin_from=begin2,
+        begin_to=begin1,
+    )
+
+    # Assert
+    assert result == []
+    redis.hmget.assert_not_called()
+    service.get_residual_mix.assert_not_called()